@@ -0,0 +1,65 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.config import settings
+from app.database.database import Base
+# Importar modelos para registrar las tablas en Base.metadata
+from app import models  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Ignorar los objetos de búsqueda creados con SQL propio de cada motor (0004 y 0005)"""
+    if type_ == "table" and name.startswith("productos_fts"):
+        return False
+    if type_ == "column" and name == "busqueda":
+        return False
+    if type_ == "index" and name in ("idx_productos_busqueda", "idx_productos_nombre_trgm", "idx_productos_sabor_trgm"):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Generar el SQL de las migraciones sin conectarse (alembic upgrade --sql)"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+        render_as_batch=settings.DATABASE_URL.startswith("sqlite"),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Aplicar las migraciones sobre DATABASE_URL"""
+    connectable = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite no soporta ALTER TABLE completo: recrear la tabla en lote
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
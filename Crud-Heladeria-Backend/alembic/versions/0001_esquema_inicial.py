@@ -0,0 +1,79 @@
+"""esquema inicial: categorias, productos y usuarios
+
+Equivale a las tablas que creaba Base.metadata.create_all() al arrancar. Una base
+de datos existente creada así se marca con `alembic stamp 0001` en lugar de migrarla.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "categorias",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=50), nullable=False),
+        sa.Column("descripcion", sa.Text(), nullable=True),
+        sa.Column("activo", sa.Boolean(), nullable=True),
+        sa.Column("fecha_creacion", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("nombre"),
+    )
+    op.create_index("ix_categorias_id", "categorias", ["id"])
+
+    op.create_table(
+        "productos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=100), nullable=False),
+        sa.Column("sabor", sa.String(length=50), nullable=False),
+        sa.Column("descripcion", sa.Text(), nullable=True),
+        sa.Column("precio", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column("precio_mayorista", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("cantidad_minima_mayorista", sa.Integer(), nullable=True),
+        sa.Column("stock", sa.Integer(), nullable=False),
+        sa.Column("imagen_url", sa.String(length=500), nullable=True),
+        sa.Column("categoria_id", sa.Integer(), nullable=False),
+        sa.Column("activo", sa.Boolean(), nullable=True),
+        sa.Column("fecha_creacion", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("fecha_actualizacion", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["categoria_id"], ["categorias.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_productos_id", "productos", ["id"])
+
+    op.create_table(
+        "usuarios",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(length=50), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("fecha_creacion", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_usuarios_id", "usuarios", ["id"])
+    op.create_index("ix_usuarios_username", "usuarios", ["username"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_usuarios_username", table_name="usuarios")
+    op.drop_index("ix_usuarios_id", table_name="usuarios")
+    op.drop_table("usuarios")
+    op.drop_index("ix_productos_id", table_name="productos")
+    op.drop_table("productos")
+    op.drop_index("ix_categorias_id", table_name="categorias")
+    op.drop_table("categorias")
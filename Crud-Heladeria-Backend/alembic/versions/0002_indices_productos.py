@@ -0,0 +1,35 @@
+"""índices de productos de database_schema.sql
+
+Filtros por categoría y estado y búsqueda por nombre. IF NOT EXISTS porque las
+bases creadas con database_schema.sql ya los tienen.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("idx_productos_categoria", "productos", ["categoria_id"], if_not_exists=True)
+    op.create_index("idx_productos_activo", "productos", ["activo"], if_not_exists=True)
+    op.create_index("idx_productos_nombre", "productos", ["nombre"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_productos_nombre", table_name="productos", if_exists=True)
+    op.drop_index("idx_productos_activo", table_name="productos", if_exists=True)
+    op.drop_index("idx_productos_categoria", table_name="productos", if_exists=True)
@@ -0,0 +1,49 @@
+"""índices compuestos y parcial para los listados de productos
+
+(categoria_id, activo, id) y (activo, id) cubren los filtros de /productos/ con
+el orden por id de la paginación por cursor. El índice parcial solo contiene los
+productos activos con precio mayorista.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mismas expresiones que el modelo: cada dialecto renderiza el booleano a su manera
+MAYORISTA_WHERE = sa.and_(
+    sa.column("activo") == sa.true(),
+    sa.column("precio_mayorista").isnot(None),
+    sa.column("cantidad_minima_mayorista").isnot(None),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("idx_productos_categoria_activo_id", "productos", ["categoria_id", "activo", "id"])
+    op.create_index("idx_productos_activo_id", "productos", ["activo", "id"])
+    op.create_index(
+        "idx_productos_mayorista_id",
+        "productos",
+        ["id"],
+        postgresql_where=MAYORISTA_WHERE,
+        sqlite_where=MAYORISTA_WHERE,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_productos_mayorista_id", table_name="productos")
+    op.drop_index("idx_productos_activo_id", table_name="productos")
+    op.drop_index("idx_productos_categoria_activo_id", table_name="productos")
@@ -0,0 +1,85 @@
+"""índice de texto completo sobre nombre, sabor y descripción de productos
+
+SQLite: tabla FTS5 con contenido externo (productos_fts) sincronizada por triggers.
+PostgreSQL: columna tsvector generada (busqueda) con índice GIN.
+
+En ambos casos la base de datos mantiene el índice al insertar, actualizar o borrar
+productos, sin código en la aplicación. Estos objetos no están en los modelos;
+alembic/env.py los excluye de autogenerate.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Peso por campo: nombre (A) > sabor (B) > descripción (C)
+TSVECTOR_PRODUCTO = (
+    "setweight(to_tsvector('spanish', coalesce(nombre, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(sabor, '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce(descripcion, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE productos_fts USING fts5("
+            "nombre, sabor, descripcion, content='productos', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute("""
+            CREATE TRIGGER productos_fts_ai AFTER INSERT ON productos BEGIN
+                INSERT INTO productos_fts(rowid, nombre, sabor, descripcion)
+                VALUES (new.id, new.nombre, new.sabor, new.descripcion);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER productos_fts_ad AFTER DELETE ON productos BEGIN
+                INSERT INTO productos_fts(productos_fts, rowid, nombre, sabor, descripcion)
+                VALUES ('delete', old.id, old.nombre, old.sabor, old.descripcion);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER productos_fts_au AFTER UPDATE OF nombre, sabor, descripcion ON productos BEGIN
+                INSERT INTO productos_fts(productos_fts, rowid, nombre, sabor, descripcion)
+                VALUES ('delete', old.id, old.nombre, old.sabor, old.descripcion);
+                INSERT INTO productos_fts(rowid, nombre, sabor, descripcion)
+                VALUES (new.id, new.nombre, new.sabor, new.descripcion);
+            END
+        """)
+        # Indexar los productos existentes
+        op.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+    elif dialecto == "postgresql":
+        op.add_column(
+            "productos",
+            sa.Column("busqueda", postgresql.TSVECTOR(), sa.Computed(TSVECTOR_PRODUCTO, persisted=True))
+        )
+        op.create_index("idx_productos_busqueda", "productos", ["busqueda"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS productos_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS productos_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS productos_fts_ai")
+        op.execute("DROP TABLE IF EXISTS productos_fts")
+    elif dialecto == "postgresql":
+        op.drop_index("idx_productos_busqueda", table_name="productos")
+        op.drop_column("productos", "busqueda")
@@ -0,0 +1,44 @@
+"""índices de trigramas para la búsqueda aproximada (PostgreSQL)
+
+pg_trgm con índices GIN sobre nombre y sabor. En SQLite la búsqueda aproximada usa
+el índice en memoria de app/database/trigramas.py y no hace falta nada aquí.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "idx_productos_nombre_trgm", "productos", ["nombre"],
+        postgresql_using="gin", postgresql_ops={"nombre": "gin_trgm_ops"}
+    )
+    op.create_index(
+        "idx_productos_sabor_trgm", "productos", ["sabor"],
+        postgresql_using="gin", postgresql_ops={"sabor": "gin_trgm_ops"}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("idx_productos_sabor_trgm", table_name="productos")
+    op.drop_index("idx_productos_nombre_trgm", table_name="productos")
@@ -0,0 +1,43 @@
+"""índices para los filtros por rango y el order_by del listado de productos
+
+Cada índice empieza por activo (el catálogo casi siempre se pide con activo=true),
+sigue con la columna de filtro u orden y termina en id, que desempata la paginación
+por cursor: el rango y el orden se resuelven en el índice, sin ordenar en memoria.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICES = {
+    "idx_productos_activo_precio_id": ["activo", "precio", "id"],
+    "idx_productos_activo_nombre_id": ["activo", "nombre", "id"],
+    "idx_productos_activo_stock_id": ["activo", "stock", "id"],
+    "idx_productos_activo_sabor_id": ["activo", "sabor", "id"],
+    "idx_productos_activo_creacion_id": ["activo", "fecha_creacion", "id"],
+    "idx_productos_activo_actualizacion_id": ["activo", "fecha_actualizacion", "id"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for nombre, columnas in INDICES.items():
+        op.create_index(nombre, "productos", columnas)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre in reversed(list(INDICES)):
+        op.drop_index(nombre, table_name="productos")
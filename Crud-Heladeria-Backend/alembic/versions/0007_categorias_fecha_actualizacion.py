@@ -0,0 +1,43 @@
+"""fecha_actualizacion en categorías e índice sobre la de productos
+
+Con ellas la versión del catálogo (ETag / Last-Modified de app/cache/etag.py) sale de
+max(fecha_actualizacion) por índice, sin leer el contenido. Las categorías existentes
+toman su fecha_creacion.
+
+SQLite no admite ADD COLUMN con un DEFAULT no constante (CURRENT_TIMESTAMP), así que
+allí la tabla se recrea en modo batch.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    recrear = "always" if op.get_bind().dialect.name == "sqlite" else "auto"
+    with op.batch_alter_table("categorias", recreate=recrear) as batch_op:
+        batch_op.add_column(
+            sa.Column("fecha_actualizacion", sa.DateTime(), server_default=sa.func.now(), nullable=True)
+        )
+    op.execute("UPDATE categorias SET fecha_actualizacion = fecha_creacion WHERE fecha_creacion IS NOT NULL")
+    op.create_index("idx_productos_actualizacion", "productos", ["fecha_actualizacion"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_productos_actualizacion", table_name="productos")
+    with op.batch_alter_table("categorias") as batch_op:
+        batch_op.drop_column("fecha_actualizacion")
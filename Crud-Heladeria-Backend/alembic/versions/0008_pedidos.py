@@ -0,0 +1,65 @@
+"""pedidos y pedido_items
+
+Pedidos de POST /pedidos: la cabecera con el total y una línea por producto con el
+precio aplicado al vender (minorista o mayorista), que ya no depende de los cambios
+de precio posteriores del producto.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-20 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "pedidos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column("fecha_creacion", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_pedidos_id", "pedidos", ["id"])
+    op.create_index("idx_pedidos_usuario", "pedidos", ["usuario_id"])
+
+    op.create_table(
+        "pedido_items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("pedido_id", sa.Integer(), nullable=False),
+        sa.Column("producto_id", sa.Integer(), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+        sa.Column("precio_unitario", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column("es_precio_mayorista", sa.Boolean(), nullable=False),
+        sa.Column("subtotal", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(["pedido_id"], ["pedidos.id"]),
+        sa.ForeignKeyConstraint(["producto_id"], ["productos.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_pedido_items_id", "pedido_items", ["id"])
+    op.create_index("idx_pedido_items_pedido", "pedido_items", ["pedido_id"])
+    op.create_index("idx_pedido_items_producto", "pedido_items", ["producto_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_pedido_items_producto", table_name="pedido_items")
+    op.drop_index("idx_pedido_items_pedido", table_name="pedido_items")
+    op.drop_index("ix_pedido_items_id", table_name="pedido_items")
+    op.drop_table("pedido_items")
+    op.drop_index("idx_pedidos_usuario", table_name="pedidos")
+    op.drop_index("ix_pedidos_id", table_name="pedidos")
+    op.drop_table("pedidos")
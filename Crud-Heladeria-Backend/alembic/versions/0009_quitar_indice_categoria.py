@@ -0,0 +1,31 @@
+"""Quitar idx_productos_categoria
+
+El índice compuesto (categoria_id, activo, id) de 0003 empieza por categoria_id y ya
+sirve las búsquedas por categoría y la clave foránea; el de una sola columna solo
+cuesta espacio y tiempo en cada escritura.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-21 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("idx_productos_categoria", table_name="productos", if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("idx_productos_categoria", "productos", ["categoria_id"], if_not_exists=True)
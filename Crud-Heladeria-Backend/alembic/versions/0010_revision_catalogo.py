@@ -0,0 +1,110 @@
+"""revisión de productos y categorías: contador de cambios en orden de commit
+
+max(fecha_actualizacion) no basta como versión del catálogo: en SQLite dos cambios en el
+mismo segundo llevan la misma fecha y en PostgreSQL now() es el inicio de la transacción,
+así que un commit tardío puede quedar por detrás de una versión ya leída. La columna
+revision la asigna la base de datos desde un contador único (catalogo_revision) en cada
+alta o modificación; la instantánea del catálogo pide las filas con revision mayor que la
+última vista, sin ventanas de tiempo.
+
+SQLite: triggers AFTER INSERT / AFTER UPDATE (las escrituras ya van de una en una).
+PostgreSQL: triggers de restricción diferidos, que toman el contador al hacer commit; el
+bloqueo de su fila dura hasta el final del commit, así que las revisiones quedan en el
+mismo orden en que los cambios se hacen visibles.
+
+Las filas existentes quedan con revision 0. Estos objetos, salvo las columnas y su
+índice, no están en los modelos; alembic/env.py los excluye de autogenerate.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-21 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS = ("productos", "categorias")
+
+# Cambios hechos por el propio trigger (solo revision) no vuelven a dispararlo
+FUNCION_POSTGRESQL = """
+    CREATE FUNCTION catalogo_nueva_revision() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        nueva bigint;
+    BEGIN
+        UPDATE catalogo_revision SET valor = valor + 1 RETURNING valor INTO nueva;
+        EXECUTE format('UPDATE %I SET revision = $1 WHERE id = $2', TG_TABLE_NAME) USING nueva, NEW.id;
+        RETURN NULL;
+    END
+    $$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "catalogo_revision",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("valor", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO catalogo_revision (id, valor) VALUES (1, 0)")
+    for tabla in TABLAS:
+        op.add_column(tabla, sa.Column("revision", sa.BigInteger(), server_default="0", nullable=False))
+        op.create_index(f"idx_{tabla}_revision", tabla, ["revision"])
+
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "sqlite":
+        for tabla in TABLAS:
+            asignar = f"""
+                UPDATE catalogo_revision SET valor = valor + 1;
+                UPDATE {tabla} SET revision = (SELECT valor FROM catalogo_revision) WHERE id = new.id;
+            """
+            op.execute(f"CREATE TRIGGER {tabla}_revision_ai AFTER INSERT ON {tabla} BEGIN {asignar} END")
+            op.execute(
+                f"CREATE TRIGGER {tabla}_revision_au AFTER UPDATE ON {tabla} "
+                f"WHEN new.revision IS old.revision BEGIN {asignar} END"
+            )
+    elif dialecto == "postgresql":
+        op.execute(FUNCION_POSTGRESQL)
+        for tabla in TABLAS:
+            op.execute(
+                f"CREATE CONSTRAINT TRIGGER {tabla}_revision_ai AFTER INSERT ON {tabla} "
+                "DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION catalogo_nueva_revision()"
+            )
+            op.execute(
+                f"CREATE CONSTRAINT TRIGGER {tabla}_revision_au AFTER UPDATE ON {tabla} "
+                "DEFERRABLE INITIALLY DEFERRED FOR EACH ROW "
+                "WHEN (NEW.revision IS NOT DISTINCT FROM OLD.revision) EXECUTE FUNCTION catalogo_nueva_revision()"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialecto = op.get_bind().dialect.name
+    for tabla in TABLAS:
+        if dialecto == "sqlite":
+            op.execute(f"DROP TRIGGER IF EXISTS {tabla}_revision_au")
+            op.execute(f"DROP TRIGGER IF EXISTS {tabla}_revision_ai")
+        elif dialecto == "postgresql":
+            op.execute(f"DROP TRIGGER IF EXISTS {tabla}_revision_au ON {tabla}")
+            op.execute(f"DROP TRIGGER IF EXISTS {tabla}_revision_ai ON {tabla}")
+    if dialecto == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS catalogo_nueva_revision()")
+    for tabla in TABLAS:
+        op.drop_index(f"idx_{tabla}_revision", table_name=tabla)
+        if dialecto == "sqlite":
+            # DROP COLUMN nativo (SQLite 3.35+): el modo batch recrearía la tabla y se
+            # perderían los triggers de productos_fts
+            op.execute(f"ALTER TABLE {tabla} DROP COLUMN revision")
+        else:
+            op.drop_column(tabla, "revision")
+    op.drop_table("catalogo_revision")
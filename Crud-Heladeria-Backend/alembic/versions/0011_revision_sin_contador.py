@@ -0,0 +1,134 @@
+"""revisión de productos y categorías sin contador compartido
+
+El contador único de 0010 (catalogo_revision) serializaba todas las escrituras del
+catálogo: en PostgreSQL el trigger diferido tomaba su fila hasta el commit y cada
+cambio de stock escribía la fila dos veces. Ahora la revisión sale de cada escritura
+(ver app/database/revision.py):
+
+PostgreSQL: trigger BEFORE INSERT OR UPDATE que pone el id de la transacción en
+NEW.revision, en la misma escritura y sin bloqueos añadidos.
+SQLite: la aplicación la asigna en el propio UPDATE / INSERT (max(revision) + 1); los
+triggers AFTER quedan solo para escrituras con SQL directo que no la tocan.
+
+Las revisiones anteriores, del contador, vuelven a 0: no son comparables con las nuevas.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-22 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, Sequence[str], None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS = ("productos", "categorias")
+
+FUNCION_POSTGRESQL = """
+    CREATE FUNCTION catalogo_revision_xid() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.revision := pg_current_xact_id()::text::bigint;
+        RETURN NEW;
+    END
+    $$
+"""
+
+# Los de 0010, para downgrade()
+FUNCION_CONTADOR_POSTGRESQL = """
+    CREATE FUNCTION catalogo_nueva_revision() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        nueva bigint;
+    BEGIN
+        UPDATE catalogo_revision SET valor = valor + 1 RETURNING valor INTO nueva;
+        EXECUTE format('UPDATE %I SET revision = $1 WHERE id = $2', TG_TABLE_NAME) USING nueva, NEW.id;
+        RETURN NULL;
+    END
+    $$
+"""
+
+
+def _borrar_triggers(dialecto: str) -> None:
+    for tabla in TABLAS:
+        for trigger in (f"{tabla}_revision_au", f"{tabla}_revision_ai", f"{tabla}_revision"):
+            if dialecto == "sqlite":
+                op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            elif dialecto == "postgresql":
+                op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {tabla}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialecto = op.get_bind().dialect.name
+    _borrar_triggers(dialecto)
+    if dialecto == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS catalogo_nueva_revision()")
+    op.drop_table("catalogo_revision")
+    for tabla in TABLAS:
+        op.execute(f"UPDATE {tabla} SET revision = 0")
+
+    if dialecto == "sqlite":
+        for tabla in TABLAS:
+            asignar = f"UPDATE {tabla} SET revision = (SELECT max(revision) + 1 FROM {tabla}) WHERE id = new.id;"
+            op.execute(
+                f"CREATE TRIGGER {tabla}_revision_ai AFTER INSERT ON {tabla} "
+                f"WHEN new.revision = 0 BEGIN {asignar} END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {tabla}_revision_au AFTER UPDATE ON {tabla} "
+                f"WHEN new.revision IS old.revision BEGIN {asignar} END"
+            )
+    elif dialecto == "postgresql":
+        op.execute(FUNCION_POSTGRESQL)
+        for tabla in TABLAS:
+            op.execute(
+                f"CREATE TRIGGER {tabla}_revision BEFORE INSERT OR UPDATE ON {tabla} "
+                "FOR EACH ROW EXECUTE FUNCTION catalogo_revision_xid()"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialecto = op.get_bind().dialect.name
+    _borrar_triggers(dialecto)
+    if dialecto == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS catalogo_revision_xid()")
+    op.create_table(
+        "catalogo_revision",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("valor", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO catalogo_revision (id, valor) VALUES (1, 0)")
+    for tabla in TABLAS:
+        op.execute(f"UPDATE {tabla} SET revision = 0")
+
+    if dialecto == "sqlite":
+        for tabla in TABLAS:
+            asignar = f"""
+                UPDATE catalogo_revision SET valor = valor + 1;
+                UPDATE {tabla} SET revision = (SELECT valor FROM catalogo_revision) WHERE id = new.id;
+            """
+            op.execute(f"CREATE TRIGGER {tabla}_revision_ai AFTER INSERT ON {tabla} BEGIN {asignar} END")
+            op.execute(
+                f"CREATE TRIGGER {tabla}_revision_au AFTER UPDATE ON {tabla} "
+                f"WHEN new.revision IS old.revision BEGIN {asignar} END"
+            )
+    elif dialecto == "postgresql":
+        op.execute(FUNCION_CONTADOR_POSTGRESQL)
+        for tabla in TABLAS:
+            op.execute(
+                f"CREATE CONSTRAINT TRIGGER {tabla}_revision_ai AFTER INSERT ON {tabla} "
+                "DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION catalogo_nueva_revision()"
+            )
+            op.execute(
+                f"CREATE CONSTRAINT TRIGGER {tabla}_revision_au AFTER UPDATE ON {tabla} "
+                "DEFERRABLE INITIALLY DEFERRED FOR EACH ROW "
+                "WHEN (NEW.revision IS NOT DISTINCT FROM OLD.revision) EXECUTE FUNCTION catalogo_nueva_revision()"
+            )
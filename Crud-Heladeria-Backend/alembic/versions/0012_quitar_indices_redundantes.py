@@ -0,0 +1,39 @@
+"""Quitar idx_productos_activo y los índices duplicados de las claves primarias
+
+idx_productos_activo es un prefijo de idx_productos_activo_id (0003): cualquier consulta
+que lo use puede usar el compuesto. ix_productos_id e ix_categorias_id (index=True en
+la clave primaria, 0001) repiten el índice de la clave primaria. Los tres solo añadían
+escrituras en cada alta y en cada cambio de stock.
+
+Los índices compuestos (activo, X, id) de 0006 se quedan: benchmarks/explain_listados.py
+muestra que cada uno aparece en el plan de algún listado.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-22 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, Sequence[str], None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("idx_productos_activo", table_name="productos", if_exists=True)
+    op.drop_index("ix_productos_id", table_name="productos", if_exists=True)
+    op.drop_index("ix_categorias_id", table_name="categorias", if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_categorias_id", "categorias", ["id"], if_not_exists=True)
+    op.create_index("ix_productos_id", "productos", ["id"], if_not_exists=True)
+    op.create_index("idx_productos_activo", "productos", ["activo"], if_not_exists=True)
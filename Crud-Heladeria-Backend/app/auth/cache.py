@@ -0,0 +1,228 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+from sqlalchemy import event, inspect
+
+from app.config import settings
+from app.models.usuario import Usuario
+
+
+@dataclass(frozen=True)
+class _Entrada:
+    digest: bytes
+    expira: float
+    user_id: int
+    is_active: bool
+    fecha_creacion: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class _EstadoUsuario:
+    expira: float
+    username: str
+    is_active: bool
+    fecha_creacion: Optional[datetime]
+
+
+class CredentialCache:
+    """
+    Caché en memoria de credenciales verificadas recientemente (TTL + LRU).
+
+    Solo se guarda un HMAC-SHA256 de usuario y contraseña con una clave aleatoria
+    del proceso; la contraseña en texto plano nunca se almacena. Un acierto evita
+    tanto la consulta a la base de datos como la verificación bcrypt.
+    """
+
+    def __init__(self, ttl_segundos: int, max_entradas: int):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self._clave = secrets.token_bytes(32)
+        self._entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        # Momento de la última invalidación por usuario, para revocar tokens emitidos antes
+        self._invalidaciones: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def habilitada(self) -> bool:
+        return self.ttl_segundos > 0 and self.max_entradas > 0
+
+    def _digest(self, username: str, password: str) -> bytes:
+        mensaje = username.encode("utf-8") + b"\x00" + password.encode("utf-8")
+        return hmac.new(self._clave, mensaje, hashlib.sha256).digest()
+
+    def obtener(self, username: str, password: str) -> Optional[Usuario]:
+        """
+        Devolver un Usuario transitorio si las credenciales están en caché y vigentes
+        """
+        if not self.habilitada:
+            return None
+        digest = self._digest(username, password)
+        with self._lock:
+            entrada = self._entradas.get(username)
+            if entrada is None:
+                return None
+            if entrada.expira <= time.monotonic():
+                del self._entradas[username]
+                return None
+            if not hmac.compare_digest(entrada.digest, digest):
+                return None
+            self._entradas.move_to_end(username)
+        # Instancia no asociada a ninguna sesión: no dispara lazy loads ni expira en commit
+        return Usuario(
+            id=entrada.user_id,
+            username=username,
+            is_active=entrada.is_active,
+            fecha_creacion=entrada.fecha_creacion,
+        )
+
+    def guardar(self, username: str, password: str, user: Usuario) -> None:
+        """
+        Registrar unas credenciales recién verificadas con bcrypt
+        """
+        if not self.habilitada:
+            return
+        entrada = _Entrada(
+            digest=self._digest(username, password),
+            expira=time.monotonic() + self.ttl_segundos,
+            user_id=user.id,
+            is_active=user.is_active,
+            fecha_creacion=user.fecha_creacion,
+        )
+        with self._lock:
+            self._entradas[username] = entrada
+            self._entradas.move_to_end(username)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, username: str) -> None:
+        """
+        Eliminar de la caché las credenciales de un usuario
+        """
+        with self._lock:
+            self._entradas.pop(username, None)
+            ahora = time.time()
+            self._invalidaciones[username] = ahora
+            self._invalidaciones.move_to_end(username)
+            # Pasada la vida de un token, ningún token anterior a la invalidación sigue vigente
+            vida_token = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            while self._invalidaciones and ahora - next(iter(self._invalidaciones.values())) > vida_token:
+                self._invalidaciones.popitem(last=False)
+
+    def invalidado_desde(self, username: str) -> Optional[float]:
+        """
+        Devolver el instante (epoch) de la última invalidación del usuario, si la hubo
+        """
+        with self._lock:
+            return self._invalidaciones.get(username)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._invalidaciones.clear()
+
+
+class TokenUserCache:
+    """
+    Caché en memoria del estado de los usuarios con token (TTL + LRU).
+
+    El token solo prueba quién era el usuario al emitirlo; si sigue existiendo, con el
+    mismo nombre y activo se lee de la base de datos y se reutiliza como mucho
+    `ttl_segundos`. Así una desactivación o un borrado hechos desde cualquier worker (o
+    antes de reiniciar) se aplican a los tokens ya emitidos en ese plazo.
+    """
+
+    def __init__(self, ttl_segundos: int, max_entradas: int):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[int, _Entrada]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def habilitada(self) -> bool:
+        return self.ttl_segundos > 0 and self.max_entradas > 0
+
+    def obtener(self, user_id: int) -> Optional[Usuario]:
+        """
+        Devolver un Usuario transitorio con el estado guardado, o None si no está vigente
+        """
+        if not self.habilitada:
+            return None
+        with self._lock:
+            entrada = self._entradas.get(user_id)
+            if entrada is None:
+                return None
+            if entrada.expira <= time.monotonic():
+                del self._entradas[user_id]
+                return None
+            self._entradas.move_to_end(user_id)
+        return Usuario(
+            id=user_id,
+            username=entrada.username,
+            is_active=entrada.is_active,
+            fecha_creacion=entrada.fecha_creacion,
+        )
+
+    def guardar(self, user: Usuario) -> None:
+        if not self.habilitada:
+            return
+        entrada = _EstadoUsuario(
+            expira=time.monotonic() + self.ttl_segundos,
+            username=user.username,
+            is_active=user.is_active,
+            fecha_creacion=user.fecha_creacion,
+        )
+        with self._lock:
+            self._entradas[user.id] = entrada
+            self._entradas.move_to_end(user.id)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, user_id: int) -> None:
+        with self._lock:
+            self._entradas.pop(user_id, None)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+
+credential_cache = CredentialCache(
+    ttl_segundos=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entradas=settings.AUTH_CACHE_MAX_ENTRIES,
+)
+
+token_user_cache = TokenUserCache(
+    ttl_segundos=settings.AUTH_TOKEN_USER_TTL_SECONDS,
+    max_entradas=settings.AUTH_CACHE_MAX_ENTRIES,
+)
+
+
+# Invalidar la caché cuando cambia la contraseña o el estado de un usuario.
+# Se escucha a nivel de atributo para cubrir cualquier ruta que modifique el modelo;
+# las instancias transitorias (como las que devuelve la propia caché) se ignoran.
+@event.listens_for(Usuario.hashed_password, "set")
+@event.listens_for(Usuario.is_active, "set")
+def _invalidar_por_cambio(target, value, oldvalue, initiator):
+    if inspect(target).has_identity and target.username:
+        credential_cache.invalidar(target.username)
+        token_user_cache.invalidar(target.id)
+
+
+@event.listens_for(Usuario.username, "set")
+def _invalidar_por_renombre(target, value, oldvalue, initiator):
+    if inspect(target).has_identity and isinstance(oldvalue, str):
+        credential_cache.invalidar(oldvalue)
+        token_user_cache.invalidar(target.id)
+
+
+@event.listens_for(Usuario, "after_delete")
+def _invalidar_por_borrado(mapper, connection, target):
+    credential_cache.invalidar(target.username)
+    token_user_cache.invalidar(target.id)
@@ -0,0 +1,65 @@
+"""
+Calibrar el coste de bcrypt para el hardware actual.
+
+Mide el tiempo de hash para cada valor de rounds y recomienda el mayor que entra
+en el presupuesto de latencia (BCRYPT_TARGET_MS por defecto):
+
+    python -m app.auth.calibrar_bcrypt --presupuesto-ms 250
+"""
+from passlib.hash import bcrypt
+from typing import Optional
+import argparse
+import statistics
+import time
+
+from app.config import settings
+
+ROUNDS_MINIMOS = 10
+ROUNDS_MAXIMOS = 16
+
+
+def medir_rounds(rounds: int, muestras: int) -> float:
+    """
+    Mediana en milisegundos de `muestras` hashes con el coste indicado
+    """
+    handler = bcrypt.using(rounds=rounds)
+    tiempos = []
+    for _ in range(muestras):
+        inicio = time.perf_counter()
+        handler.hash("calibracion-bcrypt")
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def calibrar(presupuesto_ms: float, muestras: int) -> Optional[int]:
+    """
+    Devolver el mayor número de rounds cuyo hash cabe en el presupuesto (None si ninguno)
+    """
+    elegido = None
+    for rounds in range(ROUNDS_MINIMOS, ROUNDS_MAXIMOS + 1):
+        ms = medir_rounds(rounds, muestras)
+        print(f"rounds={rounds:2d}  {ms:8.1f} ms")
+        if ms > presupuesto_ms:
+            break
+        elegido = rounds
+    return elegido
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrar el coste de bcrypt")
+    parser.add_argument("--presupuesto-ms", type=float, default=settings.BCRYPT_TARGET_MS,
+                        help="Tiempo máximo por hash en milisegundos")
+    parser.add_argument("--muestras", type=int, default=3,
+                        help="Hashes medidos por cada valor de rounds")
+    args = parser.parse_args()
+
+    rounds = calibrar(args.presupuesto_ms, args.muestras)
+    print(f"\nCoste actual: BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}")
+    if rounds is None:
+        print(f"Aviso: ni siquiera {ROUNDS_MINIMOS} rounds entran en el presupuesto; no se recomienda bajar de ese valor")
+        rounds = ROUNDS_MINIMOS
+    print(f"Recomendado para {args.presupuesto_ms:.0f} ms: BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
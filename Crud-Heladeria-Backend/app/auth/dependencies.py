@@ -1,24 +1,109 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from typing import Optional
+from app.database.database import get_db, get_async_db
 from app.models.usuario import Usuario
-from app.auth.security import authenticate_user
+from app.auth.security import (
+    authenticate_token,
+    authenticate_token_async,
+    authenticate_user,
+    authenticate_user_async
+)
+from app.auth.cache import credential_cache
+from app.auth.throttle import devolver_intento, verificar_intentos
+from app.config import settings
 
-# Configurar HTTP Basic Auth
-security = HTTPBasic()
+# Configurar HTTP Basic Auth y tokens Bearer (ambos opcionales, se valida abajo)
+security = HTTPBasic(auto_error=False)
+bearer_security = HTTPBearer(auto_error=False)
 
-def get_current_user(credentials: HTTPBasicCredentials = Depends(security), db: Session = Depends(get_db)) -> Usuario:
+# Usuarios administradores (ADMIN_USERNAMES): el registro es público, así que no basta con
+# estar autenticado para ver el estado interno del servicio
+ADMIN_USERNAMES = frozenset(nombre.strip() for nombre in settings.ADMIN_USERNAMES.split(",") if nombre.strip())
+
+def _token_invalido() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token inválido o expirado",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _user_sin_bcrypt(credentials: Optional[HTTPBasicCredentials]) -> Optional[Usuario]:
     """
-    Dependencia para obtener el usuario actual autenticado
+    Resolver el usuario por la caché de credenciales, sin base de datos ni bcrypt
     """
-    user = authenticate_user(db, credentials.username, credentials.password)
-    if not user:
+    if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Credenciales inválidas",
+            detail="No autenticado",
             headers={"WWW-Authenticate": "Basic"},
         )
+
+    # Credenciales verificadas recientemente: sin consulta ni bcrypt
+    return credential_cache.obtener(credentials.username, credentials.password)
+
+def _credenciales_invalidas() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Credenciales inválidas",
+        headers={"WWW-Authenticate": "Basic"},
+    )
+
+def get_current_user(
+    request: Request,
+    credentials: Optional[HTTPBasicCredentials] = Depends(security),
+    token: Optional[HTTPAuthorizationCredentials] = Depends(bearer_security),
+    db: Session = Depends(get_db)
+) -> Usuario:
+    """
+    Dependencia para obtener el usuario actual autenticado
+    """
+    # Token firmado: sin bcrypt; el estado del usuario, de la base de datos o de su caché
+    if token:
+        user = authenticate_token(db, token.credentials)
+        if not user:
+            raise _token_invalido()
+        return user
+
+    user = _user_sin_bcrypt(credentials)
+    if user:
+        return user
+
+    verificar_intentos(request, credentials.username)
+    user = authenticate_user(db, credentials.username, credentials.password)
+    if not user:
+        raise _credenciales_invalidas()
+    devolver_intento(request, credentials.username)
+    credential_cache.guardar(credentials.username, credentials.password, user)
+    return user
+
+async def get_current_user_async(
+    request: Request,
+    credentials: Optional[HTTPBasicCredentials] = Depends(security),
+    token: Optional[HTTPAuthorizationCredentials] = Depends(bearer_security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Usuario:
+    """
+    Dependencia para obtener el usuario actual autenticado (sesión asíncrona)
+    """
+    if token:
+        user = await authenticate_token_async(db, token.credentials)
+        if not user:
+            raise _token_invalido()
+        return user
+
+    user = _user_sin_bcrypt(credentials)
+    if user:
+        return user
+
+    verificar_intentos(request, credentials.username)
+    user = await authenticate_user_async(db, credentials.username, credentials.password)
+    if not user:
+        raise _credenciales_invalidas()
+    devolver_intento(request, credentials.username)
+    credential_cache.guardar(credentials.username, credentials.password, user)
     return user
 
 def get_current_active_user(current_user: Usuario = Depends(get_current_user)) -> Usuario:
@@ -30,4 +115,27 @@ def get_current_active_user(current_user: Usuario = Depends(get_current_user)) -
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Usuario inactivo"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_active_user_async(current_user: Usuario = Depends(get_current_user_async)) -> Usuario:
+    """
+    Dependencia para obtener el usuario actual activo (sesión asíncrona)
+    """
+    return get_current_active_user(current_user)
+
+def get_current_admin_user(current_user: Usuario = Depends(get_current_active_user)) -> Usuario:
+    """
+    Dependencia para obtener el usuario actual si es administrador
+    """
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Se requieren permisos de administrador"
+        )
+    return current_user
+
+async def get_current_admin_user_async(current_user: Usuario = Depends(get_current_active_user_async)) -> Usuario:
+    """
+    Dependencia para obtener el usuario actual si es administrador (sesión asíncrona)
+    """
+    return get_current_admin_user(current_user)
\ No newline at end of file
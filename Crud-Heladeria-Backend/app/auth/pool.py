@@ -0,0 +1,131 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from fastapi import HTTPException, status
+import asyncio
+import multiprocessing
+import threading
+import time
+
+from app.config import settings
+
+
+class PasswordPool:
+    """
+    Pool de procesos dedicado al trabajo de bcrypt.
+
+    Aísla el coste de CPU del hash de contraseñas del resto de peticiones: el hilo
+    que atiende la petición solo espera el resultado (sin retener el GIL). El número
+    de tareas admitidas (en ejecución + en cola) está acotado; al superarlo se
+    responde 503 de inmediato en lugar de acumular latencia.
+    """
+
+    def __init__(self, max_workers: int, max_pendientes: int):
+        self.max_workers = max_workers
+        self.max_pendientes = max_pendientes
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_pendientes)
+        self._lock = threading.Lock()
+        self._enviadas = 0
+        self._completadas = 0
+        self._rechazadas = 0
+        self._errores = 0
+        self._en_curso = 0
+        self._tiempo_total = 0.0
+        self._tiempo_max = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: no heredar locks de los hilos del servidor al crear los procesos
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _registrar_fin(self, inicio: float, error: bool) -> None:
+        duracion = time.perf_counter() - inicio
+        with self._lock:
+            self._en_curso -= 1
+            self._completadas += 1
+            if error:
+                self._errores += 1
+            self._tiempo_total += duracion
+            self._tiempo_max = max(self._tiempo_max, duracion)
+
+    def enviar(self, fn, *args) -> Future:
+        """
+        Encolar una tarea en el pool o rechazarla con 503 si está saturado
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rechazadas += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio de autenticación saturado, intente nuevamente",
+                headers={"Retry-After": "1"},
+            )
+
+        inicio = time.perf_counter()
+        with self._lock:
+            self._enviadas += 1
+            self._en_curso += 1
+
+        if self.max_workers <= 0:
+            # Sin procesos dedicados: ejecutar en el hilo actual
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except Exception:
+                self._slots.release()
+                self._registrar_fin(inicio, error=True)
+                raise
+
+        def _al_terminar(f: Future) -> None:
+            self._slots.release()
+            self._registrar_fin(inicio, error=f.exception() is not None)
+
+        future.add_done_callback(_al_terminar)
+        return future
+
+    def ejecutar(self, fn, *args):
+        """
+        Ejecutar una tarea en el pool y esperar su resultado
+        """
+        return self.enviar(fn, *args).result()
+
+    async def ejecutar_async(self, fn, *args):
+        """
+        Ejecutar una tarea en el pool sin bloquear el event loop
+        """
+        return await asyncio.wrap_future(self.enviar(fn, *args))
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pendientes": self.max_pendientes,
+                "en_curso": self._en_curso,
+                "enviadas": self._enviadas,
+                "completadas": self._completadas,
+                "rechazadas": self._rechazadas,
+                "errores": self._errores,
+                "tiempo_medio_ms": round(self._tiempo_total / self._completadas * 1000, 2) if self._completadas else 0.0,
+                "tiempo_max_ms": round(self._tiempo_max * 1000, 2),
+            }
+
+    def cerrar(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordPool(
+    max_workers=settings.PASSWORD_POOL_WORKERS,
+    max_pendientes=settings.PASSWORD_POOL_MAX_QUEUE,
+)
@@ -1,24 +1,67 @@
 from passlib.context import CryptContext
+from jose import JWTError, jwt
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from app.config import Settings, settings
+from app.database import database
 from app.models.usuario import Usuario
+from app.auth.cache import credential_cache, token_user_cache
+from app.auth.pool import password_pool
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 import secrets
 import base64
 
-# Configurar el contexto de hash de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configurar el contexto de hash de contraseñas. min/max fijan el coste objetivo para
+# que needs_update() marque los hashes con un coste distinto al configurado.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
-def hash_password(password: str) -> str:
+# Valor de ejemplo de SECRET_KEY: es público, cualquiera podría firmar tokens con él
+SECRET_KEY_EJEMPLO = Settings.model_fields["SECRET_KEY"].default
+
+def tokens_habilitados() -> bool:
     """
-    Hash de una contraseña usando bcrypt
+    Los tokens de acceso solo se emiten y aceptan con una SECRET_KEY propia
     """
+    return bool(settings.SECRET_KEY) and settings.SECRET_KEY != SECRET_KEY_EJEMPLO
+
+def _hash_en_proceso(password: str) -> str:
     return pwd_context.hash(password)
 
+def _verify_en_proceso(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+def hash_password(password: str) -> str:
+    """
+    Hash de una contraseña usando bcrypt (en el pool de procesos)
+    """
+    return password_pool.ejecutar(_hash_en_proceso, password)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verificar si una contraseña coincide con su hash
+    Verificar si una contraseña coincide con su hash (en el pool de procesos)
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.ejecutar(_verify_en_proceso, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash de una contraseña sin bloquear el event loop
+    """
+    return await password_pool.ejecutar_async(_hash_en_proceso, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verificar una contraseña sin bloquear el event loop
+    """
+    return await password_pool.ejecutar_async(_verify_en_proceso, plain_password, hashed_password)
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[Usuario]:
     """
@@ -31,8 +74,147 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Usu
         return None
     if not user.is_active:
         return None
+    if pwd_context.needs_update(user.hashed_password):
+        rehash_password(user, password)
+    return user
+
+def _sentencia_rehash(user: Usuario, nuevo_hash: str):
+    # UPDATE directo: la contraseña no cambia, así que no se invalidan caché ni tokens
+    return update(Usuario).where(Usuario.id == user.id).values(hashed_password=nuevo_hash)
+
+def rehash_password(user: Usuario, password: str) -> None:
+    """
+    Volver a hashear la contraseña con el coste configurado tras un login correcto, en
+    una transacción propia del primario: no confirma a medias la sesión de la petición
+    """
+    nuevo_hash = hash_password(password)
+    try:
+        with database.engine.begin() as conn:
+            conn.execute(_sentencia_rehash(user, nuevo_hash))
+    except SQLAlchemyError:
+        # El login no depende de la actualización; se reintentará en el próximo
+        pass
+
+async def rehash_password_async(user: Usuario, password: str) -> None:
+    """
+    Volver a hashear la contraseña tras un login correcto (motor asíncrono)
+    """
+    nuevo_hash = await hash_password_async(password)
+    try:
+        async with database.async_engine.begin() as conn:
+            await conn.execute(_sentencia_rehash(user, nuevo_hash))
+    except SQLAlchemyError:
+        pass
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> Optional[Usuario]:
+    """
+    Autenticar un usuario con username y password (sesión asíncrona)
+    """
+    result = await db.execute(select(Usuario).where(Usuario.username == username))
+    user = result.scalars().first()
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    if not user.is_active:
+        return None
+    if pwd_context.needs_update(user.hashed_password):
+        await rehash_password_async(user, password)
+    return user
+
+def create_access_token(user: Usuario, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Generar un token de acceso firmado (JWT) para un usuario autenticado. Solo con
+    tokens_habilitados()
+    """
+    if not tokens_habilitados():
+        raise RuntimeError("SECRET_KEY sin configurar: no se emiten tokens de acceso")
+    ahora = datetime.now(timezone.utc)
+    expira = ahora + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    payload = {
+        "sub": user.username,
+        "uid": user.id,
+        "fca": user.fecha_creacion.isoformat() if user.fecha_creacion else None,
+        # Con fracción de segundo: se compara con el instante exacto de las invalidaciones
+        "iat": ahora.timestamp(),
+        "exp": expira,
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def get_user_from_token(token: str) -> Optional[Usuario]:
+    """
+    Validar la firma de un token de acceso y reconstruir el usuario de sus claims, sin
+    consultar la base de datos (authenticate_token comprueba que sigue existiendo)
+    """
+    if not tokens_habilitados():
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+
+    username = payload.get("sub")
+    user_id = payload.get("uid")
+    if not username or user_id is None:
+        return None
+
+    # Rechazar tokens emitidos antes de un cambio de contraseña o desactivación
+    invalidado = credential_cache.invalidado_desde(username)
+    if invalidado is not None and payload.get("iat", 0) <= invalidado:
+        return None
+
+    fecha_creacion = payload.get("fca")
+    return Usuario(
+        id=user_id,
+        username=username,
+        is_active=True,
+        fecha_creacion=datetime.fromisoformat(fecha_creacion) if fecha_creacion else None,
+    )
+
+def _usuario_vigente(reclamado: Usuario, fila) -> Optional[Usuario]:
+    # El usuario del token tiene que seguir existiendo con el mismo nombre
+    if fila is None or fila.username != reclamado.username:
+        return None
+    user = Usuario(
+        id=fila.id,
+        username=fila.username,
+        is_active=fila.is_active,
+        fecha_creacion=fila.fecha_creacion,
+    )
+    token_user_cache.guardar(user)
     return user
 
+def _consulta_usuario(user_id: int):
+    return select(Usuario.id, Usuario.username, Usuario.is_active, Usuario.fecha_creacion).where(
+        Usuario.id == user_id
+    )
+
+def authenticate_token(db: Session, token: str) -> Optional[Usuario]:
+    """
+    Autenticar un token de acceso: firma y claims, y el usuario actual (existe, mismo
+    nombre; is_active lo comprueba get_current_active_user) leído de la base de datos o
+    de token_user_cache
+    """
+    reclamado = get_user_from_token(token)
+    if reclamado is None:
+        return None
+    guardado = token_user_cache.obtener(reclamado.id)
+    if guardado is not None and guardado.username == reclamado.username:
+        return guardado
+    return _usuario_vigente(reclamado, db.execute(_consulta_usuario(reclamado.id)).first())
+
+async def authenticate_token_async(db: AsyncSession, token: str) -> Optional[Usuario]:
+    """
+    Autenticar un token de acceso (sesión asíncrona)
+    """
+    reclamado = get_user_from_token(token)
+    if reclamado is None:
+        return None
+    guardado = token_user_cache.obtener(reclamado.id)
+    if guardado is not None and guardado.username == reclamado.username:
+        return guardado
+    return _usuario_vigente(reclamado, (await db.execute(_consulta_usuario(reclamado.id))).first())
+
 def decode_basic_auth(authorization: str) -> tuple[str, str] | None:
     """
     Decodificar las credenciales de HTTP Basic Auth
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from typing import Optional
+import math
+import threading
+import time
+
+from app.config import settings
+
+
+class TokenBucketLimiter:
+    """
+    Limitador token bucket en memoria, por clave.
+
+    Cada clave dispone de `capacidad` intentos que se recargan a `por_minuto`. Una
+    clave inactiva el tiempo suficiente para llenar su cubo equivale a no tenerla,
+    así que se descarta; además se acota el total de claves con LRU.
+    """
+
+    def __init__(self, capacidad: int, por_minuto: float, max_claves: int):
+        self.capacidad = capacidad
+        self.tasa = por_minuto / 60.0
+        self.max_claves = max_claves
+        self._cubos: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def habilitado(self) -> bool:
+        return self.capacidad > 0 and self.tasa > 0
+
+    def consumir(self, clave: str) -> float:
+        """
+        Consumir un intento. Devuelve 0 si se permite o los segundos a esperar si no
+        """
+        if not self.habilitado:
+            return 0.0
+        ahora = time.monotonic()
+        with self._lock:
+            cubo = self._cubos.get(clave)
+            if cubo is None:
+                cubo = [float(self.capacidad), ahora]
+                self._cubos[clave] = cubo
+            else:
+                cubo[0] = min(self.capacidad, cubo[0] + (ahora - cubo[1]) * self.tasa)
+                cubo[1] = ahora
+                self._cubos.move_to_end(clave)
+
+            if cubo[0] >= 1:
+                cubo[0] -= 1
+                espera = 0.0
+            else:
+                espera = (1 - cubo[0]) / self.tasa
+
+            self._purgar(ahora)
+        return espera
+
+    def devolver(self, clave: str) -> None:
+        """Devolver un intento consumido que no cuenta (autenticación correcta)"""
+        if not self.habilitado:
+            return
+        with self._lock:
+            cubo = self._cubos.get(clave)
+            if cubo is not None:
+                cubo[0] = min(self.capacidad, cubo[0] + 1)
+
+    def _purgar(self, ahora: float) -> None:
+        tiempo_llenado = self.capacidad / self.tasa
+        while self._cubos:
+            clave, (_, ultimo) = next(iter(self._cubos.items()))
+            if len(self._cubos) > self.max_claves or ahora - ultimo >= tiempo_llenado:
+                del self._cubos[clave]
+            else:
+                break
+
+    def __len__(self) -> int:
+        return len(self._cubos)
+
+
+limitador_usuarios = TokenBucketLimiter(
+    capacidad=settings.LOGIN_RATE_USER_BURST,
+    por_minuto=settings.LOGIN_RATE_USER_PER_MINUTE,
+    max_claves=settings.LOGIN_RATE_MAX_KEYS,
+)
+limitador_ips = TokenBucketLimiter(
+    capacidad=settings.LOGIN_RATE_IP_BURST,
+    por_minuto=settings.LOGIN_RATE_IP_PER_MINUTE,
+    max_claves=settings.LOGIN_RATE_MAX_KEYS,
+)
+
+
+def _ip(request: Request) -> str:
+    return request.client.host if request.client else "desconocida"
+
+
+def verificar_intentos(request: Request, username: Optional[str] = None) -> None:
+    """
+    Aplicar los límites por IP y por usuario antes de consultar la base de datos o usar bcrypt.
+    El intento se cobra por adelantado (así se acotan también los que están en curso); si
+    la autenticación sale bien se devuelve con devolver_intento()
+    """
+    ip = _ip(request)
+    espera = limitador_ips.consumir(ip)
+    if not espera and username is not None:
+        espera = limitador_usuarios.consumir(username)
+    if espera:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiados intentos de autenticación, intente más tarde",
+            headers={"Retry-After": str(math.ceil(espera))},
+        )
+
+
+def devolver_intento(request: Request, username: Optional[str] = None) -> None:
+    """
+    Devolver el intento cobrado por verificar_intentos() a una autenticación correcta:
+    los límites solo frenan los fallos, no a los clientes que se autentican bien
+    """
+    limitador_ips.devolver(_ip(request))
+    if username is not None:
+        limitador_usuarios.devolver(username)
@@ -0,0 +1,452 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter, namedtuple
+from operator import attrgetter
+from typing import Optional
+import threading
+import time
+
+from sqlalchemy import or_, select
+
+from app.cache.etag import consulta_version_catalogo
+from app.config import settings
+from app.database.eventos import suscribir_categorias, suscribir_productos
+from app.database.filtros import FiltrosProducto, OrdenProducto, columnas_orden
+from app.database.paginacion import decodificar_cursor
+from app.database.revision import horizonte_revision
+from app.models.categoria import Categoria
+from app.models.producto import Producto
+
+COLUMNAS_PRODUCTO = tuple(columna.key for columna in Producto.__table__.columns)
+COLUMNAS_CATEGORIA = tuple(columna.key for columna in Categoria.__table__.columns)
+
+# Los mismos campos que la fila de consulta_version_catalogo(): el ETag no cambia de
+# valor se calcule con la base de datos o con la instantánea
+VersionCatalogo = namedtuple("VersionCatalogo", consulta_version_catalogo().selected_columns.keys())
+
+
+def consulta_sincronizacion():
+    """La versión del catálogo y, en la misma lectura, horizonte_revision()"""
+    return consulta_version_catalogo().add_columns(horizonte_revision().label("horizonte"))
+
+
+# Con más productos cambiados en una sincronización, los órdenes se recalculan al pedirlos
+# en lugar de corregirse uno a uno; y con más pendientes no se piden por id
+MAX_CAMBIOS_INCREMENTALES = 256
+MAX_PENDIENTES_POR_ID = 500
+
+_por_id = attrgetter("id")
+
+
+class CategoriaCatalogo(namedtuple("CategoriaCatalogo", COLUMNAS_CATEGORIA)):
+    """Categoría de la instantánea: los valores de sus columnas, inmutables"""
+    __slots__ = ()
+
+
+class ProductoCatalogo(namedtuple("ProductoCatalogo", COLUMNAS_PRODUCTO + ("categoria",))):
+    """
+    Producto de la instantánea, con su categoría como en el ORM (`producto.categoria`).
+    Una tupla con nombre: sin __dict__ y se construye desde la fila sin copiar atributo
+    a atributo.
+    """
+    __slots__ = ()
+
+    # Misma regla de precio que el modelo
+    es_precio_mayorista = Producto.es_precio_mayorista
+    calcular_precio = Producto.calcular_precio
+
+    @classmethod
+    def desde_fila(cls, fila, categoria: CategoriaCatalogo) -> "ProductoCatalogo":
+        return cls._make((*fila, categoria))
+
+    def con_categoria(self, categoria: CategoriaCatalogo) -> "ProductoCatalogo":
+        return self._replace(categoria=categoria)
+
+
+def _es_mayorista(producto) -> bool:
+    return producto.precio_mayorista is not None and producto.cantidad_minima_mayorista is not None
+
+
+def _clave(campo: str):
+    """Clave de orden de un campo, desempatada por id como columnas_orden()"""
+    if campo == "id":
+        return lambda producto: (producto.id,)
+    return attrgetter(campo, "id")
+
+
+def _paginar(claves: list, registros: list, columnas: list, cursor: str = None, skip: int = 0,
+             limit: int = 100, descendente: bool = False, condicion=None) -> list:
+    """
+    paginar() en memoria sobre `registros` ordenados de forma ascendente por `claves`.
+
+    El cursor se localiza por bisección y se recorre desde ahí (hacia atrás si es
+    descendente) hasta reunir limit + 1 registros que cumplan `condicion`, como el
+    LIMIT de paginar(), para que recortar_pagina() publique el cursor siguiente.
+    """
+    if cursor:
+        valores = tuple(decodificar_cursor(cursor, columnas))
+        if descendente:
+            posiciones = range(bisect_left(claves, valores) - 1, -1, -1)
+        else:
+            posiciones = range(bisect_right(claves, valores), len(claves))
+        skip = 0
+    else:
+        posiciones = range(len(claves) - 1, -1, -1) if descendente else range(len(claves))
+
+    pagina = []
+    if limit <= 0:
+        return pagina
+    for posicion in posiciones:
+        registro = registros[posicion]
+        if condicion is not None and not condicion(registro):
+            continue
+        if skip > 0:
+            skip -= 1
+            continue
+        pagina.append(registro)
+        if len(pagina) > limit:
+            break
+    return pagina
+
+
+class Instantanea:
+    """
+    Versión inmutable del catálogo completo (categorías y productos, activos o no: la API
+    también sirve los inactivos) con índices secundarios por id, por categoría y de
+    productos con precio mayorista.
+
+    Quien la obtiene la usa sin locks: los cambios crean otra instancia (derivar())
+    que comparte con esta todo lo que no cambió.
+    """
+
+    def __init__(self, numero: int, version: VersionCatalogo, categorias: dict, productos: dict,
+                 por_categoria: dict, mayoristas: tuple, ordenes: dict = None):
+        self.numero = numero
+        self.version = version
+        self.categorias = categorias          # id -> CategoriaCatalogo
+        self.productos = productos            # id -> ProductoCatalogo
+        self.por_categoria = por_categoria    # categoria_id -> productos ordenados por id
+        self.mayoristas = mayoristas          # productos con precio mayorista, ordenados por id
+        # campo -> (claves, productos) en ese orden; se calculan la primera vez que se piden
+        self._ordenes = ordenes if ordenes is not None else {}
+        self._categorias_ordenadas = None
+
+    @classmethod
+    def construir(cls, numero: int, version: VersionCatalogo, filas_categorias, filas_productos) -> "Instantanea":
+        categorias = {fila.id: CategoriaCatalogo._make(fila) for fila in filas_categorias}
+        productos = {}
+        por_categoria = {}
+        for fila in filas_productos:
+            producto = ProductoCatalogo.desde_fila(fila, categorias[fila.categoria_id])
+            productos[producto.id] = producto
+            por_categoria.setdefault(producto.categoria_id, []).append(producto)
+        por_categoria = {
+            categoria_id: tuple(sorted(lista, key=_por_id)) for categoria_id, lista in por_categoria.items()
+        }
+        mayoristas = tuple(sorted((p for p in productos.values() if _es_mayorista(p)), key=_por_id))
+        return cls(numero, version, categorias, productos, por_categoria, mayoristas)
+
+    def derivar(self, numero: int, version: VersionCatalogo, filas_productos, filas_categorias=None) -> "Instantanea":
+        """
+        Nueva versión con las filas cambiadas. Solo se reconstruye lo que tocan: los
+        índices de sus categorías, el de mayoristas y los órdenes ya calculados.
+        """
+        categorias = self.categorias
+        cambiados = {}  # id -> producto nuevo
+        if filas_categorias is not None:
+            categorias = {}
+            for fila in filas_categorias:
+                categoria = CategoriaCatalogo._make(fila)
+                anterior = self.categorias.get(categoria.id)
+                # Si no cambió se conserva el registro al que ya apuntan sus productos
+                if anterior == categoria:
+                    categoria = anterior
+                categorias[categoria.id] = categoria
+            for categoria_id, categoria in categorias.items():
+                if self.categorias.get(categoria_id) is not categoria:
+                    for producto in self.por_categoria.get(categoria_id, ()):
+                        cambiados[producto.id] = producto.con_categoria(categoria)
+        for fila in filas_productos:
+            cambiados[fila.id] = ProductoCatalogo.desde_fila(fila, categorias[fila.categoria_id])
+
+        if not cambiados:
+            return Instantanea(numero, version, categorias, self.productos, self.por_categoria,
+                               self.mayoristas, self._ordenes)
+
+        anteriores = [self.productos[i] for i in cambiados if i in self.productos]
+        productos = dict(self.productos)
+        productos.update(cambiados)
+
+        nuevos_por_categoria = {}
+        for producto in cambiados.values():
+            nuevos_por_categoria.setdefault(producto.categoria_id, []).append(producto)
+        por_categoria = dict(self.por_categoria)
+        for categoria_id in nuevos_por_categoria.keys() | {p.categoria_id for p in anteriores}:
+            lista = [p for p in self.por_categoria.get(categoria_id, ()) if p.id not in cambiados]
+            lista.extend(nuevos_por_categoria.get(categoria_id, ()))
+            if lista:
+                por_categoria[categoria_id] = tuple(sorted(lista, key=_por_id))
+            else:
+                por_categoria.pop(categoria_id, None)
+
+        mayoristas = [p for p in self.mayoristas if p.id not in cambiados]
+        mayoristas.extend(p for p in cambiados.values() if _es_mayorista(p))
+        mayoristas = tuple(sorted(mayoristas, key=_por_id))
+
+        ordenes = {}
+        if len(cambiados) <= MAX_CAMBIOS_INCREMENTALES:
+            for campo, (claves, ordenados) in self._ordenes.items():
+                clave = _clave(campo)
+                claves, ordenados = list(claves), list(ordenados)
+                for anterior in anteriores:
+                    posicion = bisect_left(claves, clave(anterior))
+                    del claves[posicion]
+                    del ordenados[posicion]
+                for producto in cambiados.values():
+                    valor = clave(producto)
+                    posicion = bisect_right(claves, valor)
+                    claves.insert(posicion, valor)
+                    ordenados.insert(posicion, producto)
+                ordenes[campo] = (claves, ordenados)
+
+        return Instantanea(numero, version, categorias, productos, por_categoria, mayoristas, ordenes)
+
+    def ordenados(self, campo: str):
+        """(claves, productos) de todo el catálogo ordenado por `campo` e id"""
+        orden = self._ordenes.get(campo)
+        if orden is None:
+            clave = _clave(campo)
+            productos = sorted(self.productos.values(), key=clave)
+            orden = ([clave(producto) for producto in productos], productos)
+            self._ordenes[campo] = orden
+        return orden
+
+    def listar_productos(self, filtros: FiltrosProducto, orden: OrdenProducto, cursor: str = None,
+                         skip: int = 0, limit: int = 100) -> list:
+        """Página de GET /productos/ (limit + 1 productos, como paginar())"""
+        columnas, descendente, _ = columnas_orden(orden)
+        campo = orden.value.lstrip("-")
+        # Con categoría o solo mayoristas se ordena el subconjunto del índice, no todo el catálogo
+        if filtros.categoria_id is not None:
+            subconjunto = self.por_categoria.get(filtros.categoria_id, ())
+        elif filtros.con_precio_mayorista:
+            subconjunto = self.mayoristas
+        else:
+            subconjunto = None
+
+        if subconjunto is None:
+            claves, productos = self.ordenados(campo)
+        else:
+            clave = _clave(campo)
+            productos = subconjunto if campo == "id" else sorted(subconjunto, key=clave)
+            claves = [clave(producto) for producto in productos]
+        return _paginar(claves, productos, columnas, cursor, skip, limit, descendente, filtros.cumple)
+
+    def listar_mayoristas(self, cursor: str = None, skip: int = 0, limit: int = 100) -> list:
+        """Página de productos activos con precio mayorista, por id"""
+        claves = [(producto.id,) for producto in self.mayoristas]
+        return _paginar(claves, self.mayoristas, [Producto.id], cursor, skip, limit,
+                        condicion=lambda producto: producto.activo == True)
+
+    def listar_categorias(self, activo: Optional[bool] = None, cursor: str = None, skip: int = 0,
+                          limit: int = 100) -> list:
+        if self._categorias_ordenadas is None:
+            categorias = sorted(self.categorias.values(), key=_por_id)
+            self._categorias_ordenadas = ([(categoria.id,) for categoria in categorias], categorias)
+        claves, categorias = self._categorias_ordenadas
+        condicion = None if activo is None else (lambda categoria: categoria.activo == activo)
+        return _paginar(claves, categorias, [Categoria.id], cursor, skip, limit, condicion=condicion)
+
+    def facetas(self, filtros: FiltrosProducto) -> list:
+        """Filas (categoria_id, nombre, sabor, cantidad) como las de consulta_facetas()"""
+        if filtros.categoria_id is not None:
+            productos = self.por_categoria.get(filtros.categoria_id, ())
+        elif filtros.con_precio_mayorista:
+            productos = self.mayoristas
+        else:
+            productos = self.productos.values()
+        cuentas = Counter((p.categoria_id, p.sabor) for p in productos if filtros.cumple(p))
+        return [
+            (categoria_id, self.categorias[categoria_id].nombre, sabor, cantidad)
+            for (categoria_id, sabor), cantidad in cuentas.items()
+        ]
+
+
+class CatalogoEnMemoria:
+    """
+    Instantánea vigente del catálogo y su sincronización con la base de datos.
+
+    Las lecturas usan la instantánea sin consultar nada. Como mucho cada `intervalo`
+    segundos (o tras un commit de productos o categorías en este proceso) se compara la
+    versión del catálogo con la de la base de datos, una consulta resuelta por índices;
+    si cambió, se piden solo las filas nuevas o modificadas y se deriva la versión
+    siguiente. La carga completa solo se hace la primera vez.
+    """
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.actual: Optional[Instantanea] = None
+        self._comprobado = 0.0  # time.monotonic() de la última comprobación
+        # Revisiones de productos y categorías a partir de las cuales (sin incluirlas)
+        # aún pueden aparecer cambios: ver _calcular_desde()
+        self._desde = (0, 0)
+        # Cambios confirmados en este proceso que aún no están en la instantánea
+        self._pendientes = set()
+        self._categorias_pendientes = False
+        self._lock_pendientes = threading.Lock()
+        # Una sola sincronización a la vez (sin esperar: ver sincronizar())
+        self._lock = threading.Lock()
+
+    @property
+    def habilitado(self) -> bool:
+        return settings.CATALOG_SNAPSHOT
+
+    @property
+    def desactualizado(self) -> bool:
+        return (
+            self.actual is None
+            or bool(self._pendientes)
+            or self._categorias_pendientes
+            or time.monotonic() - self._comprobado >= self.intervalo
+        )
+
+    def marcar_productos(self, cambios: dict) -> None:
+        with self._lock_pendientes:
+            self._pendientes.update(cambios)
+
+    def marcar_categorias(self, categoria_ids: set) -> None:
+        self._categorias_pendientes = True
+
+    def sincronizar(self, ejecutar) -> Instantanea:
+        """
+        Poner al día la instantánea. `ejecutar(sentencia)` devuelve las filas, así sirve
+        con Session y con AsyncSession (vía run_sync).
+        """
+        # No se espera al lock: con el motor asíncrono run_sync corre en el hilo del
+        # bucle de eventos y esperar aquí lo bloquearía. Mientras otra petición
+        # sincroniza se sirve la instantánea actual.
+        if not self._lock.acquire(blocking=False):
+            if self.actual is not None:
+                return self.actual
+            return self._cargar(ejecutar, VersionCatalogo(*ejecutar(consulta_version_catalogo())[0]))
+        try:
+            if not self.desactualizado:
+                return self.actual
+            with self._lock_pendientes:
+                pendientes, self._pendientes = self._pendientes, set()
+                categorias_pendientes, self._categorias_pendientes = self._categorias_pendientes, False
+            try:
+                comprobado = time.monotonic()
+                *version, horizonte = ejecutar(consulta_sincronizacion())[0]
+                version = VersionCatalogo(*version)
+                if self.actual is None:
+                    self.actual = self._cargar(ejecutar, version)
+                else:
+                    self.actual = self._derivar(ejecutar, version, pendientes, categorias_pendientes)
+                self._desde = self._calcular_desde(version, horizonte)
+                self._comprobado = comprobado
+            except BaseException:
+                with self._lock_pendientes:
+                    self._pendientes |= pendientes
+                    self._categorias_pendientes = self._categorias_pendientes or categorias_pendientes
+                raise
+            return self.actual
+        finally:
+            self._lock.release()
+
+    def _cargar(self, ejecutar, version: VersionCatalogo) -> Instantanea:
+        # Productos antes que categorías: toda categoría de un producto leído ya existe
+        filas_productos = ejecutar(select(*[getattr(Producto, nombre) for nombre in COLUMNAS_PRODUCTO]))
+        filas_categorias = ejecutar(select(*[getattr(Categoria, nombre) for nombre in COLUMNAS_CATEGORIA]))
+        return Instantanea.construir(1, version, filas_categorias, filas_productos)
+
+    @staticmethod
+    def _calcular_desde(version: VersionCatalogo, horizonte) -> tuple:
+        """
+        Con el horizonte de la lectura (PostgreSQL) se vuelven a pedir las revisiones de
+        las transacciones que estaban en curso; sin él (SQLite) los cambios siguientes
+        tienen una revisión mayor que la máxima vista
+        """
+        productos = version.productos_revision or 0
+        categorias = version.categorias_revision or 0
+        if horizonte is None:
+            return productos, categorias
+        return min(productos, horizonte - 1), min(categorias, horizonte - 1)
+
+    def _derivar(self, ejecutar, version: VersionCatalogo, pendientes: set, categorias_pendientes: bool) -> Instantanea:
+        actual = self.actual
+        desde_productos, desde_categorias = self._desde
+        # Transacciones en curso en la lectura anterior que pueden confirmar cambios con
+        # una revisión menor que la máxima ya vista, sin que la versión lo refleje
+        productos_en_curso = desde_productos < (actual.version.productos_revision or 0)
+        categorias_en_curso = desde_categorias < (actual.version.categorias_revision or 0)
+        if (
+            version == actual.version and not pendientes and not categorias_pendientes
+            and not productos_en_curso and not categorias_en_curso
+        ):
+            return actual
+
+        condiciones = []
+        if (
+            len(pendientes) > MAX_PENDIENTES_POR_ID
+            or version.productos_revision != actual.version.productos_revision
+            or productos_en_curso
+        ):
+            # Altas y modificaciones desde la última lectura, por índice
+            # (app/database/revision.py)
+            condiciones.append(Producto.revision > desde_productos)
+        if pendientes and len(pendientes) <= MAX_PENDIENTES_POR_ID:
+            condiciones.append(Producto.id.in_(pendientes))
+        filas_productos = []
+        if condiciones:
+            filas_productos = ejecutar(
+                select(*[getattr(Producto, nombre) for nombre in COLUMNAS_PRODUCTO]).where(or_(*condiciones))
+            )
+
+        filas_categorias = None
+        if (
+            categorias_pendientes
+            or version.categorias_revision != actual.version.categorias_revision
+            or categorias_en_curso
+            or version.categorias != actual.version.categorias
+            or any(fila.categoria_id not in actual.categorias for fila in filas_productos)
+        ):
+            # Son pocas: se leen todas y derivar() conserva las que no cambiaron
+            filas_categorias = ejecutar(select(*[getattr(Categoria, nombre) for nombre in COLUMNAS_CATEGORIA]))
+        if version == actual.version and not filas_productos and filas_categorias is None:
+            return actual
+        return actual.derivar(actual.numero + 1, version, filas_productos, filas_categorias)
+
+    def obtener(self, db) -> Instantanea:
+        """Instantánea vigente para una petición con Session"""
+        if not self.desactualizado:
+            return self.actual
+        return self.sincronizar(lambda sentencia: db.execute(sentencia).all())
+
+    async def obtener_async(self, db) -> Instantanea:
+        """Instantánea vigente para una petición con AsyncSession"""
+        if not self.desactualizado:
+            return self.actual
+        return await db.run_sync(
+            lambda sesion: self.sincronizar(lambda sentencia: sesion.execute(sentencia).all())
+        )
+
+    def estadisticas(self) -> dict:
+        actual = self.actual
+        if actual is None:
+            return {"habilitado": self.habilitado, "cargado": False}
+        return {
+            "habilitado": self.habilitado,
+            "cargado": True,
+            "version": actual.numero,
+            "categorias": len(actual.categorias),
+            "productos": len(actual.productos),
+            "mayoristas": len(actual.mayoristas),
+            "ordenes_calculados": sorted(actual._ordenes),
+            "segundos_desde_comprobacion": round(time.monotonic() - self._comprobado, 3),
+            "intervalo_segundos": self.intervalo,
+        }
+
+
+catalogo = CatalogoEnMemoria(settings.CATALOG_SNAPSHOT_SYNC_SECONDS)
+suscribir_productos(catalogo.marcar_productos)
+suscribir_categorias(catalogo.marcar_categorias)
@@ -0,0 +1,198 @@
+from functools import lru_cache
+from typing import Optional
+import gzip
+import zlib
+
+import brotli
+
+from app.config import settings
+
+# Codificaciones que sabe producir el servidor
+SOPORTADAS = ("br", "gzip")
+
+# Tipos de contenido que merece la pena comprimir (las imágenes, etc. ya vienen comprimidas)
+TIPOS_COMPRIMIBLES = (b"application/json", b"text/", b"application/javascript", b"application/xml", b"image/svg+xml")
+
+
+@lru_cache(maxsize=8)
+def _codificaciones(valor: str) -> tuple:
+    return tuple(c for c in (parte.strip().lower() for parte in valor.split(",")) if c in SOPORTADAS)
+
+
+def codificaciones() -> tuple:
+    """Las de COMPRESSION_ENCODINGS por orden de preferencia; vacío si la compresión está desactivada"""
+    return _codificaciones(settings.COMPRESSION_ENCODINGS)
+
+
+@lru_cache(maxsize=256)
+def _negociar(accept_encoding: str, preferidas: tuple) -> Optional[str]:
+    pesos = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.partition(";")
+        q = 1.0
+        for parametro in parametros.split(";"):
+            clave, _, valor = parametro.partition("=")
+            if clave.strip().lower() == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        pesos[nombre.strip().lower()] = q
+
+    elegida, mejor = None, 0.0
+    for codificacion in preferidas:
+        q = pesos.get(codificacion, pesos.get("*", 0.0))
+        if q > mejor:
+            elegida, mejor = codificacion, q
+    return elegida
+
+
+def negociar(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Codificación para una petición según su Accept-Encoding: la de mayor q y, con la misma
+    q, la primera de COMPRESSION_ENCODINGS. None si no acepta ninguna (sin comprimir).
+    """
+    preferidas = codificaciones()
+    if not accept_encoding or not preferidas:
+        return None
+    return _negociar(accept_encoding, preferidas)
+
+
+def comprimible(headers) -> bool:
+    """Si una respuesta con estas cabeceras ASGI se puede comprimir (por tipo y sin codificar ya)"""
+    tipo = None
+    for clave, valor in headers:
+        clave = clave.lower()
+        if clave == b"content-encoding":
+            return False
+        if clave == b"content-type":
+            tipo = valor.lower()
+    return tipo is not None and tipo.startswith(TIPOS_COMPRIMIBLES)
+
+
+def comprimir(cuerpo: bytes, codificacion: str) -> bytes:
+    """Un cuerpo completo con el nivel configurado para la codificación"""
+    if codificacion == "br":
+        return brotli.compress(cuerpo, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0: la misma entrada da los mismos bytes
+    return gzip.compress(cuerpo, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class Compresor:
+    """Compresión incremental de una respuesta en varias partes (cada parte sale al llegar)"""
+
+    def __init__(self, codificacion: str):
+        if codificacion == "br":
+            self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def parte(self, datos: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(datos) + self._brotli.flush()
+        return self._zlib.compress(datos) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def fin(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def cabeceras_codificadas(headers, codificacion: Optional[str], longitud: Optional[int]) -> list:
+    """
+    Cabeceras de una respuesta comprimible: Vary: Accept-Encoding siempre (la representación
+    depende de la petición) y, si se comprime, Content-Encoding y el Content-Length del
+    cuerpo comprimido (sin Content-Length si se envía en partes)
+    """
+    resultado = []
+    vary = False
+    for clave, valor in headers:
+        clave = clave.lower()
+        if clave == b"content-length" and codificacion is not None:
+            continue
+        if clave == b"vary":
+            vary = True
+            if b"accept-encoding" not in valor.lower() and valor.strip() != b"*":
+                valor = valor + b", Accept-Encoding"
+        resultado.append((clave, valor))
+    if not vary:
+        resultado.append((b"vary", b"Accept-Encoding"))
+    if codificacion is not None:
+        resultado.append((b"content-encoding", codificacion.encode()))
+        if longitud is not None:
+            resultado.append((b"content-length", str(longitud).encode()))
+    return resultado
+
+
+def _cabecera(scope, nombre: bytes) -> Optional[str]:
+    for clave, valor in scope["headers"]:
+        if clave == nombre:
+            return valor.decode("latin-1")
+    return None
+
+
+class CompresionMiddleware:
+    """
+    Compresión gzip / brotli negociada con Accept-Encoding.
+
+    Se comprimen las respuestas de tipos de texto (JSON sobre todo) de al menos
+    COMPRESSION_MIN_BYTES: por debajo la cabecera y la CPU cuestan más de lo que se ahorra.
+    Las respuestas que ya llegan codificadas pasan tal cual; es el caso de los aciertos de
+    la caché de respuestas, que guarda el cuerpo ya comprimido junto a la entrada
+    (ver CacheRespuestasMiddleware) y así no se vuelve a comprimir en cada petición.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not codificaciones():
+            await self.app(scope, receive, send)
+            return
+        codificacion = negociar(_cabecera(scope, b"accept-encoding"))
+        # El inicio de una respuesta comprimible se retiene hasta ver el cuerpo
+        inicio = {}
+        compresor = None
+
+        async def enviar(mensaje):
+            nonlocal compresor
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+                if 200 <= estado and estado not in (204, 304) and comprimible(mensaje.get("headers", [])):
+                    inicio.update(mensaje)
+                    return
+            elif mensaje["type"] == "http.response.body" and inicio:
+                retenido = dict(inicio)
+                inicio.clear()
+                cuerpo = mensaje.get("body", b"")
+                if not mensaje.get("more_body", False):
+                    if len(cuerpo) < settings.COMPRESSION_MIN_BYTES:
+                        await send(retenido)
+                        await send(mensaje)
+                        return
+                    if codificacion is not None:
+                        cuerpo = comprimir(cuerpo, codificacion)
+                    retenido["headers"] = cabeceras_codificadas(retenido.get("headers", []), codificacion, len(cuerpo))
+                    await send(retenido)
+                    await send({"type": "http.response.body", "body": cuerpo})
+                    return
+                # Respuesta en partes: se comprime cada parte según llega
+                if codificacion is not None:
+                    compresor = Compresor(codificacion)
+                    cuerpo = compresor.parte(cuerpo)
+                retenido["headers"] = cabeceras_codificadas(retenido.get("headers", []), codificacion, None)
+                await send(retenido)
+                await send({"type": "http.response.body", "body": cuerpo, "more_body": True})
+                return
+            elif mensaje["type"] == "http.response.body" and compresor is not None:
+                mas = mensaje.get("more_body", False)
+                cuerpo = compresor.parte(mensaje.get("body", b""))
+                if not mas:
+                    cuerpo += compresor.fin()
+                await send({"type": "http.response.body", "body": cuerpo, "more_body": mas})
+                return
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
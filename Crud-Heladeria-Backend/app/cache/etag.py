@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models.categoria import Categoria
+from app.models.producto import Producto
+
+# SQLite guarda las fechas con resolución de un segundo: dos cambios en el mismo segundo
+# darían la misma versión. Como hacen los servidores web con los ficheros, una versión de
+# hace menos de un segundo no se publica como validador (la respuesta va sin ETag).
+RESOLUCION = timedelta(seconds=1)
+
+
+def consulta_version_catalogo():
+    """
+    Versión de todo el catálogo: cambia con cualquier alta o modificación de productos
+    y con cualquier alta, baja o modificación de categorías.
+
+    Cada término es un max()/count() que se resuelve con un índice (o sobre la tabla
+    pequeña de categorías), sin recorrer productos: los productos no se borran (baja
+    lógica, que actualiza fecha_actualizacion) y un alta sube el id máximo.
+
+    Las fechas pueden repetirse (resolución de un segundo en SQLite, inicio de la
+    transacción en PostgreSQL); la revisión (app/database/revision.py) cambia con cada
+    alta o modificación.
+    """
+    return select(
+        select(func.max(Producto.fecha_actualizacion)).scalar_subquery().label("productos_modificado"),
+        select(func.max(Producto.id)).scalar_subquery().label("productos_ultimo_id"),
+        select(func.max(Producto.revision)).scalar_subquery().label("productos_revision"),
+        select(func.max(Categoria.fecha_actualizacion)).scalar_subquery().label("categorias_modificado"),
+        select(func.count(Categoria.id)).scalar_subquery().label("categorias"),
+        select(func.max(Categoria.id)).scalar_subquery().label("categorias_ultimo_id"),
+        select(func.max(Categoria.revision)).scalar_subquery().label("categorias_revision"),
+    )
+
+
+def _utc(fecha: datetime) -> datetime:
+    # Las columnas DateTime no guardan zona: CURRENT_TIMESTAMP / now() en UTC
+    if fecha.tzinfo is None:
+        return fecha.replace(tzinfo=timezone.utc)
+    return fecha.astimezone(timezone.utc)
+
+
+def etag(request: Request, version) -> str:
+    """
+    ETag fuerte a partir de la versión de los datos y de la URL: cada combinación de
+    filtros, orden, campos o cursor es una representación distinta
+    """
+    datos = repr((request.url.path, request.url.query, tuple(version))).encode()
+    return f'"{hashlib.blake2b(datos, digest_size=16).hexdigest()}"'
+
+
+def no_modificado(cabeceras, etiqueta: str, modificado: Optional[datetime]) -> bool:
+    """
+    Si las cabeceras condicionales de la petición coinciden con la versión que tiene el
+    cliente (`cabeceras` es request.headers o equivalente)
+    """
+    if_none_match = cabeceras.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match manda sobre If-Modified-Since (RFC 9110, 13.2.2)
+        if if_none_match.strip() == "*":
+            return True
+        return any(valor.strip().removeprefix("W/") == etiqueta for valor in if_none_match.split(","))
+
+    if_modified_since = cabeceras.get("if-modified-since")
+    if if_modified_since and modificado is not None:
+        try:
+            fecha = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _utc(modificado).replace(microsecond=0) <= _utc(fecha)
+    return False
+
+
+def condicional(request: Request, response: Response, version, *fechas: Optional[datetime]) -> Optional[Response]:
+    """
+    Poner ETag, Last-Modified (la más reciente de `fechas`) y Cache-Control en `response`.
+
+    Si el cliente ya tiene esta versión devuelve la respuesta 304, que el endpoint debe
+    devolver tal cual sin consultar ni serializar nada más; si no, None.
+    """
+    cabeceras = {}
+    if settings.CACHE_CONTROL_CATALOGO:
+        cabeceras["Cache-Control"] = settings.CACHE_CONTROL_CATALOGO
+
+    modificado = max((fecha for fecha in fechas if fecha is not None), default=None)
+    if modificado is not None and abs(datetime.now(timezone.utc) - _utc(modificado)) < RESOLUCION:
+        # Tampoco se guarda en la caché de respuestas: la siguiente ya llevará validadores
+        request.state.version_reciente = True
+        response.headers.update(cabeceras)
+        return None
+
+    etiqueta = etag(request, version)
+    cabeceras["ETag"] = etiqueta
+    if modificado is not None:
+        cabeceras["Last-Modified"] = format_datetime(_utc(modificado).replace(microsecond=0), usegmt=True)
+
+    response.headers.update(cabeceras)
+    if no_modificado(request.headers, etiqueta, modificado):
+        return Response(status_code=304, headers=cabeceras)
+    return None
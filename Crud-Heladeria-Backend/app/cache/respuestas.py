@@ -0,0 +1,449 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+import asyncio
+import importlib
+import re
+import threading
+import time
+
+from starlette.requests import Request
+
+from app.cache.compresion import cabeceras_codificadas, codificaciones, comprimible, comprimir, negociar
+from app.cache.etag import no_modificado
+from app.config import settings
+from app.database.database import leer_del_primario
+
+# Vigencia por defecto de las respuestas con un almacén compartido (RESPONSE_CACHE_BACKEND).
+# Con la LRU de cada proceso la caché solo se activa si se define RESPONSE_CACHE_TTL_SECONDS
+TTL_ALMACEN_COMPARTIDO = 30
+
+
+def vigencia() -> float:
+    """Segundos que vale una respuesta guardada (0: caché desactivada)"""
+    if settings.RESPONSE_CACHE_TTL_SECONDS is not None:
+        return settings.RESPONSE_CACHE_TTL_SECONDS
+    return TTL_ALMACEN_COMPARTIDO if settings.RESPONSE_CACHE_BACKEND else 0
+
+
+# Etiquetas de invalidación. Cada respuesta guardada lleva las de los datos que contiene y
+# los handlers que escriben invalidan las de lo que cambian:
+#   "productos"       cualquier listado o búsqueda de productos
+#   "categorias"      todo lo que incluye datos de categorías (anidadas en los productos)
+#   "producto:{id}"   el detalle y el precio de un producto
+#   "categoria:{id}"  el detalle de una categoría (con sus productos) y /productos/categoria/{id}
+REGLAS = [
+    (re.compile(r"^/api/v1/productos/(\d+)/?$"), lambda m: {f"producto:{m[1]}", "categorias"}),
+    (re.compile(r"^/api/v1/productos/(\d+)/precio/?$"), lambda m: {f"producto:{m[1]}"}),
+    (re.compile(r"^/api/v1/productos/categoria/(\d+)/?$"), lambda m: {f"categoria:{m[1]}"}),
+    (re.compile(r"^/api/v1/productos(/.*)?$"), lambda m: {"productos", "categorias"}),
+    (re.compile(r"^/api/v1/categorias/(\d+)/?$"), lambda m: {f"categoria:{m[1]}"}),
+    (re.compile(r"^/api/v1/categorias/?$"), lambda m: {"categorias"}),
+]
+
+# Cabecera con el resultado de la caché (HIT, MISS o STALE); no se guarda con la entrada
+CABECERA_ESTADO = b"x-cache"
+
+
+def etiquetas_ruta(path: str) -> Optional[frozenset]:
+    """Etiquetas de una ruta cacheable; None si la ruta no se cachea"""
+    for patron, etiquetas in REGLAS:
+        coincidencia = patron.match(path)
+        if coincidencia:
+            return frozenset(etiquetas(coincidencia))
+    return None
+
+
+def clave_peticion(scope) -> str:
+    """Ruta más parámetros normalizados: el mismo listado pedido con los parámetros en otro orden comparte entrada"""
+    parametros = sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+    return f"{scope['path']}?{urlencode(parametros)}"
+
+
+@dataclass
+class EntradaCache:
+    status: int
+    headers: list
+    cuerpo: bytes
+    etiquetas: frozenset
+    creada: float = field(default_factory=time.time)
+    # Cuerpo ya comprimido por codificación ("br", "gzip"), añadido la primera vez que se pide
+    variantes: dict = field(default_factory=dict)
+
+    @property
+    def tamano(self) -> int:
+        return (
+            len(self.cuerpo)
+            + sum(len(v) for v in self.variantes.values())
+            + sum(len(k) + len(v) for k, v in self.headers)
+        )
+
+    def cabecera(self, nombre: bytes) -> Optional[str]:
+        for clave, valor in self.headers:
+            if clave == nombre:
+                return valor.decode("latin-1")
+        return None
+
+
+class AlmacenRespuestas(ABC):
+    """
+    Interfaz del almacén de la caché de respuestas.
+
+    AlmacenLRU guarda en memoria del proceso; un almacén compartido (Redis, memcached...)
+    implementa los mismos métodos para que todos los workers vean las mismas entradas y
+    las mismas invalidaciones, y se configura con RESPONSE_CACHE_BACKEND="modulo:Clase".
+
+    `generacion()` cambia con cada invalidación: una respuesta calculada mientras se
+    invalidaba no se guarda (podría tener los datos de antes de la escritura).
+    """
+
+    @abstractmethod
+    def obtener(self, clave: str) -> Optional[EntradaCache]:
+        ...
+
+    @abstractmethod
+    def guardar(self, clave: str, entrada: EntradaCache, generacion: int) -> bool:
+        ...
+
+    @abstractmethod
+    def invalidar(self, etiquetas) -> int:
+        ...
+
+    @abstractmethod
+    def generacion(self) -> int:
+        ...
+
+    @abstractmethod
+    def limpiar(self) -> None:
+        ...
+
+    def estadisticas(self) -> dict:
+        return {}
+
+
+class AlmacenLRU(AlmacenRespuestas):
+    """
+    Almacén en memoria del proceso (LRU) limitado en bytes: al superar `max_bytes` se
+    descartan las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entradas: "OrderedDict[str, EntradaCache]" = OrderedDict()
+        self._por_etiqueta = {}  # etiqueta -> claves
+        self._bytes = 0
+        self._generacion = 0
+        self._descartadas = 0
+        self._lock = threading.Lock()
+
+    def _quitar(self, clave: str) -> None:
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return
+        self._bytes -= entrada.tamano
+        for etiqueta in entrada.etiquetas:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+    def obtener(self, clave: str) -> Optional[EntradaCache]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave: str, entrada: EntradaCache, generacion: int) -> bool:
+        # Una entrada de más de la cuarta parte del presupuesto desplazaría demasiadas
+        if entrada.tamano > self.max_bytes // 4:
+            return False
+        with self._lock:
+            if generacion != self._generacion:
+                return False
+            self._quitar(clave)
+            self._entradas[clave] = entrada
+            self._bytes += entrada.tamano
+            for etiqueta in entrada.etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(clave)
+            while self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+                self._descartadas += 1
+        return True
+
+    def invalidar(self, etiquetas) -> int:
+        with self._lock:
+            self._generacion += 1
+            claves = set()
+            for etiqueta in etiquetas:
+                claves |= self._por_etiqueta.get(etiqueta, set())
+            for clave in claves:
+                self._quitar(clave)
+            return len(claves)
+
+    def generacion(self) -> int:
+        with self._lock:
+            return self._generacion
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._generacion += 1
+            self._entradas.clear()
+            self._por_etiqueta.clear()
+            self._bytes = 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "descartadas": self._descartadas,
+            }
+
+
+class AlmacenCompartidoLocal(AlmacenRespuestas):
+    """
+    Sustituto local de un almacén compartido para pruebas: todas las instancias usan el
+    mismo almacenamiento, como varios workers conectados a un mismo servidor de caché.
+    """
+
+    _compartido: Optional[AlmacenLRU] = None
+    _lock_clase = threading.Lock()
+
+    def __init__(self):
+        with AlmacenCompartidoLocal._lock_clase:
+            if AlmacenCompartidoLocal._compartido is None:
+                AlmacenCompartidoLocal._compartido = AlmacenLRU(settings.RESPONSE_CACHE_MAX_BYTES)
+        self._almacen = AlmacenCompartidoLocal._compartido
+
+    def obtener(self, clave: str) -> Optional[EntradaCache]:
+        return self._almacen.obtener(clave)
+
+    def guardar(self, clave: str, entrada: EntradaCache, generacion: int) -> bool:
+        return self._almacen.guardar(clave, entrada, generacion)
+
+    def invalidar(self, etiquetas) -> int:
+        return self._almacen.invalidar(etiquetas)
+
+    def generacion(self) -> int:
+        return self._almacen.generacion()
+
+    def limpiar(self) -> None:
+        self._almacen.limpiar()
+
+    def estadisticas(self) -> dict:
+        return self._almacen.estadisticas()
+
+
+def crear_almacen() -> Optional[AlmacenRespuestas]:
+    """Almacén configurado; None si la caché de respuestas está desactivada"""
+    if settings.RESPONSE_CACHE_MAX_BYTES <= 0 or vigencia() <= 0:
+        return None
+    if settings.RESPONSE_CACHE_BACKEND:
+        modulo, _, clase = settings.RESPONSE_CACHE_BACKEND.partition(":")
+        return getattr(importlib.import_module(modulo), clase)()
+    return AlmacenLRU(settings.RESPONSE_CACHE_MAX_BYTES)
+
+
+class MetricasCache:
+    """Contadores de la caché de respuestas de este proceso"""
+
+    CONTADORES = (
+        "aciertos", "fallos", "vencidas", "no_modificadas", "omitidas", "guardadas", "invalidaciones",
+        "compresiones", "precomprimidas",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = dict.fromkeys(self.CONTADORES, 0)
+
+    def sumar(self, contador: str, cantidad: int = 1) -> None:
+        with self._lock:
+            self._valores[contador] += cantidad
+
+    def valores(self) -> dict:
+        with self._lock:
+            valores = dict(self._valores)
+        consultas = valores["aciertos"] + valores["vencidas"] + valores["fallos"]
+        valores["tasa_aciertos"] = round((valores["aciertos"] + valores["vencidas"]) / consultas, 4) if consultas else 0.0
+        return valores
+
+
+almacen = crear_almacen()
+metricas = MetricasCache()
+
+
+def invalidar(etiquetas) -> None:
+    """Descartar las respuestas guardadas con alguna de estas etiquetas"""
+    if almacen is not None:
+        metricas.sumar("invalidaciones", almacen.invalidar(etiquetas))
+
+
+def invalidar_producto(producto_id: int, *categoria_ids: int) -> None:
+    """Tras escribir un producto: su detalle, los listados y sus categorías (la anterior y la nueva)"""
+    invalidar({"productos", f"producto:{producto_id}", *(f"categoria:{c}" for c in categoria_ids if c is not None)})
+
+
+def invalidar_productos(producto_ids, categoria_ids) -> None:
+    """invalidar_producto() para un lote: una sola invalidación con todas las etiquetas"""
+    invalidar({
+        "productos",
+        *(f"producto:{p}" for p in producto_ids),
+        *(f"categoria:{c}" for c in categoria_ids if c is not None),
+    })
+
+
+def invalidar_categoria(categoria_id: int = None) -> None:
+    """Tras escribir una categoría: su detalle y todo lo que anida categorías"""
+    invalidar({"categorias"} if categoria_id is None else {"categorias", f"categoria:{categoria_id}"})
+
+
+async def _recibir_vacio():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+class CacheRespuestasMiddleware:
+    """
+    Caché de las respuestas GET del catálogo, delante de la aplicación.
+
+    Guarda las respuestas 200 de las rutas de REGLAS por ruta y parámetros normalizados
+    durante vigencia(). Un acierto no llega a los handlers: ni base de
+    datos ni serialización; si el cliente manda el ETag de la entrada recibe un 304.
+
+    Con RESPONSE_CACHE_STALE_SECONDS > 0 (stale-while-revalidate), una entrada vencida
+    hace menos de ese tiempo se sirve igual mientras se recalcula en segundo plano.
+
+    Los clientes que acaban de escribir (cookie de read-your-writes) no usan la caché.
+
+    Con compresión (ver app/cache/compresion.py) cada entrada guarda también su cuerpo
+    comprimido en las codificaciones que han pedido los clientes: se comprime una vez por
+    entrada y codificación, no en cada acierto.
+    """
+
+    def __init__(self, app, almacen_respuestas: AlmacenRespuestas = None):
+        self.app = app
+        self.almacen = almacen_respuestas or almacen
+        self._revalidando = set()
+        self._tareas = set()
+
+    async def __call__(self, scope, receive, send):
+        if self.almacen is None or scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        etiquetas = etiquetas_ruta(scope["path"])
+        if etiquetas is None:
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if leer_del_primario(request):
+            metricas.sumar("omitidas")
+            await self.app(scope, receive, send)
+            return
+
+        clave = clave_peticion(scope)
+        generacion = self.almacen.generacion()
+        entrada = self.almacen.obtener(clave)
+        if entrada is not None:
+            edad = time.time() - entrada.creada
+            ttl = vigencia()
+            if edad < ttl:
+                metricas.sumar("aciertos")
+                await self._enviar(entrada, request, send, b"HIT", clave, generacion)
+                return
+            if edad < ttl + settings.RESPONSE_CACHE_STALE_SECONDS:
+                metricas.sumar("vencidas")
+                self._revalidar(scope, clave, etiquetas)
+                await self._enviar(entrada, request, send, b"STALE")
+                return
+
+        metricas.sumar("fallos")
+        await self._calcular(scope, receive, send, clave, etiquetas)
+
+    async def _enviar(
+        self, entrada: EntradaCache, request: Request, send, estado: bytes, clave: str = None, generacion: int = None
+    ) -> None:
+        etiqueta = entrada.cabecera(b"etag")
+        if etiqueta is not None:
+            ultima = entrada.cabecera(b"last-modified")
+            if no_modificado(request.headers, etiqueta, parsedate_to_datetime(ultima) if ultima else None):
+                metricas.sumar("no_modificadas")
+                cabeceras = [(k, v) for k, v in entrada.headers if k in (b"etag", b"last-modified", b"cache-control")]
+                await send({"type": "http.response.start", "status": 304, "headers": cabeceras + [(CABECERA_ESTADO, estado)]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        headers, cuerpo = entrada.headers, entrada.cuerpo
+        if codificaciones() and len(cuerpo) >= settings.COMPRESSION_MIN_BYTES and comprimible(headers):
+            codificacion = negociar(request.headers.get("accept-encoding"))
+            if codificacion is not None:
+                cuerpo = self._variante(entrada, codificacion, clave, generacion)
+            headers = cabeceras_codificadas(headers, codificacion, len(cuerpo))
+        await send({"type": "http.response.start", "status": entrada.status, "headers": headers + [(CABECERA_ESTADO, estado)]})
+        await send({"type": "http.response.body", "body": cuerpo})
+
+    def _variante(self, entrada: EntradaCache, codificacion: str, clave: Optional[str], generacion: Optional[int]) -> bytes:
+        """
+        Cuerpo comprimido de una entrada. La primera vez se comprime y se vuelve a guardar la
+        entrada con él (no si la entrada está vencida o se ha invalidado algo desde que se leyó)
+        """
+        cuerpo = entrada.variantes.get(codificacion)
+        if cuerpo is not None:
+            metricas.sumar("precomprimidas")
+            return cuerpo
+        cuerpo = comprimir(entrada.cuerpo, codificacion)
+        metricas.sumar("compresiones")
+        if clave is not None:
+            self.almacen.guardar(clave, replace(entrada, variantes={**entrada.variantes, codificacion: cuerpo}), generacion)
+        return cuerpo
+
+    async def _calcular(self, scope, receive, send, clave: str, etiquetas: frozenset) -> None:
+        """Pasar la petición a la aplicación y guardar la respuesta si es cacheable"""
+        generacion = self.almacen.generacion()
+        inicio = {}
+        partes = []
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                inicio.update(mensaje)
+                if send is not None:
+                    mensaje = dict(mensaje, headers=list(mensaje.get("headers", [])) + [(CABECERA_ESTADO, b"MISS")])
+            elif mensaje["type"] == "http.response.body":
+                partes.append(mensaje.get("body", b""))
+                if not mensaje.get("more_body", False) and not scope.get("state", {}).get("version_reciente"):
+                    self._guardar(clave, etiquetas, generacion, inicio, b"".join(partes))
+            if send is not None:
+                await send(mensaje)
+
+        await self.app(scope, receive, enviar)
+
+    def _guardar(self, clave: str, etiquetas: frozenset, generacion: int, inicio: dict, cuerpo: bytes) -> None:
+        headers = [(k.lower(), v) for k, v in inicio.get("headers", [])]
+        if inicio.get("status") != 200 or any(k == b"set-cookie" for k, _ in headers):
+            return
+        entrada = EntradaCache(status=200, headers=headers, cuerpo=cuerpo, etiquetas=etiquetas)
+        if self.almacen.guardar(clave, entrada, generacion):
+            metricas.sumar("guardadas")
+
+    def _revalidar(self, scope, clave: str, etiquetas: frozenset) -> None:
+        """Recalcular una entrada vencida en segundo plano (una sola vez por clave)"""
+        if clave in self._revalidando:
+            return
+        self._revalidando.add(clave)
+        # Sin cabeceras condicionales: se quiere el 200 completo para guardarlo
+        cabeceras = [(k, v) for k, v in scope["headers"] if k not in (b"if-none-match", b"if-modified-since")]
+        copia = dict(scope, headers=cabeceras)
+
+        async def recalcular():
+            try:
+                await self._calcular(copia, _recibir_vacio, None, clave, etiquetas)
+            finally:
+                self._revalidando.discard(clave)
+
+        tarea = asyncio.get_running_loop().create_task(recalcular())
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
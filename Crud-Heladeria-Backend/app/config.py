@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -12,12 +13,93 @@ class Settings(BaseSettings):
     DEBUG: bool
     HOST: str
     PORT: int
+
+    # Motor asíncrono (aiosqlite / asyncpg) y handlers async
+    DB_ASYNC: bool = False
+
+    # Pool de conexiones: perfil por entorno (development, production, test).
+    # Las variables DB_* sin definir toman el valor del perfil.
+    ENVIRONMENT: str = "development"
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None
+    DB_POOL_RECYCLE: Optional[int] = None
+    DB_POOL_PRE_PING: Optional[bool] = None
+    DB_SQL_LOG_SAMPLE_RATE: Optional[float] = None
+
+    # SQLite: modo del diario y sincronización de cada conexión al primario (vacío: el de
+    # SQLite). WAL: las lecturas no esperan a las escrituras y cada commit escribe una vez
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "FULL"
+
+    # Réplicas de lectura (URLs separadas por comas) y ventana read-your-writes en segundos
+    DATABASE_REPLICA_URLS: str = ""
+    READ_YOUR_WRITES_SECONDS: float = 0
     
     # Configuración de autenticación
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Usuarios con acceso a /admin (nombres separados por comas; vacío: nadie)
+    ADMIN_USERNAMES: str = ""
+
+    # Caché de credenciales verificadas (0 desactiva la caché)
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_CACHE_MAX_ENTRIES: int = 1024
+
+    # Segundos que se reutiliza el estado (existe, activo) del usuario de un token antes de
+    # volver a leerlo de la base de datos (0: en cada petición)
+    AUTH_TOKEN_USER_TTL_SECONDS: int = 30
+
+    # Pool de procesos para bcrypt (0 workers = ejecutar en el hilo de la petición)
+    PASSWORD_POOL_WORKERS: int = 2
+    PASSWORD_POOL_MAX_QUEUE: int = 16
+
+    # Coste de bcrypt (ver `python -m app.auth.calibrar_bcrypt`)
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: int = 250
+
+    # Límite de intentos de autenticación (token bucket; 0 por minuto lo desactiva)
+    LOGIN_RATE_USER_BURST: int = 5
+    LOGIN_RATE_USER_PER_MINUTE: float = 10
+    LOGIN_RATE_IP_BURST: int = 20
+    LOGIN_RATE_IP_PER_MINUTE: float = 60
+    LOGIN_RATE_MAX_KEYS: int = 10000
+
+    # Similitud mínima (0 a 1) de la búsqueda aproximada por trigramas
+    BUSQUEDA_UMBRAL_SIMILITUD: float = 0.3
+
+    # Cache-Control de las respuestas del catálogo con ETag ("no-cache": el cliente
+    # revalida siempre y recibe 304 si no cambió; vacío para no enviar la cabecera)
+    CACHE_CONTROL_CATALOGO: str = "no-cache"
+
+    # Caché de respuestas del catálogo en el servidor (0 bytes o 0 segundos la desactiva).
+    # TTL sin definir: 30 con BACKEND y 0 sin él (la LRU es de cada worker y una escritura
+    # solo invalida la del que la atiende; activarla solo con un worker).
+    # STALE: segundos que se sirve una entrada vencida mientras se recalcula (0 = nunca).
+    # BACKEND: almacén alternativo "modulo:Clase" (vacío = LRU en memoria del proceso)
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    RESPONSE_CACHE_TTL_SECONDS: Optional[float] = None
+    RESPONSE_CACHE_STALE_SECONDS: float = 0
+    RESPONSE_CACHE_BACKEND: str = ""
+
+    # Lecturas del catálogo desde una instantánea en memoria (False: consultas a la base
+    # de datos) y cada cuántos segundos se compara su versión con la de la base de datos
+    CATALOG_SNAPSHOT: bool = True
+    CATALOG_SNAPSHOT_SYNC_SECONDS: float = 1
+
+    # Compresión de respuestas según Accept-Encoding. ENCODINGS: codificaciones por orden de
+    # preferencia ("br", "gzip"; vacío la desactiva). No se comprimen cuerpos de menos de
+    # MIN_BYTES. Niveles: gzip de 1 a 9, brotli de 0 a 11 (más nivel, menos bytes y más CPU)
+    COMPRESSION_ENCODINGS: str = "br,gzip"
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+
+    # Máximo de productos por petición en POST/PUT /productos/lote
+    BULK_MAX_ITEMS: int = 10000
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,85 @@
+from bisect import bisect_left, insort
+
+from app.database.indices import IndiceProductos
+from app.database.trigramas import normalizar
+
+
+class IndiceAutocompletado(IndiceProductos):
+    """
+    Array ordenado de claves normalizadas para sugerir nombres y sabores por prefijo.
+
+    Cada texto se indexa desde el inicio de cada palabra, así "choc" sugiere también
+    "Helado de chocolate". Una consulta es un bisect más la lectura de las K entradas
+    siguientes, sin tocar la base de datos.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._entradas = []          # (clave, texto) ordenadas por clave
+        self._referencias = {}       # (clave, texto) -> productos que la usan
+        self._textos_producto = {}   # id de producto -> textos indexados
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    @staticmethod
+    def _claves(texto: str) -> list:
+        palabras = normalizar(texto)
+        return [" ".join(palabras[i:]) for i in range(len(palabras))]
+
+    def _agregar_entrada(self, entrada: tuple) -> None:
+        if entrada in self._referencias:
+            self._referencias[entrada] += 1
+            return
+        self._referencias[entrada] = 1
+        if self.cargado:
+            insort(self._entradas, entrada)
+        else:
+            # Durante la carga se ordena una sola vez al final (_tras_cargar)
+            self._entradas.append(entrada)
+
+    def _quitar_entrada(self, entrada: tuple) -> None:
+        self._referencias[entrada] -= 1
+        if self._referencias[entrada]:
+            return
+        del self._referencias[entrada]
+        if self.cargado:
+            del self._entradas[bisect_left(self._entradas, entrada)]
+        else:
+            self._entradas.remove(entrada)
+
+    def _quitar(self, producto_id: int) -> None:
+        for texto in self._textos_producto.pop(producto_id, ()):
+            for clave in self._claves(texto):
+                self._quitar_entrada((clave, texto))
+
+    def _poner(self, producto_id: int, nombre: str, sabor: str) -> None:
+        self._quitar(producto_id)
+        textos = {texto.strip() for texto in (nombre, sabor) if texto and texto.strip()}
+        self._textos_producto[producto_id] = textos
+        for texto in textos:
+            for clave in self._claves(texto):
+                self._agregar_entrada((clave, texto))
+
+    def _tras_cargar(self) -> None:
+        self._entradas.sort()
+
+    def sugerir(self, prefijo: str, limite: int = 10) -> list:
+        """Hasta `limite` textos distintos con alguna palabra que empieza por `prefijo`"""
+        clave = " ".join(normalizar(prefijo))
+        if not clave:
+            return []
+        sugerencias = []
+        with self._lock:
+            i = bisect_left(self._entradas, (clave,))
+            while i < len(self._entradas) and len(sugerencias) < limite:
+                clave_entrada, texto = self._entradas[i]
+                if not clave_entrada.startswith(clave):
+                    break
+                if texto not in sugerencias:
+                    sugerencias.append(texto)
+                i += 1
+        return sugerencias
+
+
+indice_autocompletado = IndiceAutocompletado()
@@ -0,0 +1,80 @@
+from fastapi import HTTPException, status
+from sqlalchemy import column, func, literal, literal_column, or_, select, table
+import re
+
+from app.models.producto import Producto
+
+# Palabras que se buscan como prefijo: "choco" encuentra "chocolate"
+TERMINO = re.compile(r"\w+")
+MAX_TERMINOS = 8
+
+# Pesos de bm25 por columna de productos_fts: nombre, sabor, descripcion
+PESOS_FTS5 = (10.0, 5.0, 1.0)
+
+productos_fts = table("productos_fts", column("rowid"))
+
+
+def terminos_busqueda(q: str) -> list:
+    """
+    Palabras del texto de búsqueda, sin operadores ni comillas del motor de texto
+    """
+    terminos = TERMINO.findall(q.lower())[:MAX_TERMINOS]
+    if not terminos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La búsqueda debe contener al menos una palabra"
+        )
+    return terminos
+
+
+def consulta_busqueda(dialecto: str, q: str):
+    """
+    select(Producto, puntuacion) de los productos que contienen todas las palabras de `q`.
+
+    La puntuación es menor cuanto más relevante es el producto en los dos motores, de modo
+    que (puntuacion, id) sirve como clave de orden ascendente para paginar().
+    """
+    terminos = terminos_busqueda(q)
+
+    if dialecto == "sqlite":
+        expresion = " ".join(f'"{t}"*' for t in terminos)
+        fts = literal_column("productos_fts")
+        puntuacion = func.bm25(fts, *PESOS_FTS5)
+        query = select(Producto, puntuacion.label("puntuacion")).join(
+            productos_fts, productos_fts.c.rowid == Producto.id
+        ).where(fts.op("MATCH")(expresion))
+        return query, puntuacion
+
+    if dialecto == "postgresql":
+        consulta = func.to_tsquery("spanish", " & ".join(f"{t}:*" for t in terminos))
+        busqueda = literal_column("productos.busqueda")
+        puntuacion = -func.ts_rank_cd(busqueda, consulta)
+        query = select(Producto, puntuacion.label("puntuacion")).where(busqueda.op("@@")(consulta))
+        return query, puntuacion
+
+    raise HTTPException(
+        status_code=status.HTTP_501_NOT_IMPLEMENTED,
+        detail=f"Búsqueda de texto no disponible para '{dialecto}'"
+    )
+
+
+def consulta_aproximada(q: str):
+    """
+    select(Producto, similitud) tolerante a errores con pg_trgm, de mayor a menor similitud.
+
+    El operador <% usa los índices GIN de trigramas; su umbral se fija por transacción
+    con umbral_similitud_pg(). En SQLite se usa app.database.trigramas en su lugar.
+    """
+    texto = literal(q.strip())
+    similitud = func.greatest(
+        func.word_similarity(texto, Producto.nombre),
+        func.word_similarity(texto, Producto.sabor)
+    )
+    return select(Producto, similitud.label("similitud")).where(
+        or_(texto.op("<%")(Producto.nombre), texto.op("<%")(Producto.sabor))
+    ).order_by(similitud.desc(), Producto.id)
+
+
+def umbral_similitud_pg(umbral: float):
+    # is_local=true: solo para la transacción actual
+    return select(func.set_config("pg_trgm.word_similarity_threshold", str(umbral), True))
@@ -1,27 +1,191 @@
-from sqlalchemy import create_engine
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.database.pool import engine_kwargs, configurar_log_sql
+import itertools
+import time
 
 # URL de conexión a la base de datos
 DATABASE_URL = settings.DATABASE_URL
 
-# Crear el motor de la base de datos
+# Réplicas de solo lectura para los GET (lista separada por comas, opcional)
+REPLICA_URLS = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+# Cookie que marca a un cliente que acaba de escribir para leer del primario
+COOKIE_LECTURA_PRIMARIO = "leer_primario_hasta"
+
+# Crear el motor de la base de datos (pool según el perfil de ENVIRONMENT)
 engine = create_engine(
     DATABASE_URL,
-    echo=True
+    **engine_kwargs(DATABASE_URL)
 )
+configurar_log_sql(engine)
+
+# Modo del diario y sincronización de SQLite en las conexiones al primario
+def _pragmas_sqlite(engine) -> None:
+    if engine.dialect.name != "sqlite" or engine.url.database in (None, "", ":memory:"):
+        return
+    pragmas = [
+        f"PRAGMA {nombre} = {valor}"
+        for nombre, valor in (("journal_mode", settings.SQLITE_JOURNAL_MODE), ("synchronous", settings.SQLITE_SYNCHRONOUS))
+        if valor
+    ]
+
+    @event.listens_for(engine, "connect")
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+_pragmas_sqlite(engine)
 
 # Crear la sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sentencias que dejan una conexión en modo solo lectura, por backend
+SOLO_LECTURA_SQL = {
+    "sqlite": "PRAGMA query_only = ON",
+    "postgresql": "SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY",
+}
+
+def _solo_lectura(engine) -> None:
+    """Impedir escrituras en las conexiones de una réplica"""
+    sentencia = SOLO_LECTURA_SQL.get(engine.dialect.name)
+    if sentencia is None:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _conexion_solo_lectura(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(sentencia)
+        cursor.close()
+
+replica_engines = []
+for replica_url in REPLICA_URLS:
+    replica_engine = create_engine(replica_url, **engine_kwargs(replica_url))
+    configurar_log_sql(replica_engine)
+    _solo_lectura(replica_engine)
+    replica_engines.append(replica_engine)
+
+ReplicaSessions = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
+# Reparto round-robin de las lecturas entre réplicas
+_turno_replicas = itertools.cycle(range(len(ReplicaSessions))) if ReplicaSessions else None
+
+# Drivers asíncronos por backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """Convertir una URL síncrona en su equivalente con driver asíncrono"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No hay driver asíncrono configurado para '{backend}'")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def _crear_async_engine(url: str):
+    async_url = async_database_url(url)
+    async_engine = create_async_engine(
+        async_url,
+        **engine_kwargs(async_url, asincrono=True)
+    )
+    configurar_log_sql(async_engine.sync_engine)
+    return async_engine
+
+def _async_sessionmaker(async_engine):
+    # expire_on_commit=False: tras el commit no se puede recargar de forma implícita
+    return async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+# Motor y sesión asíncronos (solo si DB_ASYNC está activo)
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engines = []
+AsyncReplicaSessions = []
+if settings.DB_ASYNC:
+    async_engine = _crear_async_engine(DATABASE_URL)
+    _pragmas_sqlite(async_engine.sync_engine)
+    AsyncSessionLocal = _async_sessionmaker(async_engine)
+    for replica_url in REPLICA_URLS:
+        async_replica_engine = _crear_async_engine(replica_url)
+        _solo_lectura(async_replica_engine.sync_engine)
+        async_replica_engines.append(async_replica_engine)
+    AsyncReplicaSessions = [_async_sessionmaker(e) for e in async_replica_engines]
+
 # Base para los modelos
 Base = declarative_base()
 
+def leer_del_primario(request: Request) -> bool:
+    """El cliente escribió hace poco: leer del primario para ver sus propios cambios"""
+    hasta = request.cookies.get(COOKIE_LECTURA_PRIMARIO)
+    try:
+        return hasta is not None and float(hasta) > time.time()
+    except ValueError:
+        return False
+
+def _marcar_escritura(response: Response) -> None:
+    if settings.READ_YOUR_WRITES_SECONDS > 0 and ReplicaSessions:
+        hasta = time.time() + settings.READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            COOKIE_LECTURA_PRIMARIO,
+            f"{hasta:.3f}",
+            max_age=int(settings.READ_YOUR_WRITES_SECONDS) + 1,
+            httponly=True,
+            samesite="lax"
+        )
+
 # Dependencia para obtener la sesión de la base de datos
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependencia para lecturas: réplica en round-robin (o primario si no hay réplicas)
+def get_read_db(request: Request):
+    if ReplicaSessions and not leer_del_primario(request):
+        db = ReplicaSessions[next(_turno_replicas)]()
+    else:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependencia para escrituras: siempre el primario
+def get_write_db(response: Response):
+    _marcar_escritura(response)
+    yield from get_db()
+
+# Dependencia asíncrona para obtener la sesión de la base de datos
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db(request: Request):
+    if AsyncReplicaSessions and not leer_del_primario(request):
+        session_factory = AsyncReplicaSessions[next(_turno_replicas)]
+    else:
+        session_factory = AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
+
+async def get_async_write_db(response: Response):
+    _marcar_escritura(response)
+    async with AsyncSessionLocal() as db:
+        yield db
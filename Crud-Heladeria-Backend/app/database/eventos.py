@@ -0,0 +1,91 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.categoria import Categoria
+from app.models.producto import Producto
+
+# Funciones que reciben los productos (o los ids de categorías) confirmados en cada commit
+_suscriptores = []
+_suscriptores_categorias = []
+
+# Claves en session.info con los cambios pendientes de confirmar
+CAMBIOS_PRODUCTOS = "productos_cambiados"
+CAMBIOS_CATEGORIAS = "categorias_cambiadas"
+
+
+def suscribir_productos(funcion):
+    """
+    Registrar `funcion(cambios)` para después de cada commit que modifique productos.
+
+    `cambios` es {producto_id: columnas} con los valores ya guardados, o
+    {producto_id: None} si el producto se borró. Se usa como decorador.
+    """
+    _suscriptores.append(funcion)
+    return funcion
+
+
+def notificar_productos(cambios: dict) -> None:
+    """
+    Avisar a los suscriptores de cambios hechos fuera del ORM (update()/insert() de Core)
+    """
+    for funcion in _suscriptores:
+        funcion(cambios)
+
+
+def suscribir_categorias(funcion):
+    """
+    Registrar `funcion(categoria_ids)` para después de cada commit que modifique
+    categorías (altas, cambios y borrados). Se usa como decorador.
+    """
+    _suscriptores_categorias.append(funcion)
+    return funcion
+
+
+def notificar_categorias(categoria_ids: set) -> None:
+    """Avisar a los suscriptores de categorías cambiadas fuera del ORM"""
+    for funcion in _suscriptores_categorias:
+        funcion(categoria_ids)
+
+
+def _columnas(producto: Producto) -> dict:
+    # Solo lo que ya está cargado: leer atributos expirados lanzaría otra consulta
+    cargado = inspect(producto).dict
+    return {
+        atributo.key: cargado[atributo.key]
+        for atributo in inspect(Producto).column_attrs
+        if atributo.key in cargado
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_cambios(session, flush_context):
+    # En after_flush new/dirty/deleted aún reflejan lo que se acaba de escribir
+    cambios = session.info.setdefault(CAMBIOS_PRODUCTOS, {})
+    for objeto in session.new | session.dirty:
+        if isinstance(objeto, Producto):
+            cambios[objeto.id] = _columnas(objeto)
+    for objeto in session.deleted:
+        if isinstance(objeto, Producto):
+            cambios[objeto.id] = None
+    categorias = {
+        objeto.id for objeto in session.new | session.dirty | session.deleted if isinstance(objeto, Categoria)
+    }
+    if categorias:
+        session.info.setdefault(CAMBIOS_CATEGORIAS, set()).update(categorias)
+
+
+@event.listens_for(Session, "after_commit")
+def _confirmar_cambios(session):
+    cambios = session.info.pop(CAMBIOS_PRODUCTOS, None)
+    if cambios:
+        notificar_productos(cambios)
+    categorias = session.info.pop(CAMBIOS_CATEGORIAS, None)
+    if categorias:
+        notificar_categorias(categorias)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_cambios(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(CAMBIOS_PRODUCTOS, None)
+        session.info.pop(CAMBIOS_CATEGORIAS, None)
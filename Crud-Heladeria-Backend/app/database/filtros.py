@@ -0,0 +1,190 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import List, Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import func, select
+
+from app.models.categoria import Categoria
+from app.models.producto import Producto
+
+
+class OrdenProducto(str, Enum):
+    """Campos permitidos en order_by; el prefijo "-" ordena de forma descendente"""
+    id = "id"
+    id_desc = "-id"
+    precio = "precio"
+    precio_desc = "-precio"
+    nombre = "nombre"
+    nombre_desc = "-nombre"
+    stock = "stock"
+    stock_desc = "-stock"
+    fecha_creacion = "fecha_creacion"
+    fecha_creacion_desc = "-fecha_creacion"
+    fecha_actualizacion = "fecha_actualizacion"
+    fecha_actualizacion_desc = "-fecha_actualizacion"
+
+
+def columnas_orden(orden: OrdenProducto):
+    """
+    Columnas de orden para paginar(), si es descendente y la clave del cursor de una fila.
+    El id desempata para que la paginación por cursor sea estable.
+    """
+    campo = orden.value.lstrip("-")
+    descendente = orden.value.startswith("-")
+    if campo == "id":
+        return [Producto.id], descendente, lambda producto: (producto.id,)
+    columna = getattr(Producto, campo)
+    return [columna, Producto.id], descendente, lambda producto: (getattr(producto, campo), producto.id)
+
+
+class FiltrosProducto:
+    """
+    Filtros de los listados de productos, como dependencia: `filtros: FiltrosProducto = Depends()`
+    """
+
+    def __init__(
+        self,
+        activo: Optional[bool] = None,
+        categoria_id: Optional[int] = None,
+        con_precio_mayorista: Optional[bool] = None,
+        precio_min: Optional[float] = Query(None, ge=0, description="Precio mínimo (incluido)"),
+        precio_max: Optional[float] = Query(None, ge=0, description="Precio máximo (incluido)"),
+        en_stock: Optional[bool] = Query(None, description="true: stock > 0; false: sin stock"),
+        sabor: Optional[List[str]] = Query(None, description="Uno o varios sabores (se repite el parámetro)"),
+        creado_desde: Optional[datetime] = None,
+        creado_hasta: Optional[datetime] = None,
+        actualizado_desde: Optional[datetime] = None,
+        actualizado_hasta: Optional[datetime] = None,
+    ):
+        if precio_min is not None and precio_max is not None and precio_min > precio_max:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="precio_min no puede ser mayor que precio_max"
+            )
+        self.activo = activo
+        self.categoria_id = categoria_id
+        self.con_precio_mayorista = con_precio_mayorista
+        self.precio_min = precio_min
+        self.precio_max = precio_max
+        self.en_stock = en_stock
+        self.sabor = sabor
+        self.creado_desde = creado_desde
+        self.creado_hasta = creado_hasta
+        self.actualizado_desde = actualizado_desde
+        self.actualizado_hasta = actualizado_hasta
+
+    def aplicar(self, query):
+        """Añadir las condiciones a una Query o a un select() sobre Producto"""
+        if self.activo is not None:
+            query = query.where(Producto.activo == self.activo)
+
+        if self.categoria_id is not None:
+            query = query.where(Producto.categoria_id == self.categoria_id)
+
+        if self.con_precio_mayorista is not None:
+            if self.con_precio_mayorista:
+                query = query.where(
+                    Producto.precio_mayorista.isnot(None),
+                    Producto.cantidad_minima_mayorista.isnot(None)
+                )
+            else:
+                query = query.where(
+                    Producto.precio_mayorista.is_(None)
+                )
+
+        if self.precio_min is not None:
+            query = query.where(Producto.precio >= self.precio_min)
+        if self.precio_max is not None:
+            query = query.where(Producto.precio <= self.precio_max)
+
+        if self.en_stock is not None:
+            query = query.where(Producto.stock > 0 if self.en_stock else Producto.stock == 0)
+
+        if self.sabor:
+            query = query.where(Producto.sabor.in_(self.sabor))
+
+        if self.creado_desde is not None:
+            query = query.where(Producto.fecha_creacion >= self.creado_desde)
+        if self.creado_hasta is not None:
+            query = query.where(Producto.fecha_creacion <= self.creado_hasta)
+        if self.actualizado_desde is not None:
+            query = query.where(Producto.fecha_actualizacion >= self.actualizado_desde)
+        if self.actualizado_hasta is not None:
+            query = query.where(Producto.fecha_actualizacion <= self.actualizado_hasta)
+
+        return query
+
+    def cumple(self, producto) -> bool:
+        """
+        Las mismas condiciones que aplicar() sobre un objeto con los atributos de Producto
+        (catálogo en memoria). Los precios se comparan como float, igual que en SQL contra
+        un parámetro float.
+        """
+        if self.activo is not None and producto.activo != self.activo:
+            return False
+        if self.categoria_id is not None and producto.categoria_id != self.categoria_id:
+            return False
+        if self.con_precio_mayorista is True and (
+            producto.precio_mayorista is None or producto.cantidad_minima_mayorista is None
+        ):
+            return False
+        if self.con_precio_mayorista is False and producto.precio_mayorista is not None:
+            return False
+        if self.precio_min is not None and float(producto.precio) < self.precio_min:
+            return False
+        if self.precio_max is not None and float(producto.precio) > self.precio_max:
+            return False
+        if self.en_stock is not None and (producto.stock > 0) != self.en_stock:
+            return False
+        if self.sabor and producto.sabor not in self.sabor:
+            return False
+        for valor, desde, hasta in (
+            (producto.fecha_creacion, self.creado_desde, self.creado_hasta),
+            (producto.fecha_actualizacion, self.actualizado_desde, self.actualizado_hasta),
+        ):
+            if desde is not None and (valor is None or valor < _sin_zona(desde)):
+                return False
+            if hasta is not None and (valor is None or valor > _sin_zona(hasta)):
+                return False
+        return True
+
+
+def _sin_zona(fecha: datetime) -> datetime:
+    # Las columnas guardan UTC sin zona; un filtro con zona se compara en UTC
+    if fecha.tzinfo is None:
+        return fecha
+    return fecha.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def consulta_facetas(filtros: FiltrosProducto):
+    """
+    Una sola consulta agrupada por (categoría, sabor) con los filtros aplicados; las
+    cuentas por categoría y por sabor se suman después con facetas_desde_filas().
+    """
+    query = select(
+        Producto.categoria_id,
+        Categoria.nombre,
+        Producto.sabor,
+        func.count().label("cantidad")
+    ).join(Categoria, Categoria.id == Producto.categoria_id)
+    return filtros.aplicar(query).group_by(Producto.categoria_id, Categoria.nombre, Producto.sabor)
+
+
+def facetas_desde_filas(filas) -> dict:
+    categorias = {}
+    sabores = {}
+    total = 0
+    for categoria_id, nombre, sabor, cantidad in filas:
+        total += cantidad
+        faceta = categorias.setdefault(categoria_id, {"categoria_id": categoria_id, "nombre": nombre, "cantidad": 0})
+        faceta["cantidad"] += cantidad
+        sabores[sabor] = sabores.get(sabor, 0) + cantidad
+    return {
+        "total": total,
+        "categorias": sorted(categorias.values(), key=lambda f: (-f["cantidad"], f["categoria_id"])),
+        "sabores": [
+            {"sabor": sabor, "cantidad": cantidad}
+            for sabor, cantidad in sorted(sabores.items(), key=lambda s: (-s[1], s[0]))
+        ],
+    }
@@ -0,0 +1,94 @@
+from abc import ABC, abstractmethod
+import threading
+
+from sqlalchemy import select
+
+from app.database.eventos import suscribir_productos
+from app.models.producto import Producto
+
+
+class IndiceProductos(ABC):
+    """
+    Base de los índices en memoria sobre nombre y sabor de los productos activos.
+
+    Se cargan de la base de datos una vez, en el primer uso, y después se mantienen con
+    los commits de productos (app.database.eventos). Un índice que nunca se usa no se
+    carga ni se mantiene. Las subclases implementan _poner y _quitar, y opcionalmente
+    _tras_cargar; se llaman con el lock tomado.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.cargado = False
+        # Productos modificados mientras se carga: la carga no los sobrescribe
+        self._tocados = None
+        # id de producto -> (nombre, sabor) indexados
+        self._indexados = {}
+        suscribir_productos(self.actualizar)
+
+    @abstractmethod
+    def _poner(self, producto_id: int, nombre: str, sabor: str) -> None:
+        ...
+
+    @abstractmethod
+    def _quitar(self, producto_id: int) -> None:
+        ...
+
+    def _tras_cargar(self) -> None:
+        pass
+
+    def _indexar(self, producto_id: int, nombre: str, sabor: str) -> None:
+        self._poner(producto_id, nombre, sabor)
+        self._indexados[producto_id] = (nombre, sabor)
+
+    def _desindexar(self, producto_id: int) -> None:
+        if self._indexados.pop(producto_id, None) is not None:
+            self._quitar(producto_id)
+
+    def cargar(self, ejecutar) -> None:
+        """
+        Cargar los productos activos una sola vez. `ejecutar(sentencia)` devuelve las
+        filas, de modo que sirve igual con Session y con AsyncSession (vía run_sync).
+        """
+        with self._lock:
+            if self.cargado:
+                return
+            if self._tocados is None:
+                self._tocados = set()
+        filas = ejecutar(
+            select(Producto.id, Producto.nombre, Producto.sabor).where(Producto.activo == True)
+        )
+        with self._lock:
+            if self.cargado:
+                return
+            activos = set()
+            for producto_id, nombre, sabor in filas:
+                activos.add(producto_id)
+                if producto_id not in self._tocados and self._indexados.get(producto_id) != (nombre, sabor):
+                    self._indexar(producto_id, nombre, sabor)
+            # Al recargar (ver actualizar()) sobran los que ya no están activos
+            for producto_id in self._indexados.keys() - activos - self._tocados:
+                self._desindexar(producto_id)
+            self._tras_cargar()
+            self._tocados = None
+            self.cargado = True
+
+    def actualizar(self, cambios: dict) -> None:
+        """Aplicar los productos confirmados en un commit (ver app.database.eventos)"""
+        with self._lock:
+            # Sin cargar ni cargándose: cargar() lo leerá todo de la base de datos
+            if not self.cargado and self._tocados is None:
+                return
+            for producto_id, columnas in cambios.items():
+                if self._tocados is not None:
+                    self._tocados.add(producto_id)
+                if columnas is None or columnas.get("activo") is False:
+                    self._desindexar(producto_id)
+                elif "nombre" in columnas and "sabor" in columnas:
+                    # Los cambios de stock o precio llegan con la fila entera: si nombre y
+                    # sabor no cambiaron no hay nada que reindexar
+                    if self._indexados.get(producto_id) != (columnas["nombre"], columnas["sabor"]):
+                        self._indexar(producto_id, columnas["nombre"], columnas["sabor"])
+                elif self.cargado:
+                    # Sin nombre y sabor no se puede indexar: recargar en el próximo uso
+                    self.cargado = False
@@ -0,0 +1,176 @@
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select, update
+
+from app.config import settings
+from app.models.categoria import Categoria
+from app.models.producto import Producto
+
+# Ids por consulta al resolver los productos y categorías de un lote (SQLite admite
+# 32766 parámetros por sentencia; los bloques se quedan muy por debajo)
+BLOQUE_IDS = 1000
+
+# Columnas NOT NULL: un cambio en lote no las puede poner a null
+NO_NULOS = ("nombre", "sabor", "precio", "stock", "categoria_id")
+
+
+def comprobar_tamano(elementos: list) -> None:
+    if not elementos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El lote está vacío"
+        )
+    if len(elementos) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"El lote admite como mucho {settings.BULK_MAX_ITEMS} productos"
+        )
+
+
+def _bloques(ids) -> list:
+    ids = sorted(ids)
+    return [ids[i:i + BLOQUE_IDS] for i in range(0, len(ids), BLOQUE_IDS)]
+
+
+def consultas_categorias(categoria_ids) -> list:
+    """(id, activo) de las categorías referenciadas, en una consulta por bloque de ids"""
+    return [
+        select(Categoria.id, Categoria.activo).where(Categoria.id.in_(bloque))
+        for bloque in _bloques(categoria_ids)
+    ]
+
+
+def consultas_productos(producto_ids, *columnas) -> list:
+    """Las columnas pedidas (o todas) de los productos del lote, por bloques de ids"""
+    columnas = columnas or tuple(Producto.__table__.columns)
+    return [select(*columnas).where(Producto.id.in_(bloque)) for bloque in _bloques(producto_ids)]
+
+
+def sentencia_altas():
+    """
+    INSERT de varias filas (insertmanyvalues de SQLAlchemy) que devuelve los ids en el
+    orden de las filas enviadas
+    """
+    return insert(Producto).returning(Producto.id, sort_by_parameter_order=True)
+
+
+def sentencia_cambios():
+    """
+    UPDATE por clave primaria con executemany: se agrupa por las columnas de cada fila y
+    fecha_actualizacion toma now() (onupdate de la columna)
+    """
+    return update(Producto)
+
+
+def _error_categoria(categoria_id: int, categorias: dict, inactiva: str):
+    activo = categorias.get(categoria_id)
+    if activo is None:
+        return f"Categoría con ID {categoria_id} no encontrada"
+    if not activo:
+        return inactiva
+    return None
+
+
+class Lote:
+    """
+    Resultado de cada elemento de un lote (en el orden recibido) y las filas válidas que
+    se escriben en una sola transacción
+    """
+
+    def __init__(self, total: int):
+        self.resultados = [None] * total
+        self.filas = []
+        self._indices = []
+
+    def error(self, indice: int, mensaje: str, producto_id: int = None) -> None:
+        self.resultados[indice] = {"indice": indice, "id": producto_id, "estado": "error", "error": mensaje}
+
+    def agregar(self, indice: int, fila: dict) -> None:
+        self._indices.append(indice)
+        self.filas.append(fila)
+
+    def sin_cambios(self, indice: int, producto_id: int) -> None:
+        # Nada que escribir: cuenta como actualizado sin tocar la fila
+        self.resultados[indice] = {"indice": indice, "id": producto_id, "estado": "actualizado", "error": None}
+
+    @property
+    def errores(self) -> list:
+        return [resultado for resultado in self.resultados if resultado is not None and resultado["estado"] == "error"]
+
+    def rechazar_si_errores(self, todo_o_nada: bool) -> None:
+        """Con todo_o_nada, un solo elemento con error rechaza el lote sin escribir nada"""
+        errores = self.errores
+        if todo_o_nada and errores:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=errores
+            )
+
+    def confirmar(self, estado: str, ids: list) -> None:
+        """Marcar las filas escritas con su id"""
+        for indice, producto_id in zip(self._indices, ids):
+            self.resultados[indice] = {"indice": indice, "id": producto_id, "estado": estado, "error": None}
+
+    def respuesta(self) -> dict:
+        cuentas = {"creado": 0, "actualizado": 0, "error": 0}
+        for resultado in self.resultados:
+            cuentas[resultado["estado"]] += 1
+        return {
+            "creados": cuentas["creado"],
+            "actualizados": cuentas["actualizado"],
+            "errores": cuentas["error"],
+            "resultados": self.resultados,
+        }
+
+
+def preparar_altas(productos: list, categorias: dict) -> Lote:
+    """Comprobar cada alta contra las categorías del lote ({id: activo})"""
+    lote = Lote(len(productos))
+    for indice, producto in enumerate(productos):
+        mensaje = _error_categoria(
+            producto.categoria_id, categorias, "No se puede crear un producto en una categoría inactiva"
+        )
+        if mensaje:
+            lote.error(indice, mensaje)
+        else:
+            lote.agregar(indice, producto.dict())
+    return lote
+
+
+def preparar_cambios(cambios: list, existentes: dict, categorias: dict) -> Lote:
+    """
+    Comprobar cada cambio contra los productos existentes ({id: categoria_id}) y las
+    categorías del lote ({id: activo}). Un producto solo puede aparecer una vez.
+    """
+    lote = Lote(len(cambios))
+    vistos = set()
+    for indice, cambio in enumerate(cambios):
+        datos = cambio.dict(exclude_unset=True)
+        producto_id = datos.pop("id")
+        nulos = [campo for campo in NO_NULOS if campo in datos and datos[campo] is None]
+        if producto_id in vistos:
+            lote.error(indice, f"El producto {producto_id} aparece más de una vez en el lote", producto_id)
+        elif producto_id not in existentes:
+            lote.error(indice, f"Producto con ID {producto_id} no encontrado", producto_id)
+        elif nulos:
+            lote.error(indice, f"El campo {nulos[0]} no puede ser nulo", producto_id)
+        elif "categoria_id" in datos and (mensaje := _error_categoria(
+            datos["categoria_id"], categorias, "No se puede asignar el producto a una categoría inactiva"
+        )):
+            lote.error(indice, mensaje, producto_id)
+        elif not datos:
+            lote.sin_cambios(indice, producto_id)
+        else:
+            lote.agregar(indice, {"id": producto_id, **datos})
+        vistos.add(producto_id)
+    return lote
+
+
+def categorias_afectadas(lote: Lote, anteriores: dict = None) -> set:
+    """
+    Categorías cuyo detalle cambia: las de las filas escritas y, en los cambios, las que
+    tenían antes los productos ({id: categoria_id})
+    """
+    categorias = {fila["categoria_id"] for fila in lote.filas if "categoria_id" in fila}
+    if anteriores:
+        categorias.update(anteriores[fila["id"]] for fila in lote.filas)
+    return categorias
@@ -0,0 +1,89 @@
+from datetime import datetime
+from decimal import Decimal
+from fastapi import HTTPException, Response, status
+from sqlalchemy import literal, tuple_
+import base64
+import json
+
+# Cabecera con el cursor de la página siguiente (ausente en la última página)
+CABECERA_CURSOR = "X-Next-Cursor"
+
+# Máximo de filas por página en los listados (parámetro `limit`)
+MAX_LIMIT = 1000
+
+
+def codificar_cursor(*valores) -> str:
+    """
+    Cursor opaco con los valores de la clave de orden de la última fila devuelta
+    """
+    # Decimal y datetime viajan como texto; decodificar_cursor los convierte de vuelta
+    datos = json.dumps(list(valores), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(datos).decode().rstrip("=")
+
+
+def _tipo_python(columna):
+    try:
+        return columna.type.python_type
+    except NotImplementedError:
+        # Expresiones sin tipo (p. ej. la puntuación de la búsqueda): valor tal cual
+        return None
+
+
+def decodificar_cursor(cursor: str, columnas: list) -> list:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valores, list) or len(valores) != len(columnas):
+            raise ValueError(cursor)
+        convertidos = []
+        for columna, valor in zip(columnas, valores):
+            tipo = _tipo_python(columna)
+            if valor is not None and tipo is Decimal:
+                valor = Decimal(valor)
+            elif valor is not None and tipo is datetime:
+                valor = datetime.fromisoformat(valor)
+            convertidos.append(valor)
+        return convertidos
+    except (ArithmeticError, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+
+def paginar(query, columnas: list, cursor: str = None, skip: int = 0, limit: int = 100,
+            descendente: bool = False):
+    """
+    Ordenar por `columnas` y pedir una fila de más para saber si hay página siguiente.
+
+    Con cursor se usa keyset (WHERE clave > cursor, o < si es descendente), que cuesta
+    lo mismo en cualquier página; sin cursor se mantiene el OFFSET de siempre. Sirve
+    para Query y para select().
+    """
+    if descendente:
+        query = query.order_by(*[columna.desc() for columna in columnas])
+    else:
+        query = query.order_by(*columnas)
+    if cursor:
+        valores = decodificar_cursor(cursor, columnas)
+        clave = columnas[0] if len(columnas) == 1 else tuple_(*columnas)
+        # Cada valor con el tipo de su columna para que se enlace en el mismo formato
+        valor = valores[0] if len(columnas) == 1 else tuple_(
+            *[literal(v, columna.type) for columna, v in zip(columnas, valores)]
+        )
+        query = query.where(clave < valor if descendente else clave > valor)
+    elif skip > 0:
+        query = query.offset(skip)
+    return query.limit(max(limit, 0) + 1)
+
+
+def recortar_pagina(filas: list, limit: int, response: Response, clave=lambda fila: (fila.id,)) -> list:
+    """
+    Quitar la fila de más que pidió paginar() y publicar el cursor siguiente
+    """
+    if limit <= 0:
+        return []
+    if len(filas) > limit:
+        filas = filas[:limit]
+        response.headers[CABECERA_CURSOR] = codificar_cursor(*clave(filas[-1]))
+    return filas
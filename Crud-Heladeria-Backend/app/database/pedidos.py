@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+
+from app.models.pedido import Pedido, PedidoItem
+from app.models.producto import Producto
+
+# Productos distintos por pedido: la reserva pasa cada id tres veces como parámetro (IN y
+# CASE) y SQLite admite 32766 por sentencia
+MAX_PRODUCTOS = 1000
+
+# Sentencias fijas de cada pedido: se construyen una vez y solo cambian los parámetros
+_INSERT_PEDIDO = insert(Pedido).returning(Pedido.id, Pedido.fecha_creacion)
+_INSERT_LINEAS = insert(PedidoItem)
+
+
+def comprobar_productos(cantidades: dict) -> None:
+    if len(cantidades) > MAX_PRODUCTOS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Un pedido admite como mucho {MAX_PRODUCTOS} productos distintos"
+        )
+
+
+def lineas_pedido(filas, cantidades: dict) -> list:
+    """
+    Una línea por producto, ordenadas por id, con el precio de la fila que devolvió la
+    reserva (la misma transacción que resta el stock) y la regla minorista / mayorista del
+    modelo. Los importes se calculan con Decimal, sin pasar por float.
+    """
+    lineas = []
+    for fila in sorted(filas, key=lambda fila: fila.id):
+        cantidad = cantidades[fila.id]
+        mayorista = Producto.es_precio_mayorista(fila, cantidad)
+        precio = Decimal(fila.precio_mayorista if mayorista else fila.precio)
+        lineas.append({
+            "producto_id": fila.id,
+            "cantidad": cantidad,
+            "precio_unitario": precio,
+            "es_precio_mayorista": mayorista,
+            "subtotal": precio * cantidad,
+        })
+    return lineas
+
+
+def total_pedido(lineas: list) -> Decimal:
+    return sum((linea["subtotal"] for linea in lineas), Decimal(0))
+
+
+def sentencia_pedido():
+    """
+    INSERT de la cabecera (parámetros usuario_id y total) que devuelve el id y la fecha
+    asignada por la base de datos
+    """
+    return _INSERT_PEDIDO
+
+
+def sentencia_lineas():
+    """
+    INSERT de todas las líneas en una sola llamada executemany, sin RETURNING: la respuesta
+    ya tiene los datos y los ids de las líneas no se usan
+    """
+    return _INSERT_LINEAS
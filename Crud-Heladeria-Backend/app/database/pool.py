@@ -0,0 +1,180 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+import logging
+import random
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger("app.sql")
+
+# Perfiles de pool por entorno; cada valor se puede sobrescribir con su variable DB_*.
+# Ninguno registra SQL (las sentencias llevan parámetros con datos de clientes): hay que
+# pedirlo con DB_SQL_LOG_SAMPLE_RATE
+POOL_PROFILES = {
+    "development": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "sql_log_sample_rate": 0.0,
+    },
+    "production": {
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 5,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "sql_log_sample_rate": 0.0,
+    },
+    "test": {
+        "pool_size": 2,
+        "max_overflow": 0,
+        "pool_timeout": 5,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "sql_log_sample_rate": 0.0,
+    },
+}
+
+
+def pool_config() -> dict:
+    """
+    Configuración del pool: perfil de ENVIRONMENT más las variables DB_* definidas
+    """
+    if settings.ENVIRONMENT not in POOL_PROFILES:
+        raise ValueError(f"ENVIRONMENT desconocido: '{settings.ENVIRONMENT}'")
+    config = dict(POOL_PROFILES[settings.ENVIRONMENT])
+    overrides = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "sql_log_sample_rate": settings.DB_SQL_LOG_SAMPLE_RATE,
+    }
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    return config
+
+
+class _EstadisticasEspera:
+    """Tiempos de espera para obtener una conexión del pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def registrar(self, segundos: float, timeout: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            if timeout:
+                self.timeouts += 1
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+
+    def como_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_media_ms": round(self.espera_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "espera_max_ms": round(self.espera_max * 1000, 3),
+            }
+
+
+class _EsperaInstrumentada:
+    """Mide cuánto tarda cada checkout en obtener una conexión del pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estadisticas = _EstadisticasEspera()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.estadisticas = self.estadisticas
+        return pool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        timeout = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timeout = True
+            raise
+        finally:
+            self.estadisticas.registrar(time.perf_counter() - inicio, timeout)
+
+
+class QueuePoolInstrumentado(_EsperaInstrumentada, QueuePool):
+    pass
+
+
+class AsyncQueuePoolInstrumentado(_EsperaInstrumentada, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_kwargs(url: str, asincrono: bool = False) -> dict:
+    """
+    Argumentos de create_engine / create_async_engine según el perfil de pool
+    """
+    config = pool_config()
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # SQLite en memoria usa su propio pool de una conexión
+        return {}
+    return {
+        "poolclass": AsyncQueuePoolInstrumentado if asincrono else QueuePoolInstrumentado,
+        "pool_size": config["pool_size"],
+        "max_overflow": config["max_overflow"],
+        "pool_timeout": config["pool_timeout"],
+        "pool_recycle": config["pool_recycle"],
+        "pool_pre_ping": config["pool_pre_ping"],
+    }
+
+
+def configurar_log_sql(engine: Engine) -> None:
+    """
+    Registrar una muestra de las sentencias SQL en lugar de usar echo=True
+    """
+    tasa = pool_config()["sql_log_sample_rate"]
+    if tasa <= 0:
+        return
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _log_muestreado(conn, cursor, statement, parameters, context, executemany):
+        if tasa >= 1 or random.random() < tasa:
+            logger.info("%s %r", statement, parameters)
+
+
+def estadisticas_pool(engine) -> dict:
+    """
+    Conexiones en uso, ociosas y de desborde, más los tiempos de espera del pool
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    datos = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # overflow() es negativo mientras el pool base no está completo
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+    }
+    estadisticas = getattr(pool, "estadisticas", None)
+    if estadisticas is not None:
+        datos.update(estadisticas.como_dict())
+    return datos
@@ -0,0 +1,181 @@
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Numeric, select
+import orjson
+
+from app.models.categoria import Categoria
+from app.models.producto import Producto
+from app.schemas.categoria import CategoriaResponse
+from app.schemas.producto import ProductoResponse, ProductoWithCategoria
+
+# Campos que admite `fields=` en cada listado: los mismos del response_model
+CAMPOS_PRODUCTO = list(ProductoWithCategoria.model_fields)
+CAMPOS_PRODUCTO_SIN_CATEGORIA = list(ProductoResponse.model_fields)
+CAMPOS_CATEGORIA = list(CategoriaResponse.model_fields)
+
+# Campos que son un objeto anidado: {modelo: {campo: (relación, esquema)}}
+RELACIONES = {
+    Producto: {"categoria": (Producto.categoria, CategoriaResponse)},
+    Categoria: {},
+}
+
+DESCRIPCION_FIELDS = "Campos a devolver separados por comas (p. ej. id,nombre,precio); por defecto, todos"
+
+
+class RespuestaJSON(Response):
+    """
+    JSON con orjson: la misma salida compacta en UTF-8 que el response_model, pero
+    sin validar con pydantic y bastante más rápido
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+def parsear_campos(fields: Optional[str], permitidos) -> Optional[list]:
+    """
+    Lista de campos pedidos en `fields=a,b,c`, sin repetir; None si no se pidió proyección
+    """
+    if fields is None:
+        return None
+    campos = list(dict.fromkeys(campo.strip() for campo in fields.split(",") if campo.strip()))
+    invalidos = [campo for campo in campos if campo not in permitidos]
+    if not campos or invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos no válidos: {', '.join(invalidos) or '(vacío)'}. Disponibles: {', '.join(permitidos)}"
+        )
+    return campos
+
+
+def _a_float(valor):
+    # Numeric llega como Decimal; el esquema lo declara float
+    return None if valor is None else float(valor)
+
+
+def _convertidor(columna):
+    """Conversión de una columna al tipo JSON del esquema; None si orjson ya la serializa igual"""
+    if isinstance(columna.type, Numeric) and columna.type.asdecimal:
+        return _a_float
+    return None
+
+
+@lru_cache(maxsize=256)
+def _plan(modelo, campos: tuple):
+    """
+    Columnas a seleccionar, relaciones a unir y serializador de filas para unos campos.
+
+    Se calcula una vez por combinación de campos: en cada petición solo queda recorrer
+    las filas por posición, sin instancias del ORM ni validación de pydantic.
+    """
+    relaciones = RELACIONES[modelo]
+    columnas = []
+    uniones = []
+    pasos = []  # (campo, posición, convertidor, subcampos)
+    for campo in campos:
+        if campo in relaciones:
+            relacion, esquema = relaciones[campo]
+            destino = relacion.property.mapper.class_
+            uniones.append(relacion)
+            subcampos = []
+            for nombre in esquema.model_fields:
+                columna = getattr(destino, nombre)
+                subcampos.append((nombre, len(columnas), _convertidor(columna)))
+                columnas.append(columna.label(f"{campo}.{nombre}"))
+            pasos.append((campo, None, None, tuple(subcampos)))
+        else:
+            columna = getattr(modelo, campo)
+            pasos.append((campo, len(columnas), _convertidor(columna), None))
+            columnas.append(columna.label(campo))
+
+    def serializar(fila) -> dict:
+        item = {}
+        for campo, posicion, convertir, subcampos in pasos:
+            if subcampos is None:
+                valor = fila[posicion]
+                item[campo] = convertir(valor) if convertir else valor
+            else:
+                item[campo] = {
+                    nombre: convertir(fila[i]) if convertir else fila[i]
+                    for nombre, i, convertir in subcampos
+                }
+        return item
+
+    return tuple(columnas), tuple(uniones), serializar
+
+
+def consulta_proyectada(modelo, campos: list, columnas_orden: list = ()):
+    """
+    select() de Core solo con las columnas de `campos`, etiquetadas con su nombre.
+
+    Añade al final las columnas de orden que no se hayan pedido (las necesita el cursor
+    de paginación). Los campos anidados (p. ej. `categoria`) se resuelven con un JOIN y
+    sus columnas se etiquetan como "campo.columna".
+    """
+    columnas, uniones, _ = _plan(modelo, tuple(campos))
+    extra = [columna.label(columna.key) for columna in columnas_orden if columna.key not in campos]
+    query = select(*columnas, *extra)
+    for relacion in uniones:
+        query = query.join(relacion)
+    return query
+
+
+@lru_cache(maxsize=256)
+def serializador_objetos(modelo, campos: tuple):
+    """
+    Como el serializador de _plan, pero para objetos con los atributos del modelo (los
+    registros del catálogo en memoria, app.cache.catalogo) en lugar de filas de Core
+    """
+    relaciones = RELACIONES[modelo]
+    pasos = []  # (campo, convertidor, subcampos)
+    for campo in campos:
+        if campo in relaciones:
+            relacion, esquema = relaciones[campo]
+            destino = relacion.property.mapper.class_
+            subcampos = tuple(
+                (nombre, _convertidor(getattr(destino, nombre))) for nombre in esquema.model_fields
+            )
+            pasos.append((campo, None, subcampos))
+        else:
+            pasos.append((campo, _convertidor(getattr(modelo, campo)), None))
+
+    def serializar(objeto) -> dict:
+        item = {}
+        for campo, convertir, subcampos in pasos:
+            valor = getattr(objeto, campo)
+            if subcampos is None:
+                item[campo] = convertir(valor) if convertir else valor
+            else:
+                item[campo] = {
+                    nombre: convertir(getattr(valor, nombre)) if convertir else getattr(valor, nombre)
+                    for nombre, convertir in subcampos
+                }
+        return item
+
+    return serializar
+
+
+def respuesta_json(contenido, response: Response = None) -> RespuestaJSON:
+    respuesta = RespuestaJSON(content=contenido)
+    # Al devolver una Response propia no se copian las cabeceras del parámetro `response`
+    # (cursor, ETag...): se añaden aquí como hace FastAPI con el response_model
+    if response is not None:
+        respuesta.raw_headers.extend(response.raw_headers)
+    return respuesta
+
+
+def respuesta_proyectada(filas: list, modelo, campos: list, response: Response = None) -> RespuestaJSON:
+    """
+    Respuesta con los campos pedidos de cada fila, serializada directamente con orjson
+    """
+    _, _, serializar = _plan(modelo, tuple(campos))
+    return respuesta_json([serializar(fila) for fila in filas], response)
+
+
+def respuesta_objetos(objetos, modelo, campos: list, response: Response = None) -> RespuestaJSON:
+    """Lo mismo que respuesta_proyectada para registros del catálogo en memoria"""
+    serializar = serializador_objetos(modelo, tuple(campos))
+    return respuesta_json([serializar(objeto) for objeto in objetos], response)
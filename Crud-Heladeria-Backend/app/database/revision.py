@@ -0,0 +1,62 @@
+"""
+Revisión de productos y categorías: qué filas cambiaron desde la última sincronización
+de la instantánea del catálogo (app/cache/catalogo.py), sin contadores compartidos.
+
+- PostgreSQL: el id de la transacción que escribió la fila (pg_current_xact_id()). Lo
+  pone un trigger BEFORE en la misma escritura (migración 0011), así que no hay segundo
+  UPDATE ni una fila común que bloquear. Una transacción que confirma tarde puede tener
+  un id menor que otros ya vistos, pero nunca menor que el xmin de la instantánea MVCC
+  de la lectura anterior (horizonte_revision()): basta con volver a pedir las filas con
+  revision >= ese horizonte.
+- SQLite: max(revision) + 1 de la tabla, en el mismo UPDATE o INSERT (onupdate / default
+  de la columna). Las escrituras van de una en una, así que crece en orden de commit y
+  no hay transacciones a medias que vigilar (el horizonte es NULL). Un trigger solo la
+  asigna a las escrituras con SQL directo que no la tocan.
+"""
+from sqlalchemy import BigInteger, literal_column
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+XID_POSTGRESQL = "pg_current_xact_id()::text::bigint"
+HORIZONTE_POSTGRESQL = "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+class siguiente_revision(FunctionElement):
+    """Revisión de una fila escrita ahora en `tabla`"""
+    type = BigInteger()
+    name = "siguiente_revision"
+    inherit_cache = True
+
+    def __init__(self, tabla: str):
+        super().__init__(literal_column(tabla))
+
+
+class horizonte_revision(FunctionElement):
+    """
+    Revisión más baja que aún puede aparecer después de esta lectura (transacciones
+    en curso); NULL si los cambios se confirman en orden de revisión
+    """
+    type = BigInteger()
+    name = "horizonte_revision"
+    inherit_cache = True
+
+
+@compiles(siguiente_revision)
+def _siguiente_revision(element, compiler, **kw):
+    tabla = compiler.process(element.clauses, **kw)
+    return f"(SELECT coalesce(max(anterior.revision), 0) + 1 FROM {tabla} AS anterior)"
+
+
+@compiles(siguiente_revision, "postgresql")
+def _siguiente_revision_postgresql(element, compiler, **kw):
+    return XID_POSTGRESQL
+
+
+@compiles(horizonte_revision)
+def _horizonte_revision(element, compiler, **kw):
+    return "NULL"
+
+
+@compiles(horizonte_revision, "postgresql")
+def _horizonte_revision_postgresql(element, compiler, **kw):
+    return HORIZONTE_POSTGRESQL
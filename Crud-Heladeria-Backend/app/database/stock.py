@@ -0,0 +1,147 @@
+from functools import lru_cache
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, bindparam, case, select, update
+
+from app.models.producto import Producto
+
+# Columnas que devuelven los UPDATE de stock (RETURNING): la fila completa, sin volver a leerla
+COLUMNAS = tuple(Producto.__table__.columns)
+
+
+def sentencia_stock(producto_id: int, stock):
+    """
+    UPDATE del stock de un producto que devuelve la fila actualizada: una sola ida y
+    vuelta a la base de datos. `stock` es el valor nuevo o una expresión sobre la columna;
+    fecha_actualizacion toma now() (onupdate de la columna).
+    """
+    return (
+        update(Producto)
+        .where(Producto.id == producto_id)
+        .values(stock=stock)
+        .returning(*COLUMNAS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def sentencia_incremento(producto_id: int, cantidad: int):
+    return sentencia_stock(producto_id, Producto.stock + cantidad)
+
+
+def sentencia_decremento(producto_id: int, cantidad: int):
+    """
+    Restar solo si alcanza y el producto está activo (como en POST /pedidos). La condición
+    se evalúa en el propio UPDATE, sobre la fila ya bloqueada: dos ventas a la vez no
+    pueden leer el mismo stock y perder una de las dos ni dejarlo en negativo. Sin fila
+    devuelta, el producto no existe, está inactivo o no hay bastante.
+    """
+    return sentencia_stock(producto_id, Producto.stock - cantidad).where(
+        Producto.stock >= cantidad, Producto.activo == True
+    )
+
+
+def agrupar_cantidades(lineas) -> dict:
+    """
+    {producto_id: cantidad total} de una lista de objetos con producto_id y cantidad
+    (un producto repetido suma sus cantidades), ordenado por id
+    """
+    if not lineas:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No hay productos que reservar"
+        )
+    cantidades = {}
+    for linea in lineas:
+        cantidades[linea.producto_id] = cantidades.get(linea.producto_id, 0) + linea.cantidad
+    return dict(sorted(cantidades.items()))
+
+
+def bloquea_filas(dialecto) -> bool:
+    """
+    Si el backend tiene SELECT ... FOR UPDATE. En SQLite la consulta de bloqueo sería una
+    ida y vuelta sin efecto y se puede saltar.
+    """
+    return dialecto.name != "sqlite"
+
+
+_BLOQUEO = (
+    select(Producto.id)
+    .where(Producto.id.in_(bindparam("ids", expanding=True)), Producto.activo == True)
+    .order_by(Producto.id)
+    .with_for_update()
+)
+
+
+def consulta_bloqueo(cantidades: dict) -> tuple:
+    """
+    (sentencia, parámetros) para bloquear las filas en orden de id antes de la reserva
+    (SELECT ... FOR UPDATE en PostgreSQL; SQLite lo omite, allí la transacción de
+    escritura ya es única): dos reservas que comparten productos se esperan en lugar de
+    interbloquearse. Solo las de productos activos, las únicas que la reserva resta. Se ejecuta con `db.execute(*consulta_bloqueo(cantidades))`.
+    """
+    return _BLOQUEO, {"ids": list(cantidades)}
+
+
+@lru_cache(maxsize=128)
+def _sentencia_reserva(productos: int):
+    # Una sentencia por número de productos, con parámetros: se construye una vez y la
+    # caché de compilación de SQLAlchemy la reconoce sin recalcular su clave. Las
+    # cantidades llevan tipo para que PostgreSQL no tenga que deducirlo dentro del CASE.
+    ids = [bindparam(f"id_{i}", type_=Integer) for i in range(productos)]
+    cantidad = case(*((Producto.id == ids[i], bindparam(f"cantidad_{i}", type_=Integer)) for i in range(productos)))
+    return (
+        update(Producto)
+        .where(Producto.id.in_(ids), Producto.stock >= cantidad, Producto.activo == True)
+        .values(stock=Producto.stock - cantidad)
+        .returning(*COLUMNAS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def sentencia_reserva(cantidades: dict) -> tuple:
+    """
+    (sentencia, parámetros) de un solo UPDATE para todos los productos: a cada uno le resta
+    su cantidad si alcanza y está activo. Si devuelve menos filas que productos, la reserva no está
+    completa y hay que deshacer la transacción (todo o nada). Se ejecuta con
+    `db.execute(*sentencia_reserva(cantidades))`.
+    """
+    parametros = {}
+    for i, (producto_id, cantidad) in enumerate(cantidades.items()):
+        parametros[f"id_{i}"] = producto_id
+        parametros[f"cantidad_{i}"] = cantidad
+    return _sentencia_reserva(len(cantidades)), parametros
+
+
+def consulta_disponible(producto_ids):
+    """(id, stock, activo) actuales, para explicar por qué no se pudo restar"""
+    return select(Producto.id, Producto.stock, Producto.activo).where(Producto.id.in_(list(producto_ids)))
+
+
+def error_stock(cantidades: dict, filas) -> HTTPException:
+    """
+    404 si algún producto no existe; 400 si alguno está inactivo; si no, 409 con los
+    productos que no tienen bastante stock (`filas` son las de consulta_disponible, leídas
+    tras deshacer la transacción)
+    """
+    disponibles = {fila.id: fila for fila in filas}
+    for producto_id in cantidades:
+        if producto_id not in disponibles:
+            return HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {producto_id} no encontrado"
+            )
+    inactivos = [producto_id for producto_id in cantidades if not disponibles[producto_id].activo]
+    if inactivos:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No se pueden vender productos inactivos: {', '.join(map(str, inactivos))}"
+        )
+    faltantes = [
+        {"producto_id": producto_id, "solicitado": cantidad, "disponible": disponibles[producto_id].stock}
+        for producto_id, cantidad in cantidades.items()
+        if disponibles[producto_id].stock < cantidad
+    ]
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"mensaje": "Stock insuficiente", "productos": faltantes}
+    )
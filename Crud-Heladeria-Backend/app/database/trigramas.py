@@ -0,0 +1,106 @@
+from collections import defaultdict
+import re
+import unicodedata
+
+from app.config import settings
+from app.database.indices import IndiceProductos
+
+PALABRA = re.compile(r"\w+")
+
+
+def normalizar(texto: str) -> list:
+    """Palabras en minúsculas y sin tildes: "Limón" y "limon" son la misma"""
+    sin_tildes = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return PALABRA.findall(sin_tildes.lower())
+
+
+def trigramas(palabra: str) -> frozenset:
+    """Trigramas con el mismo relleno que pg_trgm: dos espacios delante y uno detrás"""
+    relleno = f"  {palabra} "
+    return frozenset(relleno[i:i + 3] for i in range(len(relleno) - 2))
+
+
+class IndiceTrigramas(IndiceProductos):
+    """
+    Índice invertido de trigramas sobre las palabras de nombre y sabor de los
+    productos activos, para búsquedas tolerantes a errores sin pg_trgm.
+
+    El vocabulario (palabras distintas) es mucho menor que el catálogo: los sabores se
+    repiten. Una búsqueda compara cada palabra de la consulta solo con las palabras
+    que comparten algún trigrama con ella.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._trigramas_palabra = {}                 # palabra -> trigramas
+        self._palabras_trigrama = defaultdict(set)   # trigrama -> palabras
+        self._productos_palabra = defaultdict(set)   # palabra -> ids de producto
+        self._palabras_producto = {}                 # id de producto -> palabras
+
+    def __len__(self) -> int:
+        return len(self._palabras_producto)
+
+    def _quitar(self, producto_id: int) -> None:
+        for palabra in self._palabras_producto.pop(producto_id, ()):
+            productos = self._productos_palabra[palabra]
+            productos.discard(producto_id)
+            if not productos:
+                # Palabra sin productos: sacarla del vocabulario
+                del self._productos_palabra[palabra]
+                for trigrama in self._trigramas_palabra.pop(palabra):
+                    self._palabras_trigrama[trigrama].discard(palabra)
+                    if not self._palabras_trigrama[trigrama]:
+                        del self._palabras_trigrama[trigrama]
+
+    def _poner(self, producto_id: int, nombre: str, sabor: str) -> None:
+        self._quitar(producto_id)
+        palabras = set(normalizar(nombre)) | set(normalizar(sabor))
+        self._palabras_producto[producto_id] = palabras
+        for palabra in palabras:
+            if palabra not in self._trigramas_palabra:
+                self._trigramas_palabra[palabra] = trigramas(palabra)
+                for trigrama in self._trigramas_palabra[palabra]:
+                    self._palabras_trigrama[trigrama].add(palabra)
+            self._productos_palabra[palabra].add(producto_id)
+
+    def buscar(self, q: str, limite: int = 20, umbral: float = None) -> list:
+        """
+        [(producto_id, similitud)] de mayor a menor similitud.
+
+        La similitud de cada palabra de la consulta es la de Jaccard sobre trigramas con
+        la palabra más parecida del producto (si llega al umbral); la del producto es la
+        media de esas.
+        """
+        if umbral is None:
+            umbral = settings.BUSQUEDA_UMBRAL_SIMILITUD
+        consulta = normalizar(q)
+        if not consulta:
+            return []
+
+        puntuaciones = defaultdict(float)
+        with self._lock:
+            for palabra_consulta in consulta:
+                trigramas_consulta = trigramas(palabra_consulta)
+                comunes = defaultdict(int)
+                for trigrama in trigramas_consulta:
+                    for palabra in self._palabras_trigrama.get(trigrama, ()):
+                        comunes[palabra] += 1
+
+                mejor = {}
+                for palabra, n in comunes.items():
+                    similitud = n / (len(trigramas_consulta) + len(self._trigramas_palabra[palabra]) - n)
+                    if similitud < umbral:
+                        # Solo un trigrama suelto en común: no recorrer sus productos
+                        continue
+                    for producto_id in self._productos_palabra[palabra]:
+                        if similitud > mejor.get(producto_id, 0.0):
+                            mejor[producto_id] = similitud
+                for producto_id, similitud in mejor.items():
+                    puntuaciones[producto_id] += similitud / len(consulta)
+
+        resultados = [(pid, round(s, 4)) for pid, s in puntuaciones.items() if s >= umbral]
+        resultados.sort(key=lambda r: (-r[1], r[0]))
+        return resultados[:limite]
+
+
+indice_productos = IndiceTrigramas()
@@ -1,5 +1,6 @@
 from .categoria import Categoria
 from .producto import Producto
+from .pedido import Pedido, PedidoItem
 from .usuario import Usuario
 
-__all__ = ["Categoria", "Producto", "Usuario"]
\ No newline at end of file
+__all__ = ["Categoria", "Producto", "Pedido", "PedidoItem", "Usuario"]
\ No newline at end of file
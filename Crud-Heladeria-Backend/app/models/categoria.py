@@ -1,17 +1,26 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.database import Base
+from app.database.revision import siguiente_revision
 
 
 class Categoria(Base):
     __tablename__ = "categorias"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     nombre = Column(String(50), nullable=False, unique=True)
     descripcion = Column(Text)
     activo = Column(Boolean, default=True)
     fecha_creacion = Column(DateTime, server_default=func.now())
+    fecha_actualizacion = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    # Cambios del catálogo desde la última sincronización (app/database/revision.py)
+    revision = Column(BigInteger, nullable=False, server_default="0",
+                      default=siguiente_revision("categorias"), onupdate=siguiente_revision("categorias"))
+    
+    __table_args__ = (
+        Index("idx_categorias_revision", "revision"),
+    )
     
     # Relación con productos
     productos = relationship("Producto", back_populates="categoria")
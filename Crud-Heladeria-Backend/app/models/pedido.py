@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, Numeric, Boolean, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database.database import Base
+from app.models.producto import FechaHora
+
+
+class Pedido(Base):
+    __tablename__ = "pedidos"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    total = Column(Numeric(12, 2), nullable=False)
+    fecha_creacion = Column(FechaHora, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_pedidos_usuario", "usuario_id"),
+    )
+    
+    # Líneas del pedido, una por producto
+    items = relationship("PedidoItem", back_populates="pedido", order_by="PedidoItem.producto_id")
+    
+    def __repr__(self):
+        return f"<Pedido(id={self.id}, usuario_id={self.usuario_id}, total={self.total})>"
+
+
+class PedidoItem(Base):
+    __tablename__ = "pedido_items"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pedido_id = Column(Integer, ForeignKey("pedidos.id"), nullable=False)
+    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False)
+    cantidad = Column(Integer, nullable=False)
+    # Precio aplicado al vender (minorista o mayorista): el del producto puede cambiar después
+    precio_unitario = Column(Numeric(10, 2), nullable=False)
+    es_precio_mayorista = Column(Boolean, nullable=False)
+    subtotal = Column(Numeric(12, 2), nullable=False)
+
+    __table_args__ = (
+        Index("idx_pedido_items_pedido", "pedido_id"),
+        Index("idx_pedido_items_producto", "producto_id"),
+    )
+    
+    pedido = relationship("Pedido", back_populates="items")
+    
+    def __repr__(self):
+        return f"<PedidoItem(pedido_id={self.pedido_id}, producto_id={self.producto_id}, cantidad={self.cantidad})>"
\ No newline at end of file
@@ -1,13 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, Boolean, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Text, Numeric, DateTime, Boolean, ForeignKey, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.database import Base
+from app.database.revision import siguiente_revision
+
+# SQLite guarda CURRENT_TIMESTAMP como "AAAA-MM-DD HH:MM:SS"; sin microsegundos los
+# parámetros se comparan en el mismo formato (filtros por fecha y cursores)
+FechaHora = DateTime().with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
 
 
 class Producto(Base):
     __tablename__ = "productos"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     nombre = Column(String(100), nullable=False)
     sabor = Column(String(50), nullable=False)
     descripcion = Column(Text)
@@ -18,8 +24,36 @@ class Producto(Base):
     imagen_url = Column(String(500), nullable=True)
     categoria_id = Column(Integer, ForeignKey("categorias.id"), nullable=False)
     activo = Column(Boolean, default=True)
-    fecha_creacion = Column(DateTime, server_default=func.now())
-    fecha_actualizacion = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    fecha_creacion = Column(FechaHora, server_default=func.now())
+    fecha_actualizacion = Column(FechaHora, server_default=func.now(), onupdate=func.now())
+    # Cambios del catálogo desde la última sincronización (app/database/revision.py)
+    revision = Column(BigInteger, nullable=False, server_default="0",
+                      default=siguiente_revision("productos"), onupdate=siguiente_revision("productos"))
+
+    # Los listados filtran por estas columnas y ordenan por id (paginación por cursor)
+    __table_args__ = (
+        Index("idx_productos_nombre", "nombre"),
+        Index("idx_productos_categoria_activo_id", "categoria_id", "activo", "id"),
+        Index("idx_productos_activo_id", "activo", "id"),
+        # Rangos y orden de /productos/?order_by=... sobre productos activos
+        Index("idx_productos_activo_precio_id", "activo", "precio", "id"),
+        Index("idx_productos_activo_nombre_id", "activo", "nombre", "id"),
+        Index("idx_productos_activo_stock_id", "activo", "stock", "id"),
+        Index("idx_productos_activo_sabor_id", "activo", "sabor", "id"),
+        Index("idx_productos_activo_creacion_id", "activo", "fecha_creacion", "id"),
+        Index("idx_productos_activo_actualizacion_id", "activo", "fecha_actualizacion", "id"),
+        # max(fecha_actualizacion) de la versión del catálogo (ETag)
+        Index("idx_productos_actualizacion", "fecha_actualizacion"),
+        # max(revision) de la versión y cambios desde la última sincronización del catálogo
+        Index("idx_productos_revision", "revision"),
+        # Parcial: solo productos activos con precio mayorista (/productos/mayorista/disponibles)
+        Index(
+            "idx_productos_mayorista_id",
+            "id",
+            postgresql_where=(activo == True) & precio_mayorista.isnot(None) & cantidad_minima_mayorista.isnot(None),
+            sqlite_where=(activo == True) & precio_mayorista.isnot(None) & cantidad_minima_mayorista.isnot(None),
+        ),
+    )
     
     # Relación con categoría
     categoria = relationship("Categoria", back_populates="productos")
@@ -27,10 +61,14 @@ class Producto(Base):
     def __repr__(self):
         return f"<Producto(id={self.id}, nombre='{self.nombre}', precio={self.precio})>"
     
+    def es_precio_mayorista(self, cantidad: int) -> bool:
+        """Si a esta cantidad se le aplica el precio mayorista"""
+        return (self.precio_mayorista is not None and
+                self.cantidad_minima_mayorista is not None and
+                cantidad >= self.cantidad_minima_mayorista)
+    
     def calcular_precio(self, cantidad: int) -> float:
         """Calcula el precio basado en la cantidad solicitada"""
-        if (self.precio_mayorista and 
-            self.cantidad_minima_mayorista and 
-            cantidad >= self.cantidad_minima_mayorista):
+        if self.es_precio_mayorista(cantidad):
             return float(self.precio_mayorista)
         return float(self.precio)
\ No newline at end of file
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends
+
+from app.cache import respuestas
+from app.cache.catalogo import catalogo
+from app.config import settings
+from app.database import database
+from app.database.pool import estadisticas_pool, pool_config
+from app.models.usuario import Usuario
+from app.auth.dependencies import get_current_admin_user, get_current_admin_user_async
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["administración"]
+)
+
+# Solo administradores (ADMIN_USERNAMES), con la misma autenticación que el resto de routers
+# montados
+usuario_actual = get_current_admin_user_async if settings.DB_ASYNC else get_current_admin_user
+
+
+@router.get("/db/pool")
+def obtener_estadisticas_pool(current_user: Usuario = Depends(usuario_actual)):
+    """Estado del pool de conexiones: en uso, ociosas, desborde y tiempos de espera"""
+    motores = {"primario": estadisticas_pool(database.engine)}
+    for i, replica_engine in enumerate(database.replica_engines):
+        motores[f"replica_{i}"] = estadisticas_pool(replica_engine)
+    if database.async_engine is not None:
+        motores["primario_async"] = estadisticas_pool(database.async_engine.sync_engine)
+    for i, replica_engine in enumerate(database.async_replica_engines):
+        motores[f"replica_{i}_async"] = estadisticas_pool(replica_engine.sync_engine)
+    return {
+        "entorno": settings.ENVIRONMENT,
+        "configuracion": pool_config(),
+        "motores": motores,
+    }
+
+
+@router.get("/cache/respuestas")
+def obtener_estadisticas_cache(current_user: Usuario = Depends(usuario_actual)):
+    """Caché de respuestas del catálogo: aciertos, fallos, invalidaciones y memoria usada"""
+    return {
+        "habilitada": respuestas.almacen is not None,
+        "ttl_segundos": respuestas.vigencia(),
+        "stale_segundos": settings.RESPONSE_CACHE_STALE_SECONDS,
+        "metricas": respuestas.metricas.valores(),
+        "almacen": respuestas.almacen.estadisticas() if respuestas.almacen is not None else {},
+    }
+
+
+@router.get("/catalogo")
+def obtener_estado_catalogo(current_user: Usuario = Depends(usuario_actual)):
+    """Instantánea del catálogo en memoria: versión, tamaño y última comprobación"""
+    return catalogo.estadisticas()
\ No newline at end of file
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.database.database import get_db
 from app.models.usuario import Usuario
 from app.schemas.usuario import UsuarioCreate, UsuarioResponse, UsuarioLogin
-from app.auth.security import hash_password, authenticate_user
-from app.auth.dependencies import get_current_active_user
+from app.auth.security import hash_password, authenticate_user, create_access_token, tokens_habilitados
+from app.config import settings
+from app.auth.dependencies import get_current_active_user, get_current_admin_user
+from app.auth.pool import password_pool
+from app.auth.throttle import devolver_intento, verificar_intentos
 
 router = APIRouter(
     prefix="/auth",
@@ -14,10 +17,11 @@ router = APIRouter(
 )
 
 @router.post("/register", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user: UsuarioCreate, db: Session = Depends(get_db)):
+def register_user(user: UsuarioCreate, request: Request, db: Session = Depends(get_db)):
     """
     Registrar un nuevo usuario
     """
+    verificar_intentos(request)
     try:
         # Verificar si el usuario ya existe
         existing_user = db.query(Usuario).filter(Usuario.username == user.username).first()
@@ -41,6 +45,8 @@ def register_user(user: UsuarioCreate, db: Session = Depends(get_db)):
         
         return db_user
     
+    except HTTPException:
+        raise
     except IntegrityError:
         db.rollback()
         raise HTTPException(
@@ -55,10 +61,11 @@ def register_user(user: UsuarioCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/login")
-def login(user_credentials: UsuarioLogin, db: Session = Depends(get_db)):
+def login(user_credentials: UsuarioLogin, request: Request, db: Session = Depends(get_db)):
     """
-    Verificar credenciales de usuario (para testing)
+    Verificar credenciales de usuario y emitir un token de acceso firmado
     """
+    verificar_intentos(request, user_credentials.username)
     user = authenticate_user(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
@@ -67,14 +74,21 @@ def login(user_credentials: UsuarioLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Basic"},
         )
     
-    return {
-        "message": "Login exitoso",
-        "user": {
-            "id": user.id,
-            "username": user.username,
-            "is_active": user.is_active
-        }
+    devolver_intento(request, user_credentials.username)
+    respuesta = {"message": "Login exitoso"}
+    # Sin SECRET_KEY propia no se emiten tokens: el login solo verifica las credenciales
+    if tokens_habilitados():
+        respuesta.update({
+            "access_token": create_access_token(user),
+            "token_type": "bearer",
+            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        })
+    respuesta["user"] = {
+        "id": user.id,
+        "username": user.username,
+        "is_active": user.is_active
     }
+    return respuesta
 
 @router.get("/me", response_model=UsuarioResponse)
 def get_current_user_info(current_user: Usuario = Depends(get_current_active_user)):
@@ -89,4 +103,11 @@ def get_all_users(current_user: Usuario = Depends(get_current_active_user), db:
     Obtener todos los usuarios (requiere autenticación)
     """
     users = db.query(Usuario).all()
-    return users
\ No newline at end of file
+    return users
+
+@router.get("/metricas")
+def get_auth_metrics(current_user: Usuario = Depends(get_current_admin_user)):
+    """
+    Métricas del pool de procesos de bcrypt (solo administradores, ADMIN_USERNAMES)
+    """
+    return {"password_pool": password_pool.metricas()}
\ No newline at end of file
@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+
+from app.database.database import get_async_db
+from app.models.usuario import Usuario
+from app.schemas.usuario import UsuarioCreate, UsuarioResponse, UsuarioLogin
+from app.auth.security import hash_password_async, authenticate_user_async, create_access_token, tokens_habilitados
+from app.config import settings
+from app.auth.dependencies import get_current_active_user_async, get_current_admin_user_async
+from app.auth.pool import password_pool
+from app.auth.throttle import devolver_intento, verificar_intentos
+
+# Versión asíncrona de app/routers/auth.py (DB_ASYNC=True): bcrypt se espera
+# desde el event loop sin ocupar hilos del threadpool
+router = APIRouter(
+    prefix="/auth",
+    tags=["autenticación"]
+)
+
+@router.post("/register", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
+async def register_user(user: UsuarioCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Registrar un nuevo usuario
+    """
+    verificar_intentos(request)
+    try:
+        # Verificar si el usuario ya existe
+        existing_user = (await db.execute(
+            select(Usuario.id).where(Usuario.username == user.username)
+        )).first()
+        if existing_user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El nombre de usuario ya está registrado"
+            )
+
+        # Crear nuevo usuario
+        hashed_password = await hash_password_async(user.password)
+        db_user = Usuario(
+            username=user.username,
+            hashed_password=hashed_password,
+            is_active=user.is_active
+        )
+
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+
+        return db_user
+
+    except HTTPException:
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error al crear el usuario. El nombre de usuario ya existe."
+        )
+    except Exception:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.post("/login")
+async def login(user_credentials: UsuarioLogin, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Verificar credenciales de usuario y emitir un token de acceso firmado
+    """
+    verificar_intentos(request, user_credentials.username)
+    user = await authenticate_user_async(db, user_credentials.username, user_credentials.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciales inválidas",
+            headers={"WWW-Authenticate": "Basic"},
+        )
+
+    devolver_intento(request, user_credentials.username)
+    respuesta = {"message": "Login exitoso"}
+    # Sin SECRET_KEY propia no se emiten tokens: el login solo verifica las credenciales
+    if tokens_habilitados():
+        respuesta.update({
+            "access_token": create_access_token(user),
+            "token_type": "bearer",
+            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        })
+    respuesta["user"] = {
+        "id": user.id,
+        "username": user.username,
+        "is_active": user.is_active
+    }
+    return respuesta
+
+@router.get("/me", response_model=UsuarioResponse)
+async def get_current_user_info(current_user: Usuario = Depends(get_current_active_user_async)):
+    """
+    Obtener información del usuario actual autenticado
+    """
+    return current_user
+
+@router.get("/users", response_model=list[UsuarioResponse])
+async def get_all_users(current_user: Usuario = Depends(get_current_active_user_async), db: AsyncSession = Depends(get_async_db)):
+    """
+    Obtener todos los usuarios (requiere autenticación)
+    """
+    result = await db.execute(select(Usuario))
+    return result.scalars().all()
+
+@router.get("/metricas")
+async def get_auth_metrics(current_user: Usuario = Depends(get_current_admin_user_async)):
+    """
+    Métricas del pool de procesos de bcrypt (solo administradores, ADMIN_USERNAMES)
+    """
+    return {"password_pool": password_pool.metricas()}
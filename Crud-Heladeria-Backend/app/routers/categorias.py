@@ -1,9 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import exists
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
 
-from app.database.database import get_db
+from app.cache.catalogo import catalogo
+from app.cache.etag import condicional, consulta_version_catalogo
+from app.cache.respuestas import invalidar_categoria
+from app.database.database import get_read_db, get_write_db
+from app.database.paginacion import MAX_LIMIT, paginar, recortar_pagina
+from app.database.proyeccion import (
+    CAMPOS_CATEGORIA,
+    CAMPOS_PRODUCTO_SIN_CATEGORIA,
+    DESCRIPCION_FIELDS,
+    parsear_campos,
+    consulta_proyectada,
+    respuesta_json,
+    respuesta_objetos,
+    respuesta_proyectada,
+    serializador_objetos
+)
 from app.models.categoria import Categoria
+from app.models.producto import Producto
 from app.models.usuario import Usuario
 from app.schemas.categoria import (
     CategoriaCreate,
@@ -21,28 +38,75 @@ router = APIRouter(
 
 @router.get("/", response_model=List[CategoriaResponse])
 def obtener_categorias(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_LIMIT),
     activo: bool = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
+    db: Session = Depends(get_read_db)
 ):
     """Obtener lista de categorías con paginación y filtros"""
-    query = db.query(Categoria)
+    # select() de Core con las columnas de la respuesta, sin instanciar Categoria
+    campos = parsear_campos(fields, CAMPOS_CATEGORIA) or CAMPOS_CATEGORIA
+    
+    if catalogo.habilitado:
+        instantanea = catalogo.obtener(db)
+        version = instantanea.version
+    else:
+        version = db.execute(consulta_version_catalogo()).one()
+    no_modificado = condicional(request, response, version, version.productos_modificado, version.categorias_modificado)
+    if no_modificado:
+        return no_modificado
+    
+    if catalogo.habilitado:
+        categorias = instantanea.listar_categorias(activo, cursor, skip, limit)
+        return respuesta_objetos(recortar_pagina(categorias, limit, response), Categoria, campos, response)
+    
+    query = consulta_proyectada(Categoria, campos, [Categoria.id])
     
     if activo is not None:
-        query = query.filter(Categoria.activo == activo)
+        query = query.where(Categoria.activo == activo)
     
-    categorias = query.offset(skip).limit(limit).all()
-    return categorias
+    filas = db.execute(paginar(query, [Categoria.id], cursor, skip, limit)).all()
+    return respuesta_proyectada(recortar_pagina(filas, limit, response), Categoria, campos, response)
 
 
 @router.get("/{categoria_id}", response_model=CategoriaWithProductos)
 def obtener_categoria(
+    request: Request,
+    response: Response,
     categoria_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtener una categoría específica por ID con sus productos"""
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
+    # Versión del catálogo antes de cargar nada: con 304 no se leen la categoría ni sus productos
+    if catalogo.habilitado:
+        instantanea = catalogo.obtener(db)
+        version = instantanea.version
+    else:
+        version = db.execute(consulta_version_catalogo()).one()
+    no_modificado = condicional(request, response, version, version.productos_modificado, version.categorias_modificado)
+    if no_modificado:
+        return no_modificado
+    
+    if catalogo.habilitado:
+        categoria = instantanea.categorias.get(categoria_id)
+        if not categoria:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Categoría con ID {categoria_id} no encontrada"
+            )
+        contenido = serializador_objetos(Categoria, tuple(CAMPOS_CATEGORIA))(categoria)
+        serializar_producto = serializador_objetos(Producto, tuple(CAMPOS_PRODUCTO_SIN_CATEGORIA))
+        contenido["productos"] = [serializar_producto(p) for p in instantanea.por_categoria.get(categoria_id, ())]
+        return respuesta_json(contenido, response)
+    
+    # selectinload: los productos en una sola consulta IN, sin duplicar la fila de la categoría
+    categoria = db.query(Categoria).options(
+        selectinload(Categoria.productos)
+    ).filter(Categoria.id == categoria_id).first()
     
     if not categoria:
         raise HTTPException(
@@ -56,7 +120,7 @@ def obtener_categoria(
 @router.post("/", response_model=CategoriaResponse, status_code=status.HTTP_201_CREATED)
 def crear_categoria(
     categoria: CategoriaCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """Crear una nueva categoría"""
@@ -75,6 +139,7 @@ def crear_categoria(
     db.add(db_categoria)
     db.commit()
     db.refresh(db_categoria)
+    invalidar_categoria()
     
     return db_categoria
 
@@ -83,7 +148,7 @@ def crear_categoria(
 def actualizar_categoria(
     categoria_id: int,
     categoria_update: CategoriaUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """Actualizar una categoría existente"""
@@ -115,6 +180,7 @@ def actualizar_categoria(
     
     db.commit()
     db.refresh(categoria)
+    invalidar_categoria(categoria_id)
     
     return categoria
 
@@ -122,7 +188,7 @@ def actualizar_categoria(
 @router.delete("/{categoria_id}", status_code=status.HTTP_204_NO_CONTENT)
 def eliminar_categoria(
     categoria_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """Eliminar una categoría (soft delete - marcar como inactiva)"""
@@ -135,7 +201,12 @@ def eliminar_categoria(
         )
     
     # Verificar si tiene productos activos
-    productos_activos = any(producto.activo for producto in categoria.productos)
+    productos_activos = db.query(
+        exists().where(
+            Producto.categoria_id == categoria_id,
+            Producto.activo == True
+        )
+    ).scalar()
     
     if productos_activos:
         raise HTTPException(
@@ -146,6 +217,7 @@ def eliminar_categoria(
     # Soft delete - marcar como inactiva
     categoria.activo = False
     db.commit()
+    invalidar_categoria(categoria_id)
     
     return None
 
@@ -153,7 +225,7 @@ def eliminar_categoria(
 @router.patch("/{categoria_id}/activar", response_model=CategoriaResponse)
 def activar_categoria(
     categoria_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """Activar una categoría inactiva"""
@@ -168,5 +240,6 @@ def activar_categoria(
     categoria.activo = True
     db.commit()
     db.refresh(categoria)
+    invalidar_categoria(categoria_id)
     
     return categoria
\ No newline at end of file
@@ -0,0 +1,239 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+
+from app.cache.catalogo import catalogo
+from app.cache.etag import condicional, consulta_version_catalogo
+from app.cache.respuestas import invalidar_categoria
+from app.database.database import get_async_read_db, get_async_write_db
+from app.database.paginacion import MAX_LIMIT, paginar, recortar_pagina
+from app.database.proyeccion import (
+    CAMPOS_CATEGORIA,
+    CAMPOS_PRODUCTO_SIN_CATEGORIA,
+    DESCRIPCION_FIELDS,
+    parsear_campos,
+    consulta_proyectada,
+    respuesta_json,
+    respuesta_objetos,
+    respuesta_proyectada,
+    serializador_objetos
+)
+from app.models.categoria import Categoria
+from app.models.producto import Producto
+from app.models.usuario import Usuario
+from app.schemas.categoria import (
+    CategoriaCreate,
+    CategoriaUpdate,
+    CategoriaResponse,
+    CategoriaWithProductos
+)
+from app.auth.dependencies import get_current_active_user_async
+
+# Versión asíncrona de app/routers/categorias.py (DB_ASYNC=True)
+router = APIRouter(
+    prefix="/categorias",
+    tags=["categorias"]
+)
+
+
+async def _get_categoria(db: AsyncSession, categoria_id: int) -> Categoria:
+    categoria = await db.get(Categoria, categoria_id)
+    if not categoria:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Categoría con ID {categoria_id} no encontrada"
+        )
+    return categoria
+
+
+async def _nombre_en_uso(db: AsyncSession, nombre: str, excluir_id: int = None) -> bool:
+    query = select(Categoria.id).where(Categoria.nombre == nombre)
+    if excluir_id is not None:
+        query = query.where(Categoria.id != excluir_id)
+    return (await db.execute(query)).first() is not None
+
+
+@router.get("/", response_model=List[CategoriaResponse])
+async def obtener_categorias(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_LIMIT),
+    activo: bool = None,
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Obtener lista de categorías con paginación y filtros"""
+    # select() de Core con las columnas de la respuesta, sin instanciar Categoria
+    campos = parsear_campos(fields, CAMPOS_CATEGORIA) or CAMPOS_CATEGORIA
+
+    if catalogo.habilitado:
+        instantanea = await catalogo.obtener_async(db)
+        version = instantanea.version
+    else:
+        version = (await db.execute(consulta_version_catalogo())).one()
+    no_modificado = condicional(request, response, version, version.productos_modificado, version.categorias_modificado)
+    if no_modificado:
+        return no_modificado
+
+    if catalogo.habilitado:
+        categorias = instantanea.listar_categorias(activo, cursor, skip, limit)
+        return respuesta_objetos(recortar_pagina(categorias, limit, response), Categoria, campos, response)
+
+    query = consulta_proyectada(Categoria, campos, [Categoria.id])
+
+    if activo is not None:
+        query = query.where(Categoria.activo == activo)
+
+    result = await db.execute(paginar(query, [Categoria.id], cursor, skip, limit))
+    return respuesta_proyectada(recortar_pagina(result.all(), limit, response), Categoria, campos, response)
+
+
+@router.get("/{categoria_id}", response_model=CategoriaWithProductos)
+async def obtener_categoria(
+    request: Request,
+    response: Response,
+    categoria_id: int,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Obtener una categoría específica por ID con sus productos"""
+    # Versión del catálogo antes de cargar nada: con 304 no se leen la categoría ni sus productos
+    if catalogo.habilitado:
+        instantanea = await catalogo.obtener_async(db)
+        version = instantanea.version
+    else:
+        version = (await db.execute(consulta_version_catalogo())).one()
+    no_modificado = condicional(request, response, version, version.productos_modificado, version.categorias_modificado)
+    if no_modificado:
+        return no_modificado
+
+    if catalogo.habilitado:
+        categoria = instantanea.categorias.get(categoria_id)
+        if not categoria:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Categoría con ID {categoria_id} no encontrada"
+            )
+        contenido = serializador_objetos(Categoria, tuple(CAMPOS_CATEGORIA))(categoria)
+        serializar_producto = serializador_objetos(Producto, tuple(CAMPOS_PRODUCTO_SIN_CATEGORIA))
+        contenido["productos"] = [serializar_producto(p) for p in instantanea.por_categoria.get(categoria_id, ())]
+        return respuesta_json(contenido, response)
+
+    result = await db.execute(
+        select(Categoria)
+        .options(selectinload(Categoria.productos))
+        .where(Categoria.id == categoria_id)
+    )
+    categoria = result.scalars().first()
+
+    if not categoria:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Categoría con ID {categoria_id} no encontrada"
+        )
+
+    return categoria
+
+
+@router.post("/", response_model=CategoriaResponse, status_code=status.HTTP_201_CREATED)
+async def crear_categoria(
+    categoria: CategoriaCreate,
+    db: AsyncSession = Depends(get_async_write_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
+):
+    """Crear una nueva categoría"""
+    # Verificar si ya existe una categoría con el mismo nombre
+    if await _nombre_en_uso(db, categoria.nombre):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ya existe una categoría con el nombre '{categoria.nombre}'"
+        )
+
+    db_categoria = Categoria(**categoria.dict())
+    db.add(db_categoria)
+    await db.commit()
+    await db.refresh(db_categoria)
+    invalidar_categoria()
+
+    return db_categoria
+
+
+@router.put("/{categoria_id}", response_model=CategoriaResponse)
+async def actualizar_categoria(
+    categoria_id: int,
+    categoria_update: CategoriaUpdate,
+    db: AsyncSession = Depends(get_async_write_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
+):
+    """Actualizar una categoría existente"""
+    categoria = await _get_categoria(db, categoria_id)
+
+    # Verificar nombre único si se está actualizando
+    if categoria_update.nombre and categoria_update.nombre != categoria.nombre:
+        if await _nombre_en_uso(db, categoria_update.nombre, excluir_id=categoria_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Ya existe una categoría con el nombre '{categoria_update.nombre}'"
+            )
+
+    # Actualizar campos
+    update_data = categoria_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(categoria, field, value)
+
+    await db.commit()
+    await db.refresh(categoria)
+    invalidar_categoria(categoria_id)
+
+    return categoria
+
+
+@router.delete("/{categoria_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def eliminar_categoria(
+    categoria_id: int,
+    db: AsyncSession = Depends(get_async_write_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
+):
+    """Eliminar una categoría (soft delete - marcar como inactiva)"""
+    categoria = await _get_categoria(db, categoria_id)
+
+    # Verificar si tiene productos activos
+    productos_activos = await db.scalar(
+        select(exists().where(
+            Producto.categoria_id == categoria_id,
+            Producto.activo == True
+        ))
+    )
+
+    if productos_activos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se puede eliminar la categoría porque tiene productos activos asociados"
+        )
+
+    # Soft delete - marcar como inactiva
+    categoria.activo = False
+    await db.commit()
+    invalidar_categoria(categoria_id)
+
+    return None
+
+
+@router.patch("/{categoria_id}/activar", response_model=CategoriaResponse)
+async def activar_categoria(
+    categoria_id: int,
+    db: AsyncSession = Depends(get_async_write_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
+):
+    """Activar una categoría inactiva"""
+    categoria = await _get_categoria(db, categoria_id)
+
+    categoria.activo = True
+    await db.commit()
+    await db.refresh(categoria)
+    invalidar_categoria(categoria_id)
+
+    return categoria
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session, selectinload
+
+from app.cache.respuestas import invalidar_productos
+from app.database.database import get_read_db, get_write_db
+from app.database.eventos import notificar_productos
+from app.database.pedidos import (
+    comprobar_productos,
+    lineas_pedido,
+    sentencia_lineas,
+    sentencia_pedido,
+    total_pedido
+)
+from app.database.stock import (
+    agrupar_cantidades,
+    bloquea_filas,
+    consulta_bloqueo,
+    consulta_disponible,
+    error_stock,
+    sentencia_reserva
+)
+from app.models.pedido import Pedido
+from app.models.usuario import Usuario
+from app.schemas.pedido import PedidoCreate, PedidoResponse
+from app.auth.dependencies import get_current_active_user
+
+router = APIRouter(
+    prefix="/pedidos",
+    tags=["pedidos"]
+)
+
+
+@router.post("/", response_model=PedidoResponse, status_code=status.HTTP_201_CREATED)
+def crear_pedido(
+    pedido: PedidoCreate,
+    db: Session = Depends(get_write_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Crear un pedido en una sola transacción: resta el stock de todos los productos con un
+    UPDATE condicional (como POST /productos/stock/reservar), calcula el precio de cada
+    línea con la regla minorista / mayorista sobre las filas que devuelve ese UPDATE e
+    inserta la cabecera y todas las líneas. Si un producto no tiene bastante stock o está
+    inactivo, no se resta nada (409 con los productos que faltan, 400 con los inactivos):
+    las dos condiciones van en el UPDATE, que no toca ni bloquea esas filas.
+    """
+    cantidades = agrupar_cantidades(pedido.items)
+    comprobar_productos(cantidades)
+    # Sentencias de Core sobre la conexión de la sesión (la misma transacción): sin el
+    # procesamiento de sentencias del ORM, que aquí no aporta nada y cuesta por pedido
+    conn = db.connection()
+    if bloquea_filas(conn.dialect):
+        conn.execute(*consulta_bloqueo(cantidades))
+    filas = conn.execute(*sentencia_reserva(cantidades)).all()
+
+    if len(filas) < len(cantidades):
+        db.rollback()
+        disponibles = db.execute(consulta_disponible(cantidades)).all()
+        raise error_stock(cantidades, disponibles)
+
+    lineas = lineas_pedido(filas, cantidades)
+    total = total_pedido(lineas)
+    pedido_id, fecha_creacion = conn.execute(
+        sentencia_pedido(), {"usuario_id": current_user.id, "total": total}
+    ).one()
+    conn.execute(sentencia_lineas(), [{"pedido_id": pedido_id, **linea} for linea in lineas])
+    db.commit()
+
+    # UPDATE de Core: el ORM no avisa a los suscriptores (catálogo, índices de búsqueda)
+    notificar_productos({fila.id: fila._asdict() for fila in filas})
+    invalidar_productos([fila.id for fila in filas], {fila.categoria_id for fila in filas})
+
+    return {
+        "id": pedido_id,
+        "usuario_id": current_user.id,
+        "total": total,
+        "fecha_creacion": fecha_creacion,
+        "items": lineas,
+    }
+
+
+@router.get("/{pedido_id}", response_model=PedidoResponse)
+def obtener_pedido(
+    pedido_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Obtener un pedido del usuario autenticado con sus líneas (404 si es de otro usuario)"""
+    pedido = db.query(Pedido).options(selectinload(Pedido.items)).filter(
+        Pedido.id == pedido_id,
+        Pedido.usuario_id == current_user.id
+    ).first()
+
+    if not pedido:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Pedido con ID {pedido_id} no encontrado"
+        )
+
+    return pedido
@@ -1,20 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from decimal import Decimal
 
-from app.database.database import get_db
+from app.cache.catalogo import catalogo
+from app.cache.etag import condicional, consulta_version_catalogo
+from app.cache.respuestas import invalidar_producto, invalidar_productos
+from app.database.database import get_read_db, get_write_db
+from app.database.eventos import notificar_productos
+from app.database.stock import (
+    agrupar_cantidades,
+    bloquea_filas,
+    consulta_bloqueo,
+    consulta_disponible,
+    error_stock,
+    sentencia_decremento,
+    sentencia_incremento,
+    sentencia_reserva,
+    sentencia_stock
+)
+from app.database.lotes import (
+    categorias_afectadas,
+    comprobar_tamano,
+    consultas_categorias,
+    consultas_productos,
+    preparar_altas,
+    preparar_cambios,
+    sentencia_altas,
+    sentencia_cambios
+)
+from app.database.paginacion import MAX_LIMIT, paginar, recortar_pagina
+from app.database.proyeccion import (
+    CAMPOS_PRODUCTO,
+    CAMPOS_PRODUCTO_SIN_CATEGORIA,
+    DESCRIPCION_FIELDS,
+    parsear_campos,
+    consulta_proyectada,
+    respuesta_objetos,
+    respuesta_proyectada
+)
+from app.database.filtros import FiltrosProducto, OrdenProducto, columnas_orden, consulta_facetas, facetas_desde_filas
+from app.database.busqueda import consulta_busqueda, consulta_aproximada, umbral_similitud_pg
+from app.database.trigramas import indice_productos
+from app.database.autocompletado import indice_autocompletado
 from app.models.producto import Producto
 from app.models.categoria import Categoria
 from app.models.usuario import Usuario
 from app.schemas.producto import (
     ProductoCreate,
     ProductoUpdate,
+    ProductoUpdateLote,
     ProductoResponse,
     ProductoWithCategoria,
-    ProductoPrecioCalculado
+    ProductoPrecioCalculado,
+    ProductoFacetas,
+    ProductoLoteResponse,
+    ReservaStock,
+    StockProducto
 )
 from app.auth.dependencies import get_current_active_user
+from app.config import settings
 
 router = APIRouter(
     prefix="/productos",
@@ -24,44 +69,134 @@ router = APIRouter(
 
 @router.get("/", response_model=List[ProductoWithCategoria])
 def obtener_productos(
-    skip: int = 0,
-    limit: int = 100,
-    activo: Optional[bool] = None,
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    order_by: OrdenProducto = Query(OrdenProducto.id, description="Campo de orden; con \"-\" delante, descendente"),
+    filtros: FiltrosProducto = Depends(),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
+    db: Session = Depends(get_read_db)
+):
+    """Obtener lista de productos con filtros, orden y paginación"""
+    columnas, descendente, clave = columnas_orden(order_by)
+    # select() de Core con las columnas de la respuesta (todas o las de `fields`) y la
+    # categoría por JOIN: sin instanciar Producto ni validar con pydantic
+    campos = parsear_campos(fields, CAMPOS_PRODUCTO) or CAMPOS_PRODUCTO
+    
+    # ETag de la versión del catálogo: si el cliente ya tiene esta página, 304 sin consultarla
+    if catalogo.habilitado:
+        # Instantánea en memoria: sin consultas salvo cuando toca comprobar su versión
+        instantanea = catalogo.obtener(db)
+        version = instantanea.version
+    else:
+        version = db.execute(consulta_version_catalogo()).one()
+    no_modificado = condicional(request, response, version, version.productos_modificado, version.categorias_modificado)
+    if no_modificado:
+        return no_modificado
+    
+    if catalogo.habilitado:
+        productos = instantanea.listar_productos(filtros, order_by, cursor, skip, limit)
+        return respuesta_objetos(recortar_pagina(productos, limit, response, clave), Producto, campos, response)
+    
+    query = filtros.aplicar(consulta_proyectada(Producto, campos, columnas))
+    
+    filas = db.execute(paginar(query, columnas, cursor, skip, limit, descendente)).all()
+    filas = recortar_pagina(filas, limit, response, clave)
+    return respuesta_proyectada(filas, Producto, campos, response)
+
+
+@router.get("/facetas", response_model=ProductoFacetas)
+def obtener_facetas_productos(
+    filtros: FiltrosProducto = Depends(),
+    db: Session = Depends(get_read_db)
+):
+    """Cantidad de productos por categoría y por sabor con los mismos filtros del listado"""
+    if catalogo.habilitado:
+        return facetas_desde_filas(catalogo.obtener(db).facetas(filtros))
+    return facetas_desde_filas(db.execute(consulta_facetas(filtros)).all())
+
+
+@router.get("/buscar", response_model=List[ProductoWithCategoria])
+def buscar_productos(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar en nombre, sabor y descripción"),
+    activo: Optional[bool] = True,
     categoria_id: Optional[int] = None,
-    con_precio_mayorista: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    db: Session = Depends(get_read_db)
 ):
-    """Obtener lista de productos con filtros y paginación"""
-    query = db.query(Producto)
+    """Buscar productos por texto, ordenados por relevancia"""
+    query, puntuacion = consulta_busqueda(db.get_bind().dialect.name, q)
+    query = query.options(joinedload(Producto.categoria))
     
     if activo is not None:
-        query = query.filter(Producto.activo == activo)
+        query = query.where(Producto.activo == activo)
     
     if categoria_id is not None:
-        query = query.filter(Producto.categoria_id == categoria_id)
+        query = query.where(Producto.categoria_id == categoria_id)
     
-    if con_precio_mayorista is not None:
-        if con_precio_mayorista:
-            query = query.filter(
-                Producto.precio_mayorista.isnot(None),
-                Producto.cantidad_minima_mayorista.isnot(None)
-            )
-        else:
-            query = query.filter(
-                Producto.precio_mayorista.is_(None)
-            )
+    filas = db.execute(paginar(query, [puntuacion, Producto.id], cursor, 0, limit)).all()
+    filas = recortar_pagina(filas, limit, response, clave=lambda fila: (fila.puntuacion, fila.Producto.id))
+    return [fila.Producto for fila in filas]
+
+
+@router.get("/buscar/aproximada", response_model=List[ProductoWithCategoria])
+def buscar_productos_aproximado(
+    q: str = Query(..., min_length=1, max_length=100, description="Nombre o sabor, aunque tenga errores de escritura"),
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    """Buscar productos activos por similitud de nombre y sabor (tolerante a errores)"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(umbral_similitud_pg(settings.BUSQUEDA_UMBRAL_SIMILITUD))
+        query = consulta_aproximada(q).options(
+            joinedload(Producto.categoria)
+        ).where(Producto.activo == True).limit(limit)
+        return db.execute(query).scalars().all()
     
-    productos = query.offset(skip).limit(limit).all()
-    return productos
+    # Sin pg_trgm: índice de trigramas en memoria, cargado en la primera búsqueda
+    indice_productos.cargar(lambda sentencia: db.execute(sentencia).all())
+    resultados = indice_productos.buscar(q, limit)
+    productos = {
+        producto.id: producto
+        for producto in db.query(Producto).options(joinedload(Producto.categoria)).filter(
+            Producto.id.in_([producto_id for producto_id, _ in resultados])
+        )
+    }
+    return [productos[producto_id] for producto_id, _ in resultados if producto_id in productos]
+
+
+@router.get("/autocompletar", response_model=List[str])
+def autocompletar_productos(
+    prefijo: str = Query(..., min_length=1, max_length=100, description="Texto escrito hasta ahora"),
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(get_read_db)
+):
+    """Sugerencias de nombre y sabor de productos activos que empiezan por `prefijo`"""
+    # Solo la primera llamada consulta la base de datos (carga del índice)
+    if not indice_autocompletado.cargado:
+        indice_autocompletado.cargar(lambda sentencia: db.execute(sentencia).all())
+    return indice_autocompletado.sugerir(prefijo, limit)
 
 
 @router.get("/{producto_id}", response_model=ProductoWithCategoria)
 def obtener_producto(
+    request: Request,
+    response: Response,
     producto_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtener un producto específico por ID"""
-    producto = db.query(Producto).filter(Producto.id == producto_id).first()
+    if catalogo.habilitado:
+        # El registro de la instantánea tiene los mismos atributos (y su categoría)
+        producto = catalogo.obtener(db).productos.get(producto_id)
+    else:
+        producto = db.query(Producto).options(
+            joinedload(Producto.categoria)
+        ).filter(Producto.id == producto_id).first()
     
     if not producto:
         raise HTTPException(
@@ -69,13 +204,18 @@ def obtener_producto(
             detail=f"Producto con ID {producto_id} no encontrado"
         )
     
+    # La respuesta cambia con el producto y con su categoría
+    fechas = (producto.fecha_actualizacion, producto.categoria.fecha_actualizacion)
+    no_modificado = condicional(request, response, (producto.id, *fechas), *fechas)
+    if no_modificado:
+        return no_modificado
     return producto
 
 
 @router.post("/", response_model=ProductoResponse, status_code=status.HTTP_201_CREATED)
 def crear_producto(
     producto: ProductoCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """Crear un nuevo producto"""
@@ -98,15 +238,87 @@ def crear_producto(
     db.add(db_producto)
     db.commit()
     db.refresh(db_producto)
+    invalidar_producto(db_producto.id, db_producto.categoria_id)
     
     return db_producto
 
 
+@router.post("/lote", response_model=ProductoLoteResponse)
+def crear_productos_lote(
+    productos: List[ProductoCreate],
+    todo_o_nada: bool = Query(False, description="Rechazar todo el lote si algún producto tiene errores"),
+    db: Session = Depends(get_write_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Crear varios productos en una sola transacción.
+
+    Las categorías se resuelven de una vez y las filas se insertan con sentencias de
+    varias filas. Devuelve el resultado de cada producto en el orden recibido: los que
+    tienen errores no se crean (con todo_o_nada=true no se crea ninguno).
+    """
+    comprobar_tamano(productos)
+    categorias = {}
+    for consulta in consultas_categorias({producto.categoria_id for producto in productos}):
+        categorias.update(db.execute(consulta).all())
+    lote = preparar_altas(productos, categorias)
+    lote.rechazar_si_errores(todo_o_nada)
+    
+    if lote.filas:
+        ids = db.execute(sentencia_altas(), lote.filas).scalars().all()
+        db.commit()
+        lote.confirmar("creado", ids)
+        # Escrito con Core: el ORM no avisa a los suscriptores (catálogo, índices de búsqueda)
+        notificar_productos({producto_id: dict(fila, id=producto_id) for producto_id, fila in zip(ids, lote.filas)})
+        invalidar_productos(ids, categorias_afectadas(lote))
+    
+    return lote.respuesta()
+
+
+@router.put("/lote", response_model=ProductoLoteResponse)
+def actualizar_productos_lote(
+    cambios: List[ProductoUpdateLote],
+    todo_o_nada: bool = Query(False, description="Rechazar todo el lote si algún producto tiene errores"),
+    db: Session = Depends(get_write_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Actualizar varios productos en una sola transacción; de cada uno solo cambian los
+    campos enviados.
+
+    Productos y categorías se resuelven de una vez y las filas se actualizan con
+    executemany. Devuelve el resultado de cada producto en el orden recibido.
+    """
+    comprobar_tamano(cambios)
+    anteriores = {}
+    for consulta in consultas_productos({cambio.id for cambio in cambios}, Producto.id, Producto.categoria_id):
+        anteriores.update(db.execute(consulta).all())
+    categorias = {}
+    for consulta in consultas_categorias({cambio.categoria_id for cambio in cambios if cambio.categoria_id is not None}):
+        categorias.update(db.execute(consulta).all())
+    lote = preparar_cambios(cambios, anteriores, categorias)
+    lote.rechazar_si_errores(todo_o_nada)
+    
+    if lote.filas:
+        ids = [fila["id"] for fila in lote.filas]
+        db.execute(sentencia_cambios(), lote.filas)
+        # Las filas completas, para los suscriptores de los cambios de productos
+        escritos = {}
+        for consulta in consultas_productos(ids):
+            escritos.update((fila.id, fila._asdict()) for fila in db.execute(consulta))
+        db.commit()
+        lote.confirmar("actualizado", ids)
+        notificar_productos(escritos)
+        invalidar_productos(ids, categorias_afectadas(lote, anteriores))
+    
+    return lote.respuesta()
+
+
 @router.put("/{producto_id}", response_model=ProductoResponse)
 def actualizar_producto(
     producto_id: int,
     producto_update: ProductoUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """Actualizar un producto existente"""
@@ -136,13 +348,15 @@ def actualizar_producto(
                 detail="No se puede asignar el producto a una categoría inactiva"
             )
     
-    # Actualizar campos
+    # Actualizar campos (la categoría anterior también deja de estar al día en caché)
+    categoria_anterior = producto.categoria_id
     update_data = producto_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(producto, field, value)
     
     db.commit()
     db.refresh(producto)
+    invalidar_producto(producto.id, categoria_anterior, producto.categoria_id)
     
     return producto
 
@@ -150,7 +364,7 @@ def actualizar_producto(
 @router.delete("/{producto_id}", status_code=status.HTTP_204_NO_CONTENT)
 def eliminar_producto(
     producto_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """Eliminar un producto (soft delete - marcar como inactivo)"""
@@ -164,7 +378,9 @@ def eliminar_producto(
     
     # Soft delete - marcar como inactivo
     producto.activo = False
+    categoria_id = producto.categoria_id
     db.commit()
+    invalidar_producto(producto_id, categoria_id)
     
     return None
 
@@ -172,7 +388,7 @@ def eliminar_producto(
 @router.patch("/{producto_id}/activar", response_model=ProductoResponse)
 def activar_producto(
     producto_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """Activar un producto inactivo"""
@@ -187,19 +403,29 @@ def activar_producto(
     producto.activo = True
     db.commit()
     db.refresh(producto)
+    invalidar_producto(producto.id, producto.categoria_id)
     
     return producto
 
 
+def _stock_confirmado(filas: list) -> None:
+    # UPDATE de Core: el ORM no avisa a los suscriptores (catálogo, índices de búsqueda)
+    notificar_productos({fila["id"]: fila for fila in filas})
+    invalidar_productos([fila["id"] for fila in filas], {fila["categoria_id"] for fila in filas})
+
+
 @router.patch("/{producto_id}/stock", response_model=ProductoResponse)
 def actualizar_stock(
     producto_id: int,
     nuevo_stock: int = Query(..., ge=0, description="Nueva cantidad en stock"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
-    """Actualizar el stock de un producto"""
-    producto = db.query(Producto).filter(Producto.id == producto_id).first()
+    """
+    Fijar el stock de un producto (recuento de inventario). Para ventas y reposiciones,
+    /stock/decrementar y /stock/incrementar no dependen del valor leído antes.
+    """
+    producto = db.execute(sentencia_stock(producto_id, nuevo_stock)).mappings().first()
     
     if not producto:
         raise HTTPException(
@@ -207,21 +433,101 @@ def actualizar_stock(
             detail=f"Producto con ID {producto_id} no encontrado"
         )
     
-    producto.stock = nuevo_stock
+    producto = dict(producto)
     db.commit()
-    db.refresh(producto)
+    _stock_confirmado([producto])
     
     return producto
 
 
+@router.patch("/{producto_id}/stock/incrementar", response_model=ProductoResponse)
+def incrementar_stock(
+    producto_id: int,
+    cantidad: int = Query(..., gt=0, description="Unidades a sumar"),
+    db: Session = Depends(get_write_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Sumar unidades al stock en un solo UPDATE (stock = stock + cantidad)"""
+    producto = db.execute(sentencia_incremento(producto_id, cantidad)).mappings().first()
+    
+    if not producto:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Producto con ID {producto_id} no encontrado"
+        )
+    
+    producto = dict(producto)
+    db.commit()
+    _stock_confirmado([producto])
+    
+    return producto
+
+
+@router.patch("/{producto_id}/stock/decrementar", response_model=ProductoResponse)
+def decrementar_stock(
+    producto_id: int,
+    cantidad: int = Query(..., gt=0, description="Unidades a restar"),
+    db: Session = Depends(get_write_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Restar unidades del stock en un solo UPDATE condicional (stock = stock - cantidad
+    si stock >= cantidad): sin carreras entre ventas simultáneas. 409 si no hay bastante,
+    400 si el producto está inactivo.
+    """
+    producto = db.execute(sentencia_decremento(producto_id, cantidad)).mappings().first()
+    
+    if not producto:
+        db.rollback()
+        disponibles = db.execute(consulta_disponible([producto_id])).all()
+        raise error_stock({producto_id: cantidad}, disponibles)
+    
+    producto = dict(producto)
+    db.commit()
+    _stock_confirmado([producto])
+    
+    return producto
+
+
+@router.post("/stock/reservar", response_model=List[StockProducto])
+def reservar_stock(
+    lineas: List[ReservaStock],
+    db: Session = Depends(get_write_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Restar el stock de varios productos a la vez, todo o nada: si alguno no tiene
+    bastante no cambia ninguno (409 con los que faltan; 400 si alguno está inactivo). Un
+    producto repetido suma sus cantidades. Devuelve el stock que queda de cada producto.
+    """
+    cantidades = agrupar_cantidades(lineas)
+    if bloquea_filas(db.get_bind().dialect):
+        db.execute(*consulta_bloqueo(cantidades))
+    filas = db.execute(*sentencia_reserva(cantidades)).mappings().all()
+    
+    if len(filas) < len(cantidades):
+        db.rollback()
+        disponibles = db.execute(consulta_disponible(cantidades)).all()
+        raise error_stock(cantidades, disponibles)
+    
+    filas = [dict(fila) for fila in filas]
+    db.commit()
+    _stock_confirmado(filas)
+    
+    return sorted(({"producto_id": fila["id"], "stock": fila["stock"]} for fila in filas), key=lambda s: s["producto_id"])
+
+
 @router.get("/{producto_id}/precio", response_model=ProductoPrecioCalculado)
 def calcular_precio_producto(
     producto_id: int,
     cantidad: int = Query(..., gt=0, description="Cantidad a calcular"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Calcular el precio de un producto basado en la cantidad"""
-    producto = db.query(Producto).filter(Producto.id == producto_id).first()
+    if catalogo.habilitado:
+        producto = catalogo.obtener(db).productos.get(producto_id)
+    else:
+        producto = db.query(Producto).filter(Producto.id == producto_id).first()
     
     if not producto:
         raise HTTPException(
@@ -232,11 +538,7 @@ def calcular_precio_producto(
     precio_unitario = Decimal(str(producto.calcular_precio(cantidad)))
     precio_total = precio_unitario * cantidad
     
-    es_precio_mayorista = (
-        producto.precio_mayorista is not None and
-        producto.cantidad_minima_mayorista is not None and
-        cantidad >= producto.cantidad_minima_mayorista
-    )
+    es_precio_mayorista = producto.es_precio_mayorista(cantidad)
     
     return ProductoPrecioCalculado(
         producto_id=producto_id,
@@ -249,39 +551,77 @@ def calcular_precio_producto(
 
 @router.get("/mayorista/disponibles", response_model=List[ProductoWithCategoria])
 def obtener_productos_mayorista(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
+    db: Session = Depends(get_read_db)
 ):
     """Obtener productos que tienen precio mayorista configurado"""
-    productos = db.query(Producto).filter(
+    condiciones = [
         Producto.activo == True,
         Producto.precio_mayorista.isnot(None),
         Producto.cantidad_minima_mayorista.isnot(None)
-    ).offset(skip).limit(limit).all()
+    ]
+    campos = parsear_campos(fields, CAMPOS_PRODUCTO) or CAMPOS_PRODUCTO
     
-    return productos
+    if catalogo.habilitado:
+        instantanea = catalogo.obtener(db)
+        version = instantanea.version
+    else:
+        version = db.execute(consulta_version_catalogo()).one()
+    no_modificado = condicional(request, response, version, version.productos_modificado, version.categorias_modificado)
+    if no_modificado:
+        return no_modificado
+    
+    if catalogo.habilitado:
+        productos = instantanea.listar_mayoristas(cursor, skip, limit)
+        return respuesta_objetos(recortar_pagina(productos, limit, response), Producto, campos, response)
+    
+    query = consulta_proyectada(Producto, campos, [Producto.id]).where(*condiciones)
+    
+    filas = db.execute(paginar(query, [Producto.id], cursor, skip, limit)).all()
+    return respuesta_proyectada(recortar_pagina(filas, limit, response), Producto, campos, response)
 
 
 @router.get("/categoria/{categoria_id}", response_model=List[ProductoResponse])
 def obtener_productos_por_categoria(
+    request: Request,
+    response: Response,
     categoria_id: int,
     activo: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtener todos los productos de una categoría específica"""
     # Verificar que la categoría existe
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
+    if catalogo.habilitado:
+        instantanea = catalogo.obtener(db)
+        categoria = instantanea.categorias.get(categoria_id)
+    else:
+        categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
     if not categoria:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Categoría con ID {categoria_id} no encontrada"
         )
     
-    query = db.query(Producto).filter(Producto.categoria_id == categoria_id)
+    version = instantanea.version if catalogo.habilitado else db.execute(consulta_version_catalogo()).one()
+    no_modificado = condicional(request, response, version, version.productos_modificado, version.categorias_modificado)
+    if no_modificado:
+        return no_modificado
+    
+    if catalogo.habilitado:
+        productos = [
+            producto for producto in instantanea.por_categoria.get(categoria_id, ())
+            if activo is None or producto.activo == activo
+        ]
+        return respuesta_objetos(productos, Producto, CAMPOS_PRODUCTO_SIN_CATEGORIA, response)
+    
+    query = consulta_proyectada(Producto, CAMPOS_PRODUCTO_SIN_CATEGORIA).where(Producto.categoria_id == categoria_id)
     
     if activo is not None:
-        query = query.filter(Producto.activo == activo)
+        query = query.where(Producto.activo == activo)
     
-    productos = query.all()
-    return productos
\ No newline at end of file
+    return respuesta_proyectada(db.execute(query).all(), Producto, CAMPOS_PRODUCTO_SIN_CATEGORIA, response)
\ No newline at end of file
@@ -1,9 +1,15 @@
 from .categoria import CategoriaCreate, CategoriaUpdate, CategoriaResponse, CategoriaWithProductos
-from .producto import ProductoCreate, ProductoUpdate, ProductoResponse, ProductoWithCategoria, ProductoPrecioCalculado
+from .producto import (
+    ProductoCreate, ProductoUpdate, ProductoUpdateLote, ProductoResponse, ProductoWithCategoria, ProductoPrecioCalculado,
+    ProductoFacetas, ProductoLoteResponse, ReservaStock, StockProducto
+)
+from .pedido import PedidoCreate, PedidoItemCreate, PedidoItemResponse, PedidoResponse
 from .usuario import UsuarioCreate, UsuarioUpdate, UsuarioResponse, UsuarioLogin
 
 __all__ = [
     "CategoriaCreate", "CategoriaUpdate", "CategoriaResponse", "CategoriaWithProductos",
-    "ProductoCreate", "ProductoUpdate", "ProductoResponse", "ProductoWithCategoria", "ProductoPrecioCalculado",
+    "ProductoCreate", "ProductoUpdate", "ProductoUpdateLote", "ProductoResponse", "ProductoWithCategoria",
+    "ProductoPrecioCalculado", "ProductoFacetas", "ProductoLoteResponse", "ReservaStock", "StockProducto",
+    "PedidoCreate", "PedidoItemCreate", "PedidoItemResponse", "PedidoResponse",
     "UsuarioCreate", "UsuarioUpdate", "UsuarioResponse", "UsuarioLogin"
 ]
\ No newline at end of file
@@ -0,0 +1,32 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List
+from datetime import datetime
+
+# Línea de un pedido nuevo (un producto repetido suma sus cantidades)
+class PedidoItemCreate(BaseModel):
+    producto_id: int
+    cantidad: int = Field(gt=0)
+
+# Esquema para crear pedido
+class PedidoCreate(BaseModel):
+    items: List[PedidoItemCreate] = Field(..., min_length=1)
+
+# Línea de un pedido con el precio aplicado
+class PedidoItemResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    producto_id: int
+    cantidad: int
+    precio_unitario: float
+    es_precio_mayorista: bool
+    subtotal: float
+
+# Esquema para respuesta de pedido
+class PedidoResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    usuario_id: int
+    total: float
+    fecha_creacion: datetime
+    items: List[PedidoItemResponse]
\ No newline at end of file
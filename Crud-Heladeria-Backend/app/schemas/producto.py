@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, Field, field_validator
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 import re
 
@@ -52,6 +52,10 @@ class ProductoUpdate(BaseModel):
     categoria_id: Optional[int] = None
     activo: Optional[bool] = None
 
+# Esquema para cada cambio de PUT /productos/lote
+class ProductoUpdateLote(ProductoUpdate):
+    id: int
+
 # Esquema para respuesta de producto
 class ProductoResponse(ProductoBase):
     model_config = ConfigDict(from_attributes=True)
@@ -73,6 +77,50 @@ class ProductoPrecioCalculado(BaseModel):
     es_precio_mayorista: bool
 
 
+# Esquemas para las facetas del listado de productos
+class FacetaCategoria(BaseModel):
+    categoria_id: int
+    nombre: str
+    cantidad: int
+
+
+class FacetaSabor(BaseModel):
+    sabor: str
+    cantidad: int
+
+
+class ProductoFacetas(BaseModel):
+    total: int
+    categorias: List[FacetaCategoria]
+    sabores: List[FacetaSabor]
+
+
+# Esquemas para la respuesta de POST/PUT /productos/lote
+class ResultadoLote(BaseModel):
+    indice: int  # Posición del elemento en la lista enviada
+    id: Optional[int] = None
+    estado: str  # "creado", "actualizado" o "error"
+    error: Optional[str] = None
+
+
+class ProductoLoteResponse(BaseModel):
+    creados: int
+    actualizados: int
+    errores: int
+    resultados: List[ResultadoLote]
+
+
+# Esquemas para las reservas de stock (POST /productos/stock/reservar)
+class ReservaStock(BaseModel):
+    producto_id: int
+    cantidad: int = Field(gt=0)
+
+
+class StockProducto(BaseModel):
+    producto_id: int
+    stock: int
+
+
 # Importar después para evitar importación circular
 from app.schemas.categoria import CategoriaResponse
 ProductoWithCategoria.model_rebuild()
\ No newline at end of file
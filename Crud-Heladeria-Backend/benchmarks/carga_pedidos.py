@@ -0,0 +1,201 @@
+"""
+Prueba de carga de POST /pedidos: pedidos por segundo y stock correcto con contención.
+
+Uso (desde Crud-Heladeria-Backend, con el esquema migrado; crea su propia categoría,
+productos y usuario, no usarlo contra una base de datos real):
+    python -m benchmarks.carga_pedidos --hilos 16 --pedidos 4000
+    DB_ASYNC=true python -m benchmarks.carga_pedidos
+    python -m benchmarks.carga_pedidos --url http://localhost:8000   # servidor en marcha
+
+--hilos hilos envían --pedidos pedidos en total, cada uno de 1 a --lineas productos
+elegidos entre los mismos --productos (todos los pedidos compiten por las mismas filas)
+y con cantidades que a veces alcanzan el mínimo mayorista. El stock inicial no alcanza
+para todos: los últimos pedidos reciben 409. Con --url las peticiones van al servidor
+indicado (que debe usar la misma DATABASE_URL: los productos se crean y comprueban
+directamente en la base de datos); sin él, a la aplicación en proceso. Los pedidos se
+autentican con un token: con --url hace falta la misma SECRET_KEY que el servidor; en
+proceso, sin SECRET_KEY configurada se usa una aleatoria.
+
+Al terminar comprueba:
+  - cada pedido recibe 201 o 409, nada más
+  - por producto, stock inicial - stock final = lo vendido en las respuestas 201 =
+    lo que suman sus líneas en pedido_items, y ningún stock queda negativo
+  - hay un pedido en la base de datos por cada 201, con sus líneas y el total bien sumado
+  - cada línea tiene el precio de la regla minorista / mayorista
+Sale con código 1 si algo no cuadra.
+"""
+import argparse
+import os
+import random
+import secrets
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+# Antes de importar la aplicación: la configuración se lee al importar
+os.environ.setdefault("SECRET_KEY", secrets.token_urlsafe(32))
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+
+from app.auth.security import create_access_token
+from app.database.database import engine
+from app.models import Categoria, Pedido, PedidoItem, Producto, Usuario
+from main import app
+
+RUTA = "/api/v1/pedidos/"
+
+
+def crear_datos(productos: int, stock: int) -> tuple:
+    """Categoría, productos (la mitad con precio mayorista) y usuario de la prueba"""
+    marca = time.time_ns()
+    with engine.begin() as conn:
+        categoria_id = conn.execute(
+            insert(Categoria).values(nombre=f"Carga {marca}").returning(Categoria.id)
+        ).scalar_one()
+        filas = [
+            {
+                "nombre": f"Pedido {i}", "sabor": "prueba", "precio": Decimal("2.50") + i, "stock": stock,
+                "precio_mayorista": Decimal("2.00") + i if i % 2 == 0 else None, "cantidad_minima_mayorista": 5,
+                "categoria_id": categoria_id,
+            }
+            for i in range(productos)
+        ]
+        ids = conn.execute(insert(Producto).returning(Producto.id, sort_by_parameter_order=True), filas).scalars().all()
+        usuario = conn.execute(
+            insert(Usuario).values(username=f"carga{marca}", hashed_password="-", is_active=True)
+            .returning(Usuario.id, Usuario.username, Usuario.fecha_creacion)
+        ).one()
+    precios = {producto_id: fila for producto_id, fila in zip(ids, filas)}
+    return precios, usuario
+
+
+def precio_esperado(fila: dict, cantidad: int) -> Decimal:
+    if fila["precio_mayorista"] is not None and cantidad >= fila["cantidad_minima_mayorista"]:
+        return fila["precio_mayorista"]
+    return fila["precio"]
+
+
+def percentil(valores: list, p: float) -> float:
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def comprobar(precios: dict, stock: int, resultados: list) -> list:
+    """Errores encontrados al comparar las respuestas con la base de datos"""
+    errores = []
+    codigos = Counter(codigo for codigo, _, _ in resultados)
+    if set(codigos) - {201, 409}:
+        errores.append(f"códigos inesperados: {dict(codigos)}")
+
+    creados = [cuerpo for codigo, _, cuerpo in resultados if codigo == 201]
+    vendido = Counter()
+    for pedido in creados:
+        suma = Decimal(0)
+        for item in pedido["items"]:
+            vendido[item["producto_id"]] += item["cantidad"]
+            esperado = precio_esperado(precios[item["producto_id"]], item["cantidad"])
+            if Decimal(str(item["precio_unitario"])) != esperado:
+                errores.append(f"pedido {pedido['id']}: precio {item['precio_unitario']} en vez de {esperado}")
+            suma += Decimal(str(item["subtotal"]))
+        if suma != Decimal(str(pedido["total"])):
+            errores.append(f"pedido {pedido['id']}: total {pedido['total']} y líneas {suma}")
+
+    pedido_ids = [pedido["id"] for pedido in creados]
+    with engine.connect() as conn:
+        finales = dict(conn.execute(select(Producto.id, Producto.stock).where(Producto.id.in_(list(precios)))).all())
+        en_lineas = Counter()
+        guardados = 0
+        # Por bloques: SQLite limita los parámetros por sentencia
+        for i in range(0, len(pedido_ids), 1000):
+            bloque = pedido_ids[i:i + 1000]
+            guardados += conn.scalar(select(func.count()).select_from(Pedido).where(Pedido.id.in_(bloque)))
+            en_lineas.update(dict(conn.execute(
+                select(PedidoItem.producto_id, func.sum(PedidoItem.cantidad))
+                .where(PedidoItem.pedido_id.in_(bloque))
+                .group_by(PedidoItem.producto_id)
+            ).all()))
+
+    if guardados != len(creados):
+        errores.append(f"{len(creados)} respuestas 201 y {guardados} pedidos guardados")
+    for producto_id in precios:
+        final = finales[producto_id]
+        if final < 0:
+            errores.append(f"producto {producto_id}: stock negativo ({final})")
+        if stock - final != vendido[producto_id] or vendido[producto_id] != en_lineas[producto_id]:
+            errores.append(
+                f"producto {producto_id}: stock {stock} -> {final}, vendido según las respuestas "
+                f"{vendido[producto_id]}, según pedido_items {en_lineas[producto_id]}"
+            )
+    return errores
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--pedidos", type=int, default=4000, help="Pedidos en total")
+    parser.add_argument("--productos", type=int, default=10, help="Productos que comparten todos los pedidos")
+    parser.add_argument("--lineas", type=int, default=4, help="Productos distintos como mucho por pedido")
+    parser.add_argument("--stock", type=int, default=None, help="Stock inicial de cada producto (por defecto, ~80%% de lo pedido)")
+    parser.add_argument("--url", default=None, help="Servidor en marcha; sin él, la aplicación en proceso")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+
+    # Cantidades de 1 a 8: las de 5 o más llevan precio mayorista en la mitad de los productos
+    media_pedida = args.pedidos * (args.lineas + 1) / 2 * 4.5 / args.productos
+    stock = args.stock if args.stock is not None else int(media_pedida * 0.8)
+    precios, usuario = crear_datos(args.productos, stock)
+    ids = list(precios)
+    # Token firmado: la autenticación no consulta la base de datos ni usa bcrypt
+    token = create_access_token(usuario)
+    cabeceras = {"Authorization": f"Bearer {token}"}
+
+    por_hilo = [args.pedidos // args.hilos + (1 if h < args.pedidos % args.hilos else 0) for h in range(args.hilos)]
+    resultados = []
+    candado = threading.Lock()
+
+    def trabajar(cliente, hilo):
+        azar = random.Random(args.semilla * 1000 + hilo)
+        propios = []
+        for _ in range(por_hilo[hilo]):
+            elegidos = azar.sample(ids, azar.randint(1, min(args.lineas, len(ids))))
+            items = [{"producto_id": producto_id, "cantidad": azar.randint(1, 8)} for producto_id in elegidos]
+            inicio = time.perf_counter()
+            respuesta = cliente.post(RUTA, json={"items": items}, headers=cabeceras)
+            segundos = time.perf_counter() - inicio
+            propios.append((respuesta.status_code, segundos, respuesta.json() if respuesta.status_code == 201 else None))
+        with candado:
+            resultados.extend(propios)
+
+    cliente = httpx.Client(base_url=args.url, timeout=30) if args.url else TestClient(app)
+    with cliente:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(args.hilos) as ejecutor:
+            list(ejecutor.map(lambda hilo: trabajar(cliente, hilo), range(args.hilos)))
+        segundos = time.perf_counter() - inicio
+
+    codigos = Counter(codigo for codigo, _, _ in resultados)
+    latencias = [s * 1000 for _, s, _ in resultados]
+    print(
+        f"{len(resultados)} pedidos con {args.hilos} hilos sobre {args.productos} productos (stock {stock} cada uno): "
+        f"{len(resultados) / segundos:.0f} pedidos/s, códigos {dict(sorted(codigos.items()))}"
+    )
+    print(
+        f"latencia media {statistics.mean(latencias):.1f} ms, p50 {percentil(latencias, 0.5):.1f} ms, "
+        f"p95 {percentil(latencias, 0.95):.1f} ms, p99 {percentil(latencias, 0.99):.1f} ms"
+    )
+
+    errores = comprobar(precios, stock, resultados)
+    for error in errores[:20]:
+        print(f"ERROR: {error}")
+    print("OK" if not errores else f"{len(errores)} errores")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
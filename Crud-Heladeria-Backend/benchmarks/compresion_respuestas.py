@@ -0,0 +1,94 @@
+"""
+Bytes en la red y CPU por respuesta de la compresión de los listados.
+
+Uso (desde Crud-Heladeria-Backend, con el esquema migrado):
+    python -m benchmarks.compresion_respuestas                 # sobre DATABASE_URL
+    python -m benchmarks.compresion_respuestas --sembrar 200000 --limit 100 500
+
+Para cada tamaño de página construye el cuerpo de GET /productos/ (camino de Core +
+orjson) y mide, por codificación y nivel, los bytes comprimidos y el tiempo de CPU de
+comprimirlo (lo que cuesta cada respuesta sin caché). La última fila de cada tamaño es
+el acierto de la caché de respuestas, que sirve el cuerpo ya comprimido: no gasta CPU
+en comprimir. Sale con código 1 si algún cuerpo comprimido no se descomprime igual.
+"""
+import argparse
+import gzip
+import statistics
+import sys
+import time
+
+import brotli
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.cache.compresion import comprimir
+from app.config import settings
+from app.database.database import engine
+from app.database.proyeccion import CAMPOS_PRODUCTO
+from app.models import Producto
+from benchmarks.explain_listados import sembrar
+from benchmarks.serializacion_listados import por_core
+
+DESCOMPRIMIR = {"gzip": gzip.decompress, "br": brotli.decompress}
+
+
+def cpu_ms(funcion, repeticiones: int) -> list:
+    """Tiempo de CPU del proceso (no de reloj) por llamada, en milisegundos"""
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.process_time_ns()
+        funcion()
+        tiempos.append((time.process_time_ns() - inicio) / 1e6)
+    return tiempos
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sembrar", type=int, default=0, help="Productos sintéticos a insertar antes de medir")
+    parser.add_argument("--limit", type=int, nargs="+", default=[20, 100, 500], help="Productos por página")
+    parser.add_argument("--gzip", type=int, nargs="+", default=[1, 6, 9], help="Niveles de gzip")
+    parser.add_argument("--brotli", type=int, nargs="+", default=[1, 5, 11], help="Calidades de brotli")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.sembrar:
+            sembrar(conn, args.sembrar)
+        conn.execute(text("ANALYZE"))
+
+    with Session(engine) as sesion:
+        total = sesion.scalar(select(func.count()).select_from(Producto))
+        print(f"{total} productos, {args.repeticiones} repeticiones, mínimo para comprimir {settings.COMPRESSION_MIN_BYTES} bytes")
+        cuerpos = {limit: por_core(sesion, limit, CAMPOS_PRODUCTO) for limit in args.limit}
+
+    configurados = settings.COMPRESSION_GZIP_LEVEL, settings.COMPRESSION_BROTLI_QUALITY
+    variantes = [("gzip", nivel) for nivel in args.gzip] + [("br", calidad) for calidad in args.brotli]
+    for limit, cuerpo in cuerpos.items():
+        print(f"\nlimit={limit}: {len(cuerpo)} bytes sin comprimir")
+        print(f"{'codificación':>14} {'bytes':>9} {'ratio':>6} {'CPU media':>10} {'p95':>8}")
+        for codificacion, nivel in variantes:
+            ajuste = "COMPRESSION_GZIP_LEVEL" if codificacion == "gzip" else "COMPRESSION_BROTLI_QUALITY"
+            setattr(settings, ajuste, nivel)
+            comprimido = comprimir(cuerpo, codificacion)
+            if DESCOMPRIMIR[codificacion](comprimido) != cuerpo:
+                print(f"ERROR: {codificacion} {nivel} no se descomprime igual")
+                return 1
+            tiempos = cpu_ms(lambda: comprimir(cuerpo, codificacion), args.repeticiones)
+            p95 = statistics.quantiles(tiempos, n=20)[-1]
+            print(
+                f"{codificacion + ' ' + str(nivel):>14} {len(comprimido):>9} {len(cuerpo) / len(comprimido):>5.1f}x "
+                f"{statistics.mean(tiempos):>7.3f} ms {p95:>5.3f} ms"
+            )
+
+        # Acierto de la caché: el cuerpo comprimido (con la calidad configurada) ya está en la entrada
+        settings.COMPRESSION_GZIP_LEVEL, settings.COMPRESSION_BROTLI_QUALITY = configurados
+        guardadas = {"br": comprimir(cuerpo, "br")}
+        tiempos = cpu_ms(lambda: guardadas.get("br"), args.repeticiones)
+        print(f"{'br ' + str(configurados[1]) + ' caché':>14} {len(guardadas['br']):>9} {len(cuerpo) / len(guardadas['br']):>5.1f}x {statistics.mean(tiempos):>7.3f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Prueba de concurrencia de las operaciones de stock a través de la API.
+
+Uso (desde Crud-Heladeria-Backend, con el esquema migrado; crea su propia categoría y
+productos, no usarlo contra una base de datos real):
+    python -m benchmarks.concurrencia_stock --hilos 16 --operaciones 50
+    DB_ASYNC=true python -m benchmarks.concurrencia_stock --comparar
+
+Cada escenario lanza --hilos hilos que hacen --operaciones peticiones cada uno contra
+los mismos productos y después compara el stock de la base de datos con las respuestas:
+
+  decrementar   hay stock para la mitad de las ventas: exactamente esa mitad recibe 200,
+                el resto 409 y el stock acaba en 0 (ni negativo ni ventas perdidas)
+  mezcla        incrementar 2 y decrementar 1 alternados: stock final = inicial + sumas
+  reservar      reservas de dos productos, la mitad en cada orden: todo o nada y sin
+                interbloqueos; los dos productos acaban con el mismo stock
+
+Con --comparar se ejecuta además el patrón anterior (leer el stock y fijarlo con
+PATCH /stock) para ver las actualizaciones que pierde. Sale con código 1 si algún
+escenario no cuadra.
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from app.auth.dependencies import get_current_active_user, get_current_active_user_async
+from app.database.database import engine
+from app.models import Categoria, Producto
+from main import app
+
+PREFIJO = "/api/v1/productos"
+
+
+def crear_productos(*stocks: int) -> list:
+    with engine.begin() as conn:
+        categoria_id = conn.execute(
+            insert(Categoria).values(nombre=f"Concurrencia {time.time_ns()}").returning(Categoria.id)
+        ).scalar_one()
+        return conn.execute(
+            insert(Producto).returning(Producto.id, sort_by_parameter_order=True),
+            [
+                {"nombre": f"Stock {i}", "sabor": "prueba", "precio": 1, "stock": stock, "categoria_id": categoria_id}
+                for i, stock in enumerate(stocks)
+            ]
+        ).scalars().all()
+
+
+def stock_actual(producto_id: int) -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(Producto.stock).where(Producto.id == producto_id))
+
+
+def en_paralelo(hilos: int, operaciones: int, operacion) -> tuple:
+    """Ejecutar operacion(hilo, i) en todos los hilos; códigos de estado y segundos"""
+    def trabajar(hilo):
+        return [operacion(hilo, i) for i in range(operaciones)]
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        codigos = [codigo for resultado in ejecutor.map(trabajar, range(hilos)) for codigo in resultado]
+    return codigos, time.perf_counter() - inicio
+
+
+def informar(nombre: str, codigos: list, segundos: float, correcto: bool, detalle: str) -> bool:
+    cuentas = {codigo: codigos.count(codigo) for codigo in sorted(set(codigos))}
+    print(f"{nombre:>12}: {len(codigos) / segundos:7.0f} peticiones/s, códigos {cuentas}, {detalle} -> {'OK' if correcto else 'ERROR'}")
+    return correcto
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--operaciones", type=int, default=50, help="Peticiones por hilo en cada escenario")
+    parser.add_argument("--comparar", action="store_true", help="Ejecutar también el patrón de leer y fijar")
+    args = parser.parse_args()
+    total = args.hilos * args.operaciones
+
+    # Sin autenticación: se mide el stock, no el login
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    app.dependency_overrides[get_current_active_user_async] = lambda: None
+    correcto = True
+
+    with TestClient(app) as cliente:
+        inicial = total // 2
+        producto_id, = crear_productos(inicial)
+        codigos, segundos = en_paralelo(
+            args.hilos, args.operaciones,
+            lambda hilo, i: cliente.patch(f"{PREFIJO}/{producto_id}/stock/decrementar", params={"cantidad": 1}).status_code
+        )
+        final = stock_actual(producto_id)
+        correcto &= informar(
+            "decrementar", codigos, segundos,
+            codigos.count(200) == inicial and codigos.count(409) == total - inicial and final == 0,
+            f"stock {inicial} -> {final}"
+        )
+
+        inicial = total
+        producto_id, = crear_productos(inicial)
+
+        def mezcla(hilo, i):
+            if i % 2:
+                return cliente.patch(f"{PREFIJO}/{producto_id}/stock/decrementar", params={"cantidad": 1}).status_code
+            return cliente.patch(f"{PREFIJO}/{producto_id}/stock/incrementar", params={"cantidad": 2}).status_code
+
+        codigos, segundos = en_paralelo(args.hilos, args.operaciones, mezcla)
+        final = stock_actual(producto_id)
+        esperado = inicial + 2 * ((args.operaciones + 1) // 2) * args.hilos - (args.operaciones // 2) * args.hilos
+        correcto &= informar(
+            "mezcla", codigos, segundos, set(codigos) == {200} and final == esperado, f"stock {final}, esperado {esperado}"
+        )
+
+        inicial = total // 2
+        primero, segundo = crear_productos(inicial, inicial)
+
+        def reservar(hilo, i):
+            lineas = [{"producto_id": primero, "cantidad": 1}, {"producto_id": segundo, "cantidad": 1}]
+            if hilo % 2:
+                lineas.reverse()
+            return cliente.post(f"{PREFIJO}/stock/reservar", json=lineas).status_code
+
+        codigos, segundos = en_paralelo(args.hilos, args.operaciones, reservar)
+        finales = stock_actual(primero), stock_actual(segundo)
+        correcto &= informar(
+            "reservar", codigos, segundos,
+            codigos.count(200) == inicial and codigos.count(409) == total - inicial and finales == (0, 0),
+            f"stock {inicial} -> {finales}"
+        )
+
+        if args.comparar:
+            inicial = total
+            producto_id, = crear_productos(inicial)
+
+            def leer_y_fijar(hilo, i):
+                stock = stock_actual(producto_id)
+                return cliente.patch(f"{PREFIJO}/{producto_id}/stock", params={"nuevo_stock": stock - 1}).status_code
+
+            codigos, segundos = en_paralelo(args.hilos, args.operaciones, leer_y_fijar)
+            final = stock_actual(producto_id)
+            informar(
+                "leer+fijar", codigos, segundos, True,
+                f"{codigos.count(200)} ventas, stock {inicial} -> {final}: {final - (inicial - codigos.count(200))} perdidas"
+            )
+
+    return 0 if correcto else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Número de sentencias SQL por petición en los listados, los detalles y eliminar_categoria.
+
+Uso (desde Crud-Heladeria-Backend, con el esquema migrado; crea sus propias categorías y
+productos, no usarlo contra una base de datos real):
+    python -m benchmarks.consultas_endpoints --productos 30
+    DB_ASYNC=true python -m benchmarks.consultas_endpoints
+
+Cuenta las sentencias que llegan al cursor (evento before_cursor_execute de los motores
+de la aplicación) durante cada petición y las compara con el máximo de cada endpoint.
+Los máximos no dependen del número de productos: una carga perezosa por fila (N+1) los
+supera en cuanto hay más de un producto. Se desactivan la instantánea del catálogo y la
+caché de respuestas para medir las consultas, no las copias en memoria. Sale con código 1
+si algún endpoint supera su máximo o no responde lo esperado.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Antes de importar la aplicación: la configuración se lee al importar
+os.environ["CATALOG_SNAPSHOT"] = "false"
+os.environ["RESPONSE_CACHE_MAX_BYTES"] = "0"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from app.auth.dependencies import get_current_active_user, get_current_active_user_async
+from app.database import database
+from app.models import Categoria, Producto
+from main import app
+
+PREFIJO = "/api/v1"
+
+
+class ContadorSentencias:
+    """Sentencias ejecutadas en todos los motores de la aplicación desde reiniciar()"""
+
+    def __init__(self):
+        self.total = 0
+        self._candado = threading.Lock()
+
+    def escuchar(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        with self._candado:
+            self.total += 1
+
+    def reiniciar(self) -> None:
+        with self._candado:
+            self.total = 0
+
+
+def motores() -> list:
+    encontrados = [database.engine, *database.replica_engines]
+    if database.async_engine is not None:
+        encontrados.append(database.async_engine.sync_engine)
+    encontrados.extend(replica_engine.sync_engine for replica_engine in database.async_replica_engines)
+    return encontrados
+
+
+def crear_datos(productos: int) -> tuple:
+    """Una categoría con productos (la mitad con precio mayorista) y otra vacía"""
+    marca = time.time_ns()
+    with database.engine.begin() as conn:
+        con_productos, vacia = conn.execute(
+            insert(Categoria).returning(Categoria.id, sort_by_parameter_order=True),
+            [{"nombre": f"Consultas {marca}"}, {"nombre": f"Consultas vacía {marca}"}]
+        ).scalars().all()
+        producto_id = conn.execute(
+            insert(Producto).returning(Producto.id, sort_by_parameter_order=True),
+            [
+                {
+                    "nombre": f"Consultas {i}", "sabor": "prueba", "precio": 2, "stock": 10,
+                    "precio_mayorista": 1 if i % 2 == 0 else None, "cantidad_minima_mayorista": 5,
+                    "categoria_id": con_productos,
+                }
+                for i in range(productos)
+            ]
+        ).scalars().first()
+    return con_productos, vacia, producto_id
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--productos", type=int, default=30, help="Productos de la categoría de prueba")
+    args = parser.parse_args()
+
+    # Sin autenticación: se cuentan las consultas del endpoint, no las del login
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    app.dependency_overrides[get_current_active_user_async] = lambda: None
+
+    contador = ContadorSentencias()
+    for engine in motores():
+        contador.escuchar(engine)
+
+    with TestClient(app) as cliente:
+        con_productos, vacia, producto_id = crear_datos(args.productos)
+        limite = {"limit": args.productos + 10}
+        # (método, ruta, parámetros, código esperado, máximo de sentencias). Los listados
+        # cuentan la consulta de la versión del catálogo (ETag) más la del contenido; el
+        # detalle de un producto trae su categoría en la misma consulta
+        casos = [
+            ("GET", "/productos/", limite, 200, 2),
+            ("GET", f"/productos/{producto_id}", None, 200, 1),
+            ("GET", "/productos/mayorista/disponibles", limite, 200, 2),
+            # La categoría, la versión y los productos
+            ("GET", f"/productos/categoria/{con_productos}", None, 200, 3),
+            ("GET", "/categorias/", limite, 200, 2),
+            # La versión, la categoría y sus productos (selectinload)
+            ("GET", f"/categorias/{con_productos}", None, 200, 3),
+            # Con productos activos: la categoría y un EXISTS, sin cargar los productos
+            ("DELETE", f"/categorias/{con_productos}", None, 400, 2),
+            # Sin productos: la categoría, el EXISTS y el UPDATE
+            ("DELETE", f"/categorias/{vacia}", None, 204, 3),
+        ]
+
+        errores = 0
+        for metodo, ruta, parametros, esperado, maximo in casos:
+            contador.reiniciar()
+            respuesta = cliente.request(metodo, PREFIJO + ruta, params=parametros)
+            sentencias = contador.total
+            correcto = respuesta.status_code == esperado and sentencias <= maximo
+            errores += not correcto
+            print(
+                f"{metodo:>6} {ruta:<40} {respuesta.status_code} (esperado {esperado}), "
+                f"{sentencias} sentencias (máximo {maximo}) -> {'OK' if correcto else 'ERROR'}"
+            )
+
+    print("OK" if not errores else f"{errores} endpoints fuera de su máximo")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Comprobar con EXPLAIN que los listados de productos usan índices.
+
+Uso (desde Crud-Heladeria-Backend, con el esquema migrado):
+    python -m benchmarks.explain_listados                 # sobre DATABASE_URL
+    python -m benchmarks.explain_listados --sembrar 200000
+
+--sembrar inserta productos sintéticos antes de medir; no usarlo contra una base de
+datos real. Sale con código 1 si algún plan recorre la tabla productos completa. Al final
+lista los índices de productos que no aparecen en ningún plan: cada uno cuesta una
+escritura más en cada alta y en cada cambio de stock.
+"""
+import argparse
+import random
+import re
+import sys
+
+from sqlalchemy import func, insert, inspect, select, text
+
+from app.config import settings
+from app.database.database import engine
+from app.database.filtros import OrdenProducto, columnas_orden
+from app.database.paginacion import paginar
+from app.models import Categoria, Producto
+
+# Filas de una página más la fila extra de paginar()
+LIMITE = 101
+
+
+def ordenado(query, orden: OrdenProducto):
+    columnas, descendente, _ = columnas_orden(orden)
+    return paginar(query, columnas, None, 0, LIMITE - 1, descendente)
+
+
+def consultas_listado(categoria_id: int, cursor_id: int) -> dict:
+    """Las mismas condiciones y orden que los listados de app/routers/productos.py"""
+    base = select(Producto).order_by(Producto.id).limit(LIMITE)
+    mayorista = base.where(
+        Producto.activo == True,
+        Producto.precio_mayorista.isnot(None),
+        Producto.cantidad_minima_mayorista.isnot(None)
+    )
+    activos = select(Producto).where(Producto.activo == True)
+    return {
+        "activo + rango de precio, orden por precio": ordenado(
+            activos.where(Producto.precio >= 50, Producto.precio <= 150), OrdenProducto.precio
+        ),
+        "activo, orden por -precio": ordenado(activos, OrdenProducto.precio_desc),
+        "activo + en stock": ordenado(activos.where(Producto.stock > 0), OrdenProducto.stock),
+        "activo + sabor": ordenado(activos.where(Producto.sabor.in_(["fresa", "limón"])), OrdenProducto.id),
+        "activo + un sabor": ordenado(activos.where(Producto.sabor.in_(["fresa"])), OrdenProducto.id),
+        "activo, orden por -fecha_creacion": ordenado(activos, OrdenProducto.fecha_creacion_desc),
+        "activo, orden por nombre": ordenado(activos, OrdenProducto.nombre),
+        "orden por nombre (activos o no)": ordenado(select(Producto), OrdenProducto.nombre),
+        "activo, orden por -stock": ordenado(activos, OrdenProducto.stock_desc),
+        "activo, orden por fecha_actualizacion": ordenado(activos, OrdenProducto.fecha_actualizacion),
+        "activo + actualizado desde, orden por id": ordenado(
+            activos.where(Producto.fecha_actualizacion >= "2026-01-01"), OrdenProducto.id
+        ),
+        "activo": base.where(Producto.activo == True),
+        "categoria + activo": base.where(Producto.categoria_id == categoria_id, Producto.activo == True),
+        "categoria + activo (cursor)": base.where(
+            Producto.categoria_id == categoria_id, Producto.activo == True, Producto.id > cursor_id
+        ),
+        "mayorista": mayorista,
+        "mayorista (cursor)": mayorista.where(Producto.id > cursor_id),
+    }
+
+
+def sembrar(conn, filas: int) -> None:
+    categorias = [f"Bench {i}" for i in range(20)]
+    conn.execute(insert(Categoria), [{"nombre": n, "activo": True} for n in categorias])
+    ids = conn.execute(select(Categoria.id).where(Categoria.nombre.in_(categorias))).scalars().all()
+    lote = []
+    for i in range(filas):
+        mayorista = random.random() < 0.1
+        lote.append({
+            "nombre": f"Producto {i}",
+            "sabor": random.choice(["vainilla", "chocolate", "fresa", "limón"]),
+            "precio": random.choice([50, 100, 150, 200]),
+            "precio_mayorista": 80 if mayorista else None,
+            "cantidad_minima_mayorista": 10 if mayorista else None,
+            "stock": random.choice([0, 0, 5, 20]),
+            "categoria_id": random.choice(ids),
+            "activo": random.random() < 0.8,
+        })
+        if len(lote) == 10000:
+            conn.execute(insert(Producto), lote)
+            lote = []
+    if lote:
+        conn.execute(insert(Producto), lote)
+
+
+def recorre_tabla(dialecto: str, plan: list) -> bool:
+    if dialecto == "sqlite":
+        # "SCAN productos" sin índice; "SCAN productos USING INDEX ..." sí usa uno
+        return any(linea.strip() == "SCAN productos" for linea in plan)
+    return any("Seq Scan on productos" in linea for linea in plan)
+
+
+def indices_usados(plan: list) -> set:
+    """Nombres de los índices que aparecen en un plan de SQLite o PostgreSQL"""
+    usados = set()
+    for linea in plan:
+        usados.update(re.findall(r"USING (?:COVERING )?INDEX (\w+)", linea))
+        usados.update(re.findall(r"Index (?:Only )?Scan (?:Backward )?using (\w+)", linea))
+        usados.update(re.findall(r"Bitmap Index Scan on (\w+)", linea))
+    return usados
+
+
+def explicar(conn, sentencia) -> list:
+    sql = str(sentencia.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [fila[-1] for fila in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    return [fila[0] for fila in conn.exec_driver_sql("EXPLAIN " + sql)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sembrar", type=int, default=0, help="Productos sintéticos a insertar antes de medir")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.sembrar:
+            sembrar(conn, args.sembrar)
+        conn.execute(text("ANALYZE"))
+
+    with engine.connect() as conn:
+        total = conn.scalar(select(func.count()).select_from(Producto))
+        categoria_id = conn.scalar(select(func.min(Producto.categoria_id))) or 1
+        cursor_id = (conn.scalar(select(func.max(Producto.id))) or 0) // 2
+        print(f"{settings.DATABASE_URL.split('@')[-1]}: {total} productos")
+
+        fallos = 0
+        usados = set()
+        for nombre, sentencia in consultas_listado(categoria_id, cursor_id).items():
+            plan = explicar(conn, sentencia)
+            malo = recorre_tabla(conn.dialect.name, plan)
+            fallos += malo
+            usados |= indices_usados(plan)
+            print(f"\n[{'SEQ SCAN' if malo else 'ok'}] {nombre}")
+            for linea in plan:
+                print(f"    {linea}")
+
+        # Los de búsqueda, revisión y fecha de actualización sirven a otras consultas
+        # (texto, sincronización del catálogo, versión del ETag), no a estos listados
+        indices = {indice["name"] for indice in inspect(conn).get_indexes("productos")}
+        sin_usar = sorted(indices - usados)
+        print(f"\nÍndices de productos sin usar en estos planes: {', '.join(sin_usar) or 'ninguno'}")
+
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
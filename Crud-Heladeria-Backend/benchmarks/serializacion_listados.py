@@ -0,0 +1,92 @@
+"""
+Comparar el listado de productos por el ORM con el camino rápido de Core + orjson.
+
+Uso (desde Crud-Heladeria-Backend, con el esquema migrado):
+    python -m benchmarks.serializacion_listados                 # sobre DATABASE_URL
+    python -m benchmarks.serializacion_listados --sembrar 200000 --limit 100
+
+Mide lo que hace GET /productos/ después de la red: consultar una página, construir
+las filas y serializarlas a bytes. "orm" es el camino anterior (Query con joinedload,
+validación de ProductoWithCategoria y dump_json de pydantic, como hace FastAPI con el
+response_model); "core" es el actual (app.database.proyeccion). Sale con código 1 si
+los bytes de los dos caminos no coinciden.
+"""
+import argparse
+import statistics
+import sys
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session, joinedload
+
+from app.database.database import engine
+from app.database.paginacion import paginar
+from app.database.proyeccion import CAMPOS_PRODUCTO, RespuestaJSON, _plan, consulta_proyectada
+from app.models import Producto
+from app.schemas.producto import ProductoWithCategoria
+from benchmarks.explain_listados import sembrar
+
+adaptador = TypeAdapter(List[ProductoWithCategoria])
+
+
+def por_orm(sesion: Session, limit: int, campos: list) -> bytes:
+    query = sesion.query(Producto).options(joinedload(Producto.categoria)).filter(Producto.activo == True)
+    productos = paginar(query, [Producto.id], None, 0, limit).all()[:limit]
+    validados = adaptador.validate_python(productos, from_attributes=True)
+    sesion.expunge_all()
+    return adaptador.dump_json(validados)
+
+
+def por_core(sesion: Session, limit: int, campos: list) -> bytes:
+    query = consulta_proyectada(Producto, campos, [Producto.id]).where(Producto.activo == True)
+    filas = sesion.execute(paginar(query, [Producto.id], None, 0, limit)).all()[:limit]
+    _, _, serializar = _plan(Producto, tuple(campos))
+    return RespuestaJSON(content=[serializar(fila) for fila in filas]).body
+
+
+def medir(funcion, sesion: Session, limit: int, repeticiones: int) -> list:
+    funcion(sesion, limit, CAMPOS_PRODUCTO)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(sesion, limit, CAMPOS_PRODUCTO)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sembrar", type=int, default=0, help="Productos sintéticos a insertar antes de medir")
+    parser.add_argument("--limit", type=int, default=100, help="Productos por página")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.sembrar:
+            sembrar(conn, args.sembrar)
+        conn.execute(text("ANALYZE"))
+
+    with Session(engine) as sesion:
+        total = sesion.scalar(select(func.count()).select_from(Producto))
+        print(f"{total} productos, limit={args.limit}, {args.repeticiones} repeticiones")
+
+        if por_orm(sesion, args.limit, CAMPOS_PRODUCTO) != por_core(sesion, args.limit, CAMPOS_PRODUCTO):
+            print("ERROR: la salida del camino rápido no coincide con la del response_model")
+            return 1
+        print("salida idéntica byte a byte")
+
+        medias = {}
+        for nombre, funcion in (("orm", por_orm), ("core", por_core)):
+            tiempos = medir(funcion, sesion, args.limit, args.repeticiones)
+            medias[nombre] = statistics.mean(tiempos)
+            p95 = statistics.quantiles(tiempos, n=20)[-1]
+            print(f"{nombre:>5}: media {medias[nombre]:.2f} ms, mediana {statistics.median(tiempos):.2f} ms, p95 {p95:.2f} ms")
+        print(f"core es {medias['orm'] / medias['core']:.1f}x más rápido")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
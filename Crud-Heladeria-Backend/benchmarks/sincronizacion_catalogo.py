@@ -0,0 +1,159 @@
+"""
+Prueba de que la instantánea del catálogo ve los cambios hechos por otro proceso.
+
+Uso (desde Crud-Heladeria-Backend, con el esquema migrado; crea su propia categoría y
+productos, no usarlo contra una base de datos real):
+    python -m benchmarks.sincronizacion_catalogo --rondas 50
+    DB_ASYNC=true python -m benchmarks.sincronizacion_catalogo
+
+Un proceso aparte (como otro worker de uvicorn) hace en cada ronda UPDATEs con SQL
+directo del stock de dos productos y del nombre de su categoría, con
+fecha_actualizacion = CURRENT_TIMESTAMP; esta aplicación, con la instantánea activada,
+los pide hasta ver los valores nuevos. Las rondas van seguidas, así que muchas caen en
+el mismo segundo que la anterior y dejan la misma max(fecha_actualizacion).
+
+En PostgreSQL el primer producto se actualiza en una transacción que empieza antes y
+confirma después de la del segundo producto y la categoría, así que su revisión (el id
+de la transacción) queda por debajo de otra ya vista: la aplicación ve el segundo
+producto y la categoría mientras la primera transacción sigue abierta, y después tiene
+que ver también el primer producto. En SQLite, con un solo escritor, todo va en una
+transacción. Cada cambio tiene que verse antes de --espera segundos; si no, sale con
+código 1.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+# Antes de importar la aplicación: la configuración se lee al importar. Sin la caché de
+# respuestas, que tiene su propia vigencia: aquí se prueba la instantánea
+os.environ["CATALOG_SNAPSHOT"] = "true"
+os.environ.setdefault("CATALOG_SNAPSHOT_SYNC_SECONDS", "0.05")
+os.environ["RESPONSE_CACHE_MAX_BYTES"] = "0"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, text
+
+from app.config import settings
+from app.database.database import engine
+from app.models import Categoria, Producto
+from main import app
+
+PREFIJO = "/api/v1"
+
+ACTUALIZAR_PRODUCTO = text(
+    "UPDATE productos SET stock = :stock, fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = :id"
+)
+ACTUALIZAR_CATEGORIA = text(
+    "UPDATE categorias SET nombre = :nombre, fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = :id"
+)
+
+
+def escritor(url: str, conexion) -> None:
+    """
+    Proceso aparte: aplica cada (primero, segundo, stock, categoria_id, nombre) que
+    recibe. En PostgreSQL avisa con "intercalado" cuando el segundo producto y la
+    categoría están confirmados y el primero aún no, y espera respuesta para
+    confirmarlo; al terminar, True.
+    """
+    motor = create_engine(url)
+    # SQLite tiene un solo escritor: la segunda transacción esperaría a la primera
+    intercalar = motor.dialect.name != "sqlite"
+    while (orden := conexion.recv()) is not None:
+        primero, segundo, stock, categoria_id, nombre = orden
+        with motor.begin() as conn:
+            conn.execute(ACTUALIZAR_PRODUCTO, {"stock": stock, "id": primero})
+            with (motor.begin() if intercalar else nullcontext(conn)) as otra:
+                otra.execute(ACTUALIZAR_PRODUCTO, {"stock": stock, "id": segundo})
+                otra.execute(ACTUALIZAR_CATEGORIA, {"nombre": nombre, "id": categoria_id})
+            if intercalar:
+                conexion.send("intercalado")
+                conexion.recv()
+        conexion.send(True)
+    motor.dispose()
+
+
+def crear_datos() -> tuple:
+    marca = time.time_ns()
+    with engine.begin() as conn:
+        categoria_id = conn.execute(
+            insert(Categoria).values(nombre=f"Sincronización {marca}").returning(Categoria.id)
+        ).scalar_one()
+        primero, segundo = conn.execute(
+            insert(Producto).returning(Producto.id, sort_by_parameter_order=True),
+            [
+                {"nombre": f"Sincronización {i}", "sabor": "prueba", "precio": 1, "stock": 0, "categoria_id": categoria_id}
+                for i in (1, 2)
+            ]
+        ).scalars().all()
+    return categoria_id, primero, segundo, marca
+
+
+def esperar(cliente, ruta: str, campo: str, valor, segundos: float) -> float:
+    """Segundos hasta que GET `ruta` devuelve `valor` en `campo`, o None si no llega"""
+    inicio = time.perf_counter()
+    while True:
+        if cliente.get(PREFIJO + ruta).json()[campo] == valor:
+            return time.perf_counter() - inicio
+        if time.perf_counter() - inicio > segundos:
+            return None
+        time.sleep(0.01)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rondas", type=int, default=50)
+    parser.add_argument("--espera", type=float, default=None,
+                        help="Segundos máximos hasta ver cada cambio (por defecto, 20 intervalos de sincronización + 1)")
+    args = parser.parse_args()
+    espera = args.espera if args.espera is not None else settings.CATALOG_SNAPSHOT_SYNC_SECONDS * 20 + 1
+
+    local, remoto = multiprocessing.Pipe()
+    proceso = multiprocessing.get_context("spawn").Process(target=escritor, args=(settings.DATABASE_URL, remoto))
+    proceso.start()
+    errores = 0
+    tiempos = []
+    try:
+        with TestClient(app) as cliente:
+            categoria_id, primero, segundo, marca = crear_datos()
+            for ronda in range(1, args.rondas + 1):
+                # Instantánea al día antes de cada cambio del otro proceso
+                cliente.get(f"{PREFIJO}/productos/{primero}")
+                nombre = f"Sincronización {marca} {ronda}"
+                local.send((primero, segundo, ronda, categoria_id, nombre))
+                cambios = [
+                    (f"/productos/{segundo}", "stock", ronda),
+                    (f"/categorias/{categoria_id}", "nombre", nombre),
+                    (f"/productos/{primero}", "stock", ronda),
+                ]
+                if local.recv() == "intercalado":
+                    # Lo ya confirmado, con la transacción del primer producto abierta
+                    vistos = [esperar(cliente, *cambio, espera) for cambio in cambios[:2]]
+                    local.send(True)
+                    local.recv()
+                    vistos.append(esperar(cliente, *cambios[2], espera))
+                else:
+                    vistos = [esperar(cliente, *cambio, espera) for cambio in cambios]
+                for (ruta, campo, valor), segundos in zip(cambios, vistos):
+                    if segundos is None:
+                        errores += 1
+                        print(f"ERROR: ronda {ronda}: {ruta} no muestra {campo}={valor!r} tras {espera:.1f} s")
+                    else:
+                        tiempos.append(segundos)
+    finally:
+        local.send(None)
+        proceso.join()
+
+    if tiempos:
+        print(
+            f"{args.rondas} rondas, sincronización cada {settings.CATALOG_SNAPSHOT_SYNC_SECONDS} s: cambios vistos "
+            f"en {sum(tiempos) / len(tiempos) * 1000:.0f} ms de media, {max(tiempos) * 1000:.0f} ms como mucho"
+        )
+    print("OK" if not errores else f"{errores} cambios sin ver")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
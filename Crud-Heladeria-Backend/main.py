@@ -1,21 +1,50 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import logging
 import os
 from dotenv import load_dotenv
 
-# Importar routers
-from app.routers import categorias, productos, auth
+from app.config import settings
 
-# Importar modelos para crear las tablas
-from app.models import categoria, producto, usuario
-from app.database.database import engine, Base
+# Importar routers (versiones asíncronas si DB_ASYNC está activo)
+if settings.DB_ASYNC:
+    from app.routers import (
+        categorias_async as categorias,
+        productos_async as productos,
+        pedidos_async as pedidos,
+        auth_async as auth,
+    )
+else:
+    from app.routers import categorias, productos, pedidos, auth
+from app.routers import admin
+
+# Importar modelos para registrar los mappers
+from app.models import categoria, producto, pedido, usuario
+from app.database.database import async_engine
+from app.auth.pool import password_pool
+from app.auth.security import tokens_habilitados
+from app.cache.compresion import CompresionMiddleware
+from app.cache.respuestas import CacheRespuestasMiddleware
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Crear las tablas en la base de datos
-Base.metadata.create_all(bind=engine)
+# El esquema lo gestionan las migraciones de Alembic (alembic upgrade head)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not tokens_habilitados():
+        logging.getLogger("app.auth").warning(
+            "SECRET_KEY sin configurar (valor de ejemplo): /auth/login no emite tokens y no se aceptan tokens Bearer"
+        )
+    yield
+    # Detener los procesos del pool de bcrypt
+    password_pool.cerrar()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 
 # Crear la aplicación FastAPI
 app = FastAPI(
@@ -23,9 +52,15 @@ app = FastAPI(
     version=os.getenv("APP_VERSION", "1.0.0"),
     description="API REST para gestión de heladería con sistema de precios mayoristas",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# Caché de respuestas GET del catálogo (ver app/cache/respuestas.py). El último middleware
+# añadido es el más externo: la caché queda dentro de CORS, que pone sus cabeceras (según el
+# Origin de cada petición) también en los aciertos, y de la compresión
+app.add_middleware(CacheRespuestasMiddleware)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -33,12 +68,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Cache"],
 )
 
+# Compresión gzip / brotli (ver app/cache/compresion.py)
+app.add_middleware(CompresionMiddleware)
+
 # Incluir routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(categorias.router, prefix="/api/v1")
 app.include_router(productos.router, prefix="/api/v1")
+app.include_router(pedidos.router, prefix="/api/v1")
+app.include_router(admin.router, prefix="/api/v1")
 
 
 # Manejador de errores global
@@ -88,7 +129,8 @@ def api_info():
         "endpoints": {
             "categorias": "/api/v1/categorias",
             "productos": "/api/v1/productos",
-            "productos_mayorista": "/api/v1/productos/mayorista/disponibles"
+            "productos_mayorista": "/api/v1/productos/mayorista/disponibles",
+            "pedidos": "/api/v1/pedidos"
         },
         "features": [
             "CRUD completo para categorías",
@@ -96,6 +138,7 @@ def api_info():
             "Sistema de precios mayoristas",
             "Cálculo automático de precios por cantidad",
             "Gestión de stock",
+            "Pedidos con reserva de stock",
             "Filtros y paginación",
             "Soft delete (eliminación lógica)"
         ]